@@ -0,0 +1,58 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstractMigrationStep):
+    def __init__(self):
+        self._depends = ["0003-add-chat-type-to-folder-items-a1b2c3.py"]
+
+    @property
+    def migration_id(self):
+        return "bc271359-9128-4237-95a0-3bdfddb4f593"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            # Cache content is disposable, so skip WAL for it
+            """
+            CREATE UNLOGGED TABLE IF NOT EXISTS "auth_cache" (
+                "fingerprint" CHAR(64) PRIMARY KEY,
+                "user_id" INTEGER NOT NULL,
+                "expires_at" TIMESTAMP(6) NOT NULL
+            );
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS "auth_cache_expires_at_idx"
+                ON "auth_cache" ("expires_at");
+            """,
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        tables = ["auth_cache"]
+
+        for table in tables:
+            self._delete_table_if_exists(session, table)
+
+
+migration_step = MigrationStep()
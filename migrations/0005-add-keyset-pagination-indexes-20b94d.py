@@ -0,0 +1,79 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstractMigrationStep):
+    def __init__(self):
+        self._depends = ["0004-add-shared-auth-cache-bc2713.py"]
+
+    @property
+    def migration_id(self):
+        return "20b94dd6-7fbc-4ded-a25e-879bac5ed997"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            # Keyset pagination walks (scope, created_at, uuid) ranges
+            """
+            CREATE INDEX IF NOT EXISTS "folders_user_id_created_at_uuid_idx"
+                ON "folders" ("user_id", "created_at", "uuid");
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS
+                "folder_items_user_id_created_at_uuid_idx"
+                ON "folder_items" ("user_id", "created_at", "uuid");
+            """,
+            # Also serves lookups by folder, so replaces the plain index
+            """
+            CREATE INDEX IF NOT EXISTS
+                "folder_items_folder_created_at_uuid_idx"
+                ON "folder_items" ("folder", "created_at", "uuid");
+            """,
+            """
+            DROP INDEX IF EXISTS "folder_items_folder_idx";
+            """,
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        expressions = [
+            """
+            CREATE INDEX IF NOT EXISTS "folder_items_folder_idx"
+                ON "folder_items" ("folder");
+            """,
+            """
+            DROP INDEX IF EXISTS "folder_items_folder_created_at_uuid_idx";
+            """,
+            """
+            DROP INDEX IF EXISTS "folder_items_user_id_created_at_uuid_idx";
+            """,
+            """
+            DROP INDEX IF EXISTS "folders_user_id_created_at_uuid_idx";
+            """,
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+
+migration_step = MigrationStep()
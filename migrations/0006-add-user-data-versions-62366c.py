@@ -0,0 +1,53 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstractMigrationStep):
+    def __init__(self):
+        self._depends = ["0005-add-keyset-pagination-indexes-20b94d.py"]
+
+    @property
+    def migration_id(self):
+        return "62366ca7-3637-481e-9aec-129399d2448c"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            # Bumped in the transaction of every folder or item write
+            """
+            CREATE TABLE IF NOT EXISTS "user_data_versions" (
+                "user_id" INTEGER PRIMARY KEY,
+                "version" BIGINT NOT NULL DEFAULT 0
+            );
+            """,
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        tables = ["user_data_versions"]
+
+        for table in tables:
+            self._delete_table_if_exists(session, table)
+
+
+migration_step = MigrationStep()
@@ -0,0 +1,66 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstractMigrationStep):
+    def __init__(self):
+        self._depends = ["0006-add-user-data-versions-62366c.py"]
+
+    @property
+    def migration_id(self):
+        return "4e354ea0-480c-4952-beb3-5d58e7eab56d"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            # Latest version of every changed folder or item, deleted ones
+            # are kept as tombstones for delta sync
+            """
+            CREATE TABLE IF NOT EXISTS "user_data_changes" (
+                "uuid" UUID PRIMARY KEY,
+                "user_id" INTEGER NOT NULL,
+                "kind" VARCHAR(16) NOT NULL,
+                "version" BIGINT NOT NULL,
+                "deleted_at" TIMESTAMP(6) NULL
+            );
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS "user_data_changes_user_id_version_idx"
+                ON "user_data_changes" ("user_id", "version");
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS "user_data_changes_tombstones_idx"
+                ON "user_data_changes" ("user_id", "deleted_at")
+                WHERE "deleted_at" IS NOT NULL;
+            """,
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        tables = ["user_data_changes"]
+
+        for table in tables:
+            self._delete_table_if_exists(session, table)
+
+
+migration_step = MigrationStep()
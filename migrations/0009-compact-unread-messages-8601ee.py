@@ -0,0 +1,61 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+from restalchemy.storage.sql import migrations
+
+
+class MigrationStep(migrations.AbstractMigrationStep):
+    def __init__(self):
+        self._depends = ["0008-add-folder-items-order-index-176129.py"]
+
+    @property
+    def migration_id(self):
+        return "8601eefd-3b29-4b20-870d-7a8ff41e0304"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        expressions = [
+            # Message ids are 31-bit integers, every JSONB element costs a
+            # header and a parse. The text form of a JSONB[] of numbers,
+            # e.g. {1,2}, is also a valid INTEGER[] literal.
+            """
+            ALTER TABLE "folders"
+                ALTER COLUMN "unread_messages" TYPE INTEGER[]
+                USING "unread_messages"::TEXT::INTEGER[];
+            """,
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+    def downgrade(self, session):
+        expressions = [
+            """
+            ALTER TABLE "folders"
+                ALTER COLUMN "unread_messages" TYPE JSONB[]
+                USING "unread_messages"::TEXT::JSONB[];
+            """,
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+
+migration_step = MigrationStep()
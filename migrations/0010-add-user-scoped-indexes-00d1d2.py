@@ -0,0 +1,64 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.storage.sql import migrations
+
+from workspace.common import online_migrations
+
+
+class MigrationStep(migrations.AbstractMigrationStep):
+    def __init__(self):
+        self._depends = ["0009-compact-unread-messages-8601ee.py"]
+
+    @property
+    def migration_id(self):
+        return "00d1d214-baff-4340-8627-2b45ca2eba5e"
+
+    @property
+    def is_manual(self):
+        return False
+
+    def upgrade(self, session):
+        # Chat ids are shared by all members of a chat, so a lookup by
+        # chat id alone reads the items of every such user
+        online_migrations.create_index_concurrently(
+            session,
+            "folder_items_user_id_chat_id_idx",
+            "folder_items",
+            '"user_id", "chat_id"',
+        )
+        online_migrations.create_index_concurrently(
+            session,
+            "folders_user_id_system_type_idx",
+            "folders",
+            '"user_id", "system_type"',
+        )
+
+    def downgrade(self, session):
+        expressions = [
+            """
+            DROP INDEX IF EXISTS "folders_user_id_system_type_idx";
+            """,
+            """
+            DROP INDEX IF EXISTS "folder_items_user_id_chat_id_idx";
+            """,
+        ]
+
+        for expression in expressions:
+            session.execute(expression)
+
+
+migration_step = MigrationStep()
@@ -14,24 +14,36 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import math
 from http import client as http_client
 
 from bazooka import exceptions as bazooka_exc
 from restalchemy.api.middlewares import errors as ra_errors
 
+from workspace.common import exceptions as common_exc
+
 
 class ErrorsHandlerMiddleware(ra_errors.ErrorsHandlerMiddleware):
     """Extend RESTAlchemy ErrorsHandlerMiddleware with bazooka/Zulip errors.
 
     All core RESTAlchemy error handling is delegated to the base class.
-    This subclass only adds mapping for bazooka HTTP exceptions.
+    This subclass only adds mapping for bazooka HTTP exceptions and for
+    an unavailable auth backend.
     """
 
     unauthorized_exc = (bazooka_exc.UnauthorizedError,)
     forbidden_exc = (bazooka_exc.ForbiddenError,)
     external_http_exc = (bazooka_exc.BaseHTTPException,)
+    unavailable_exc = (common_exc.AuthBackendUnavailableError,)
 
     def _construct_error_response(self, req, exc):
+        if isinstance(exc, self.unavailable_exc):
+            resp = req.ResponseClass(
+                status=http_client.SERVICE_UNAVAILABLE,
+                json=ra_errors.exception2dict(exc),
+            )
+            resp.headers["Retry-After"] = str(max(math.ceil(exc.retry_after), 1))
+            return resp
         # Auth backend (Zulip) / bazooka HTTP errors first
         if isinstance(exc, self.unauthorized_exc):
             return req.ResponseClass(
@@ -1,20 +1,219 @@
+import hashlib
+
+from bazooka import exceptions as bazooka_exc
+from oslo_config import cfg
 from restalchemy.api import middlewares as ra_middlewares
 from restalchemy.common import contexts as common_contexts
 from restalchemy.common import exceptions as comm_exc
 
+from workspace.common import caches
+from workspace.common import circuit_breaker
+from workspace.common import exceptions as common_exc
+from workspace.common import identity_map
+from workspace.common import singleflight
+from workspace.common import tokens
 from workspace.common.clients import zulip as zulip_client
 
 
+AUTH_CACHE_DOMAIN = "auth_cache"
+
+auth_cache_opts = [
+    cfg.BoolOpt(
+        "enabled",
+        default=True,
+        help="Cache user_id resolved by Zulip per credentials in memory",
+    ),
+    cfg.IntOpt(
+        "ttl",
+        default=60,
+        min=0,
+        help="How long (in seconds) a resolved user_id stays cached",
+    ),
+    cfg.IntOpt(
+        "max_size",
+        default=10000,
+        min=1,
+        help="Maximum number of cached credentials per worker process",
+    ),
+    cfg.BoolOpt(
+        "shared",
+        default=False,
+        help="Share resolved user_id between worker processes through "
+        "the auth_cache database table",
+    ),
+    cfg.IntOpt(
+        "shared_ttl",
+        default=300,
+        min=0,
+        help="How long (in seconds) a user_id stays in the shared cache",
+    ),
+    cfg.IntOpt(
+        "shared_max_size",
+        default=100000,
+        min=1,
+        help="Maximum number of entries in the shared cache",
+    ),
+    cfg.IntOpt(
+        "shared_cleanup_interval",
+        default=100,
+        min=1,
+        help="Trim the shared cache every N writes of a worker",
+    ),
+    cfg.IntOpt(
+        "negative_ttl",
+        default=5,
+        min=0,
+        help="How long (in seconds) a 401/403 answer of Zulip is replayed "
+        "for the same credentials without asking Zulip again. "
+        "0 disables negative caching",
+    ),
+    cfg.IntOpt(
+        "negative_max_size",
+        default=10000,
+        min=1,
+        help="Maximum number of rejected credentials cached per worker",
+    ),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(auth_cache_opts, AUTH_CACHE_DOMAIN)
+
+# Headers forwarded to Zulip to authenticate the request
+AUTH_HEADERS = ("Authorization", "Cookie")
+
+BEARER_PREFIX = "Bearer "
+
+# How user_id of a request was resolved
+AUTH_METHOD_ZULIP = "zulip"
+AUTH_METHOD_TOKEN = "token"
+
+# Authentication requirements of a controller:
+# - none: the handler never needs the user, Zulip is never called
+# - lazy: the user is resolved on first access to `user_id`
+# - eager: the user is resolved before the request is handled, so
+#   unauthenticated requests are rejected even if the handler does not
+#   use `user_id`
+AUTH_POLICY_NONE = "none"
+AUTH_POLICY_LAZY = "lazy"
+AUTH_POLICY_EAGER = "eager"
+AUTH_POLICIES = (AUTH_POLICY_NONE, AUTH_POLICY_LAZY, AUTH_POLICY_EAGER)
+
+# Zulip answers which are replayed from the negative cache
+NEGATIVE_CACHE_EXC = (bazooka_exc.UnauthorizedError, bazooka_exc.ForbiddenError)
+
+_user_cache = None
+_shared_user_cache = None
+_rejected_cache = None
+
+# Concurrent lookups of the same credentials share one Zulip call
+_user_lookups = singleflight.SingleFlight()
+
+
+def get_user_lookups_stats():
+    """Return counters of coalesced Zulip user lookups."""
+    return _user_lookups.stats()
+
+
+def get_user_cache():
+    """Return the per-process user_id cache or None if it is disabled."""
+    global _user_cache
+    if _user_cache is None and CONF[AUTH_CACHE_DOMAIN].enabled:
+        _user_cache = caches.TTLCache(
+            ttl=CONF[AUTH_CACHE_DOMAIN].ttl,
+            max_size=CONF[AUTH_CACHE_DOMAIN].max_size,
+        )
+    return _user_cache
+
+
+def get_shared_user_cache():
+    """Return the cross-worker user_id cache or None if it is disabled."""
+    global _shared_user_cache
+    if _shared_user_cache is None and CONF[AUTH_CACHE_DOMAIN].shared:
+        _shared_user_cache = caches.SharedUserCache(
+            ttl=CONF[AUTH_CACHE_DOMAIN].shared_ttl,
+            max_size=CONF[AUTH_CACHE_DOMAIN].shared_max_size,
+            cleanup_interval=CONF[AUTH_CACHE_DOMAIN].shared_cleanup_interval,
+        )
+    return _shared_user_cache
+
+
+def get_rejected_cache():
+    """Return the per-process cache of rejected credentials or None."""
+    global _rejected_cache
+    if _rejected_cache is None and CONF[AUTH_CACHE_DOMAIN].negative_ttl > 0:
+        _rejected_cache = caches.TTLCache(
+            ttl=CONF[AUTH_CACHE_DOMAIN].negative_ttl,
+            max_size=CONF[AUTH_CACHE_DOMAIN].negative_max_size,
+        )
+    return _rejected_cache
+
+
+def credentials_fingerprint(host, headers):
+    """Build a stable cache key for the credentials of a request.
+
+    Raw credentials are never kept in memory as keys, only their digest.
+    """
+    digest = hashlib.sha256(host.encode("utf-8"))
+    for name in AUTH_HEADERS:
+        digest.update(b"\x00")
+        digest.update(headers.get(name, "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def invalidate_user_cache(host=None, headers=None):
+    """Drop cached user resolution.
+
+    Without arguments the whole cache is flushed, otherwise only the entry
+    for the given host and credentials is removed. Both the local and the
+    shared cache are affected.
+    """
+    caches_ = (get_user_cache(), get_shared_user_cache(), get_rejected_cache())
+    for cache in caches_:
+        if cache is None:
+            continue
+        if host is None:
+            cache.clear()
+        else:
+            cache.invalidate(credentials_fingerprint(host, headers or {}))
+
+
 class UserContext(common_contexts.Context):
-    def __init__(self, user_id, **kwargs):
+    def __init__(
+        self,
+        user_id=None,
+        auth_method=AUTH_METHOD_ZULIP,
+        resolver=None,
+        **kwargs,
+    ):
         # Initialize base context (DB engine, etc.)
         super().__init__(**kwargs)
         # Additional user_id field fetched from external service
         self._user_id = user_id
+        self._auth_method = auth_method
+        # Callable returning (user_id, auth_method), called on first use
+        self._resolver = resolver
+        # Rows already loaded in this request, see _get_owned of controllers
+        self.identity_map = identity_map.IdentityMap()
+
+    def resolve(self):
+        """Resolve the user if it was not done yet and return user_id."""
+        if self._resolver is not None:
+            self._user_id, self._auth_method = self._resolver()
+            self._resolver = None
+        return self._user_id
+
+    @property
+    def is_resolved(self):
+        return self._resolver is None
 
     @property
     def user_id(self):
-        return self._user_id
+        return self.resolve()
+
+    @property
+    def auth_method(self):
+        self.resolve()
+        return self._auth_method
 
 
 class UserContextMiddleware(ra_middlewares.Middleware):
@@ -25,31 +224,28 @@ class UserContextMiddleware(ra_middlewares.Middleware):
         "/specifications/3.0.3",
     ]
 
-    def process_request(self, req):
-        # If context already exists, do not override it and do not call Zulip
-        if hasattr(req, "context") and req.context is not None:
-            return None
-
-        if req.path in self.EXCLUDE_PATHS:
-            return None
+    @staticmethod
+    def _get_auth_headers(req):
+        headers = {}
+        for name in AUTH_HEADERS:
+            value = req.headers.get(name)
+            if value:
+                headers[name] = value
+        return headers
 
+    def _fetch_user_id(self, req, headers):
         # Build Zulip endpoint on the same domain as the incoming request
         proto = req.headers.get("X-Forwarded-Proto", req.scheme)
         base_url = f"{proto}://{req.headers['Host']}"
-        client = zulip_client.ZulipClient(endpoint=base_url, timeout=3)
-
-        headers = {}
-
-        auth = req.headers.get("Authorization")
-        if auth:
-            headers["Authorization"] = auth
-
-        cookie = req.headers.get("Cookie")
-        if cookie:
-            headers["Cookie"] = cookie
+        client = zulip_client.get_client(base_url)
 
         try:
-            user_id = client.get_current_user_id(headers=headers)
+            return client.get_current_user_id(headers=headers)
+        except circuit_breaker.CircuitOpenError as exc:
+            # Zulip is failing, do not wait for its timeout
+            raise common_exc.AuthBackendUnavailableError(
+                retry_after=exc.retry_after,
+            )
         except Exception as exc:
             # Let bazooka HTTP exceptions bubble up so
             # ErrorsHandlerMiddleware can format them. Wrap any
@@ -61,6 +257,80 @@ class UserContextMiddleware(ra_middlewares.Middleware):
                 raise
             raise comm_exc.ValidationErrorException()
 
-        # Create context only if it does not exist yet
-        req.context = UserContext(user_id=user_id)
+    def _resolve_user_id(self, req, headers, fingerprint):
+        shared_cache = get_shared_user_cache()
+        user_id = None
+        if shared_cache is not None:
+            user_id = shared_cache.get(fingerprint)
+        if user_id is None:
+            try:
+                user_id = self._fetch_user_id(req, headers)
+            except NEGATIVE_CACHE_EXC as exc:
+                rejected_cache = get_rejected_cache()
+                if rejected_cache is not None:
+                    rejected_cache.set(fingerprint, exc)
+                raise
+            if shared_cache is not None:
+                shared_cache.set(fingerprint, user_id)
+        cache = get_user_cache()
+        if cache is not None:
+            cache.set(fingerprint, user_id)
+        return user_id
+
+    def authenticate(self, req):
+        """Resolve the user of a request.
+
+        :return: tuple of user_id and the auth method used.
+        """
+        headers = self._get_auth_headers(req)
+
+        # Session tokens issued by us are verified locally, without Zulip
+        authorization = headers.get("Authorization", "")
+        if authorization.startswith(BEARER_PREFIX) and tokens.is_enabled():
+            try:
+                user_id = tokens.verify_token(
+                    authorization[len(BEARER_PREFIX) :].strip(),
+                    issuer=req.headers["Host"],
+                )
+            except tokens.InvalidTokenError:
+                # Fall back to Zulip if the request has a session cookie
+                del headers["Authorization"]
+                if not headers:
+                    raise common_exc.InvalidSessionTokenError()
+            else:
+                return user_id, AUTH_METHOD_TOKEN
+
+        fingerprint = credentials_fingerprint(req.headers["Host"], headers)
+
+        # Credentials just rejected by Zulip get the same answer for a
+        # short while, so broken clients can not hammer Zulip
+        rejected_cache = get_rejected_cache()
+        if rejected_cache is not None:
+            rejected = rejected_cache.get(fingerprint)
+            if rejected is not None:
+                raise rejected.with_traceback(None)
+
+        # Only successful resolutions and rejections are cached, other
+        # errors always go to Zulip
+        cache = get_user_cache()
+        user_id = cache.get(fingerprint) if cache is not None else None
+        if user_id is None:
+            user_id = _user_lookups.do(
+                fingerprint,
+                lambda: self._resolve_user_id(req, headers, fingerprint),
+            )
+        return user_id, AUTH_METHOD_ZULIP
+
+    def process_request(self, req):
+        # If context already exists, do not override it and do not call Zulip
+        if hasattr(req, "context") and req.context is not None:
+            return None
+
+        if req.path in self.EXCLUDE_PATHS:
+            return None
+
+        # The user is resolved on first access to user_id, so controllers
+        # which do not need it never call Zulip. See AUTH_POLICY_* for how
+        # controllers declare their requirements.
+        req.context = UserContext(resolver=lambda: self.authenticate(req))
         return None
@@ -0,0 +1,220 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import base64
+import binascii
+import json
+
+from restalchemy.api import controllers as ra_controllers
+from restalchemy.common import exceptions as ra_exc
+from restalchemy.dm import filters as dm_filters
+
+from workspace.common import exceptions as common_exc
+
+
+def encode_marker(values):
+    """Pack simple sort key values of the last row into an opaque token."""
+    payload = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode("ascii")
+
+
+def decode_marker(token, keys):
+    """Unpack a token built by `encode_marker`.
+
+    :return: dict of simple values for every name in `keys`.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise common_exc.InvalidPageMarkerError()
+    if not isinstance(values, dict) or set(values) != set(keys):
+        raise common_exc.InvalidPageMarkerError()
+    return values
+
+
+def build_keyset_filter(keys, values, descending=False, nullable=()):
+    """Build restalchemy filters selecting rows after `values` in `keys` order.
+
+    For keys (a, b) this is `a >= va AND (a > va OR b > vb)`. The leading
+    range on `a` lets an index on (..., a, b) start right at the marker, so
+    the cost of a page does not depend on how deep it is. With
+    `descending` the comparisons are flipped, for rows ordered by all keys
+    descending.
+
+    Keys in `nullable` may be NULL, which PostgreSQL sorts after all
+    values ascending and before them descending. The last key must never
+    be NULL.
+    """
+    if descending:
+        after, from_ = dm_filters.LT, dm_filters.LE
+    else:
+        after, from_ = dm_filters.GT, dm_filters.GE
+    name, *rest = keys
+    if name in nullable and values[name] is None:
+        # The marker row is one of the NULLs
+        same = dm_filters.AND(
+            {name: dm_filters.Is(None)},
+            build_keyset_filter(rest, values, descending, nullable),
+        )
+        if descending:
+            return dm_filters.OR(same, {name: dm_filters.IsNot(None)})
+        return same
+    if not rest:
+        result = {name: after(values[name])}
+    else:
+        result = dm_filters.AND(
+            {name: from_(values[name])},
+            dm_filters.OR(
+                {name: after(values[name])},
+                build_keyset_filter(rest, values, descending, nullable),
+            ),
+        )
+    if name in nullable and not descending:
+        result = dm_filters.OR(result, {name: dm_filters.Is(None)})
+    return result
+
+
+class KeysetPaginationMixin:
+    """Keyset pagination with opaque markers.
+
+    Keeps the contract of restalchemy's BasePaginationMixin (`page_limit`
+    and `page_marker` params, `X-Pagination-Limit` and
+    `X-Pagination-Marker` headers), but pages are ordered by `__keyset__`,
+    ascending or descending, and the marker carries the key values of the
+    last row instead of its uuid. So no lookup of the marker row is needed
+    and a page costs the same no matter how deep it is.
+
+    Listings without `page_limit` and `page_marker` are not paginated and
+    keep a requested sort, otherwise they are ordered by the keyset too.
+
+    Must precede a restalchemy paginated controller in the bases.
+    """
+
+    # Unique sort key, the last name must be unique by itself
+    __keyset__ = ("created_at", "uuid")
+    # Names of the keyset which may be NULL
+    __keyset_nullable__ = ()
+
+    _pagination_marker = None
+
+    def _prepare_pagination_meta(self):
+        params = self._req.api_context.params
+        try:
+            self._pagination_limit = int(params.get(self._param_page_limit, 0))
+            if self._pagination_limit < 0:
+                raise ValueError()
+        except ValueError:
+            raise ra_exc.ParseError(value=params.get(self._param_page_limit))
+        marker = params.get(self._param_page_marker)
+        self._pagination_marker = None
+        if marker:
+            self._pagination_marker = decode_marker(marker, self.__keyset__)
+            # Reject markers which can not be compared with the keys
+            self._get_marker_model_values()
+
+    def _get_marker_model_values(self):
+        properties = self.model.properties.properties
+        try:
+            return {
+                name: properties[name]
+                .get_property_type()
+                .from_simple_type(self._pagination_marker[name])
+                for name in self.__keyset__
+            }
+        except (TypeError, ValueError):
+            raise common_exc.InvalidPageMarkerError()
+
+    def _get_keyset_values(self, row):
+        """Return simple values of the sort key of a model or a dict view."""
+        if isinstance(row, dict):
+            return {name: row[name] for name in self.__keyset__}
+        return {
+            name: row.properties.properties[name]
+            .get_property_type()
+            .to_simple_type(getattr(row, name))
+            for name in self.__keyset__
+        }
+
+    def _create_response(self, body, status, headers):
+        if self._pagination_limit and body is not None:
+            headers[self._header_page_limit] = str(self._pagination_limit)
+            if len(body) == self._pagination_limit:
+                headers[self._header_page_marker] = encode_marker(
+                    self._get_keyset_values(body[-1]),
+                )
+        # Marker headers are built above, skip the uuid based ones
+        return super(ra_controllers.BasePaginationMixin, self)._create_response(
+            body, status, headers
+        )
+
+    def _prepare_sorts(self, params):
+        # Listings without a sort are in keyset order, paginated or not
+        return super()._prepare_sorts(params) or {
+            name: "asc" for name in self.__keyset__
+        }
+
+    def _is_paginated(self):
+        return bool(self._pagination_limit or self._pagination_marker)
+
+    def _get_keyset_direction(self, order_by):
+        """Return the direction of a keyset order, reject other orders."""
+        order_by = order_by or {}
+        directions = {direction.lower() for direction in order_by.values()}
+        if (
+            list(order_by) != list(self.__keyset__[: len(order_by)])
+            or len(directions) > 1
+        ):
+            raise common_exc.UnsupportedSortError(keys=", ".join(self.__keyset__))
+        return directions.pop() if directions else "asc"
+
+    def _validate_params(self, filters, order_by):
+        # Unpaginated listings may also be sorted by the whole keyset
+        if self._is_paginated() or len(order_by or {}) > 1:
+            self._get_keyset_direction(order_by)
+        else:
+            super()._validate_params(filters, order_by)
+
+    def _build_pagination_with_cursor(self, filters, order_by):
+        if not self._is_paginated():
+            return super()._build_pagination_with_cursor(filters, order_by)
+        direction = self._get_keyset_direction(order_by)
+        if self._pagination_marker:
+            filters = dm_filters.AND(
+                build_keyset_filter(
+                    self.__keyset__,
+                    self._get_marker_model_values(),
+                    descending=direction == "desc",
+                    nullable=self.__keyset_nullable__,
+                ),
+                filters,
+            )
+        return filters, {name: direction for name in self.__keyset__}
+
+    def paginated_filter(self, filters, order_by=None):
+        custom_filters, storage_filters = self._split_filters(filters)
+
+        cleaned_results = []
+
+        # Get additional data from DB if some was filtered by custom props
+        while len(cleaned_results) < self._pagination_limit:
+            result = self._process_storage_filters(storage_filters, order_by=order_by)
+            if not len(result):
+                break
+            self._pagination_marker = self._get_keyset_values(result[-1])
+            cleaned_results.extend(self._process_custom_filters(result, custom_filters))
+
+        return cleaned_results[: self._pagination_limit]
@@ -0,0 +1,223 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import logging
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from restalchemy.storage.sql import engines
+
+
+LOG = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Entries expire ``ttl`` seconds after they were stored. When the cache
+    is full the least recently used entry is evicted. All operations are
+    guarded by a lock, so a single instance can be shared between threads
+    of one worker process.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self._ttl = ttl
+        self._max_size = max_size
+        self._data: "collections.OrderedDict[Hashable, tuple]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value or ``default`` if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._expirations += 1
+                self._misses += 1
+                return default
+            self._data.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value`` under ``key``, evicting LRU entries if needed."""
+        ttl = self._ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = (value, expires_at)
+            while len(self._data) > self._max_size:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a single entry. Return True if it was present."""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """Drop all entries. Counters are preserved."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+class SharedUserCache:
+    """Credentials fingerprint -> user_id cache shared by worker processes.
+
+    Entries live in the UNLOGGED `auth_cache` table, so every worker using
+    the same database sees lookups made by the others. Expiration is
+    computed on the database side to avoid clock skew between workers.
+
+    Every `cleanup_interval` writes of a worker the table is trimmed:
+    expired entries are removed first, then the entries closest to
+    expiration while the table is above `max_size`.
+
+    The cache fails open: database errors are logged and reported as
+    misses, so a broken cache never breaks authentication.
+    """
+
+    _NOW = "(NOW() AT TIME ZONE 'UTC')"
+
+    def __init__(self, ttl: float, max_size: int, cleanup_interval: int = 100):
+        if max_size < 1:
+            raise ValueError("max_size must be a positive integer")
+        self._ttl = ttl
+        self._max_size = max_size
+        self._cleanup_interval = cleanup_interval
+        self._writes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._errors = 0
+
+    @staticmethod
+    def _execute(statement, values=None, fetch=False):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            cursor = session.execute(statement, values)
+            return cursor.fetchone() if fetch else cursor.rowcount
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            row = self._execute(
+                'SELECT "user_id" FROM "auth_cache"'
+                f' WHERE "fingerprint" = %s AND "expires_at" > {self._NOW};',
+                (key,),
+                fetch=True,
+            )
+        except Exception:
+            LOG.warning("Unable to read shared auth cache", exc_info=True)
+            self._errors += 1
+            return default
+        if row is None:
+            self._misses += 1
+            return default
+        self._hits += 1
+        return row["user_id"]
+
+    def set(self, key: str, value: int, ttl: Optional[float] = None) -> None:
+        ttl = self._ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        try:
+            self._execute(
+                'INSERT INTO "auth_cache" ("fingerprint", "user_id", "expires_at")'
+                f" VALUES (%s, %s, {self._NOW} + make_interval(secs => %s))"
+                ' ON CONFLICT ("fingerprint") DO UPDATE'
+                ' SET "user_id" = EXCLUDED."user_id",'
+                ' "expires_at" = EXCLUDED."expires_at";',
+                (key, value, ttl),
+            )
+            self._writes += 1
+            if self._writes % self._cleanup_interval == 0:
+                self.cleanup()
+        except Exception:
+            LOG.warning("Unable to write shared auth cache", exc_info=True)
+            self._errors += 1
+
+    def cleanup(self) -> None:
+        """Drop expired entries and trim the table down to `max_size`."""
+        self._expirations += self._execute(
+            f'DELETE FROM "auth_cache" WHERE "expires_at" <= {self._NOW};',
+        )
+        self._evictions += self._execute(
+            'DELETE FROM "auth_cache" WHERE "fingerprint" IN ('
+            ' SELECT "fingerprint" FROM "auth_cache"'
+            ' ORDER BY "expires_at" DESC OFFSET %s);',
+            (self._max_size,),
+        )
+
+    def invalidate(self, key: str) -> bool:
+        return bool(
+            self._execute(
+                'DELETE FROM "auth_cache" WHERE "fingerprint" = %s;',
+                (key,),
+            )
+        )
+
+    def clear(self) -> None:
+        self._execute('DELETE FROM "auth_cache";')
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_size": self._max_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+            "errors": self._errors,
+        }
@@ -0,0 +1,132 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the protected function while open."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Circuit is open, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stop calling a failing dependency for a while.
+
+    The breaker is closed while calls succeed. After `failure_threshold`
+    consecutive failures it opens and rejects calls with CircuitOpenError
+    for `recovery_timeout` seconds. Then it becomes half-open and lets up
+    to `half_open_max_calls` trial calls through: a success closes it,
+    a failure opens it again.
+
+    Only exceptions for which `is_failure` returns True count as failures;
+    other exceptions are propagated as is and count as a response from the
+    dependency.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        recovery_timeout: float,
+        half_open_max_calls: int = 1,
+        is_failure: Callable[[BaseException], bool] = lambda exc: True,
+    ):
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._half_open_max_calls = half_open_max_calls
+        self._is_failure = is_failure
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._rejected = 0
+        self._opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self._recovery_timeout:
+            self._state = HALF_OPEN
+            self._trial_calls = 0
+        return self._state
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._opened += 1
+
+    def _before_call(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._trial_calls < self._half_open_max_calls:
+                self._trial_calls += 1
+                return
+            self._rejected += 1
+            retry_after = max(self._recovery_timeout - (now - self._opened_at), 0)
+        raise CircuitOpenError(retry_after=retry_after)
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+
+    def _on_failure(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+            self._failures += 1
+            if self._state == CLOSED and (self._failures >= self._failure_threshold):
+                self._open(now)
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        self._before_call()
+        try:
+            result = fn()
+        except BaseException as exc:
+            if self._is_failure(exc):
+                self._on_failure()
+            else:
+                self._on_success()
+            raise
+        self._on_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(time.monotonic()),
+                "consecutive_failures": self._failures,
+                "opened": self._opened,
+                "rejected": self._rejected,
+            }
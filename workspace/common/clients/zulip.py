@@ -14,10 +14,217 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import threading
+import time
 from typing import Any, Dict, Optional
 
 from bazooka import common
 from bazooka import client as bz_client
+from bazooka import exceptions as bz_exc
+from oslo_config import cfg
+from requests import adapters
+from requests import exceptions as requests_exc
+
+from workspace.common import circuit_breaker
+
+
+DOMAIN = "zulip"
+
+zulip_opts = [
+    cfg.IntOpt(
+        "timeout",
+        default=3,
+        min=1,
+        help="Timeout (in seconds) for requests to Zulip",
+    ),
+    cfg.IntOpt(
+        "pool_size",
+        default=10,
+        min=1,
+        help="Maximum number of keep-alive connections per Zulip endpoint",
+    ),
+    cfg.IntOpt(
+        "pool_idle_timeout",
+        default=60,
+        min=0,
+        help="Reopen connections to Zulip after this many seconds of "
+        "inactivity. 0 disables the limit",
+    ),
+    cfg.IntOpt(
+        "pool_max_lifetime",
+        default=600,
+        min=0,
+        help="Reopen connections to Zulip after this many seconds "
+        "regardless of activity. 0 disables the limit",
+    ),
+    cfg.IntOpt(
+        "max_endpoints",
+        default=16,
+        min=1,
+        help="Maximum number of Zulip endpoints with a long-lived client "
+        "per worker process",
+    ),
+    cfg.BoolOpt(
+        "breaker_enabled",
+        default=True,
+        help="Fail fast while Zulip is timing out or returning 5xx errors",
+    ),
+    cfg.IntOpt(
+        "breaker_failure_threshold",
+        default=5,
+        min=1,
+        help="Consecutive Zulip failures which open the circuit breaker",
+    ),
+    cfg.IntOpt(
+        "breaker_recovery_timeout",
+        default=30,
+        min=1,
+        help="How long (in seconds) the circuit breaker stays open before "
+        "letting trial requests through",
+    ),
+    cfg.IntOpt(
+        "breaker_half_open_max_calls",
+        default=1,
+        min=1,
+        help="Number of trial requests allowed while half-open",
+    ),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(zulip_opts, DOMAIN)
+
+
+class PooledClient(bz_client.Client):
+    """Bazooka client which keeps a long-lived keep-alive session.
+
+    The base client opens a new `requests` session, and therefore new
+    TCP/TLS connections, for every request. This client reuses a single
+    session backed by a bounded connection pool. The session is recycled
+    once it has been idle for `idle_timeout` seconds or has lived for
+    `max_lifetime` seconds.
+
+    Cookies set by the remote side are never kept between requests, since
+    the session is shared by all users of the worker.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        idle_timeout: float = 60,
+        max_lifetime: float = 600,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self._pool_size = pool_size
+        self._idle_timeout = idle_timeout
+        self._max_lifetime = max_lifetime
+        self._lock = threading.Lock()
+        self._session = None
+        self._adapter = None
+        self._created_at = 0.0
+        self._last_used_at = 0.0
+        self._requests = 0
+        self._sessions_opened = 0
+        # Counters of already closed sessions
+        self._closed_connections = 0
+        self._closed_pool_requests = 0
+
+    def _open_session(self, now: float) -> None:
+        session = self.SESSION(
+            self._auth,
+            self._verify_ssl,
+            self._correlation_id,
+            self._correlation_id_header_name,
+            self._log_duration,
+        )
+        adapter = adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self._pool_size,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        self._session = session
+        self._adapter = adapter
+        self._created_at = now
+        self._sessions_opened += 1
+
+    def _pool_counters(self):
+        connections = 0
+        pool_requests = 0
+        if self._adapter is not None:
+            pools = self._adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+        return connections, pool_requests
+
+    def _close_session(self) -> None:
+        if self._session is None:
+            return
+        connections, pool_requests = self._pool_counters()
+        self._closed_connections += connections
+        self._closed_pool_requests += pool_requests
+        self._session.close()
+        self._session = None
+        self._adapter = None
+
+    def _is_expired(self, now: float) -> bool:
+        if self._idle_timeout and now - self._last_used_at > self._idle_timeout:
+            return True
+        if self._max_lifetime and now - self._created_at > self._max_lifetime:
+            return True
+        return False
+
+    def _acquire_session(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._session is not None and self._is_expired(now):
+                self._close_session()
+            if self._session is None:
+                self._open_session(now)
+            self._last_used_at = now
+            self._requests += 1
+            return self._session
+
+    def request(self, method, url, **kwargs):
+        """See documentation for requests.api.request."""
+        session = self._acquire_session()
+        kwargs.setdefault("timeout", self._default_timeout)
+        try:
+            return session.request(method=method, url=url, **kwargs)
+        finally:
+            session.cookies.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_session()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            connections, pool_requests = self._pool_counters()
+            connections += self._closed_connections
+            pool_requests += self._closed_pool_requests
+            return {
+                "requests": self._requests,
+                "sessions_opened": self._sessions_opened,
+                "connections_opened": connections,
+                "connections_reused": max(pool_requests - connections, 0),
+            }
+
+
+def is_zulip_failure(exc: BaseException) -> bool:
+    """Tell whether an error means Zulip itself is unhealthy.
+
+    Network errors, timeouts and 5xx responses count; 4xx responses are
+    valid answers from a healthy Zulip.
+    """
+    if isinstance(exc, bz_exc.BaseHTTPException):
+        return exc.code >= 500
+    return isinstance(exc, requests_exc.RequestException)
 
 
 class ZulipClient(common.RESTClientMixIn):
@@ -30,10 +237,21 @@ class ZulipClient(common.RESTClientMixIn):
     ME_PATH_AUTH = "api/v1/users/me"
     ME_PATH_COOKIE = "json/users/me"
 
-    def __init__(self, endpoint: str, timeout: int = 5):
+    def __init__(
+        self,
+        endpoint: str,
+        timeout: int = 5,
+        client: Optional[bz_client.Client] = None,
+        breaker: Optional[circuit_breaker.CircuitBreaker] = None,
+    ):
         super().__init__()
-        self._client = bz_client.Client(default_timeout=timeout)
+        self._client = client or bz_client.Client(default_timeout=timeout)
         self._endpoint = endpoint
+        self._breaker = breaker
+
+    @property
+    def endpoint(self) -> str:
+        return self._endpoint
 
     def get_current_user(self, headers: Dict[str, str]) -> Dict[str, Any]:
         """Fetch raw information about the current user.
@@ -47,7 +265,12 @@ class ZulipClient(common.RESTClientMixIn):
         url = self._build_resource_uri([self.ME_PATH_COOKIE])
         if "Authorization" in headers:
             url = self._build_resource_uri([self.ME_PATH_AUTH])
-        response = self._client.get(url, headers=headers)
+        if self._breaker is not None:
+            response = self._breaker.call(
+                lambda: self._client.get(url, headers=headers),
+            )
+        else:
+            response = self._client.get(url, headers=headers)
         return response.json()
 
     def get_current_user_id(self, headers: Dict[str, str]) -> Optional[int]:
@@ -66,3 +289,66 @@ class ZulipClient(common.RESTClientMixIn):
         """
         data = self.get_current_user(headers=headers)
         return data["user_id"]
+
+    def close(self) -> None:
+        if isinstance(self._client, PooledClient):
+            self._client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {}
+        if isinstance(self._client, PooledClient):
+            result.update(self._client.stats())
+        if self._breaker is not None:
+            result["breaker"] = self._breaker.stats()
+        return result
+
+
+_clients: "collections.OrderedDict[str, ZulipClient]" = collections.OrderedDict()
+_clients_lock = threading.Lock()
+
+
+def get_client(endpoint: str) -> ZulipClient:
+    """Return the long-lived client of this worker for `endpoint`.
+
+    Clients are created lazily, so every forked worker process builds its
+    own pool. The number of endpoints is bounded since they are derived
+    from the `Host` header of incoming requests; the least recently used
+    client is closed when the limit is reached.
+    """
+    with _clients_lock:
+        client = _clients.get(endpoint)
+        if client is not None:
+            _clients.move_to_end(endpoint)
+            return client
+
+        conf = CONF[DOMAIN]
+        breaker = None
+        if conf.breaker_enabled:
+            breaker = circuit_breaker.CircuitBreaker(
+                failure_threshold=conf.breaker_failure_threshold,
+                recovery_timeout=conf.breaker_recovery_timeout,
+                half_open_max_calls=conf.breaker_half_open_max_calls,
+                is_failure=is_zulip_failure,
+            )
+        client = ZulipClient(
+            endpoint=endpoint,
+            client=PooledClient(
+                pool_size=conf.pool_size,
+                idle_timeout=conf.pool_idle_timeout,
+                max_lifetime=conf.pool_max_lifetime,
+                default_timeout=conf.timeout,
+            ),
+            breaker=breaker,
+        )
+        _clients[endpoint] = client
+        while len(_clients) > conf.max_endpoints:
+            _, evicted = _clients.popitem(last=False)
+            evicted.close()
+        return client
+
+
+def get_clients_stats() -> Dict[str, Dict[str, Any]]:
+    """Return connection reuse and breaker stats of this worker's clients."""
+    with _clients_lock:
+        clients = list(_clients.items())
+    return {endpoint: client.stats() for endpoint, client in clients}
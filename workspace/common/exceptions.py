@@ -0,0 +1,47 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.common import exceptions as ra_exc
+
+
+class AuthBackendUnavailableError(ra_exc.RestAlchemyException):
+    message = "Authentication backend is temporarily unavailable"
+    code = 503
+
+    def __init__(self, retry_after=0, **kwargs):
+        super().__init__(**kwargs)
+        self.retry_after = retry_after
+
+
+class InvalidSessionTokenError(ra_exc.RestAlchemyException):
+    message = "Session token is invalid or expired"
+    code = 401
+
+
+class SessionTokensDisabledError(ra_exc.ValidationErrorException):
+    message = "Session tokens are not configured"
+
+
+class ZulipCredentialsRequiredError(ra_exc.ValidationErrorException):
+    message = "Session tokens can only be issued for Zulip credentials"
+
+
+class InvalidPageMarkerError(ra_exc.ValidationErrorException):
+    message = "Invalid page marker"
+
+
+class UnsupportedSortError(ra_exc.ValidationErrorException):
+    message = "Paginated results can only be sorted by %(keys)s"
@@ -0,0 +1,80 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def _count(hit: bool) -> None:
+    global _hits, _misses
+    with _lock:
+        if hit:
+            _hits += 1
+        else:
+            _misses += 1
+
+
+def get_stats() -> Dict[str, int]:
+    """Return loads saved (hits) and done (misses) by all identity maps."""
+    with _lock:
+        return {"hits": _hits, "misses": _misses}
+
+
+class IdentityMap:
+    """Objects loaded within one request, at most one per (model, key).
+
+    Lives on the request context, so it is used by one thread only and
+    never outlives the request. Every hit is a query which was not sent.
+    """
+
+    def __init__(self):
+        self._objects: Dict[Tuple[type, Hashable], Any] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, model: type, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the object of `model` with `key`, loading it on a miss.
+
+        Errors of `loader`, like a missing record, are not remembered.
+        """
+        obj = self._objects.get((model, key))
+        if obj is not None:
+            self._hits += 1
+            _count(hit=True)
+            return obj
+        obj = loader()
+        self._misses += 1
+        _count(hit=False)
+        self._objects[(model, key)] = obj
+        return obj
+
+    def discard(self, model: type, key: Hashable) -> None:
+        self._objects.pop((model, key), None)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "objects": len(self._objects),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
@@ -0,0 +1,313 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Helpers for migrations which change live tables.
+
+restalchemy applies all pending migrations in one transaction, so these
+helpers do their work over a separate autocommit connection, which must
+not wait for that transaction.
+"""
+
+import contextlib
+import logging
+import time
+
+from oslo_config import cfg
+import psycopg
+from restalchemy.storage.sql import engines
+from restalchemy.storage.sql import migrations
+
+
+DOMAIN = "online_migrations"
+
+online_migrations_opts = [
+    cfg.IntOpt(
+        "batch_size",
+        default=1000,
+        min=1,
+        help="Number of rows updated by one batch of a backfill",
+    ),
+    cfg.FloatOpt(
+        "batch_pause",
+        default=0.1,
+        min=0,
+        help="Pause (in seconds) between batches of a backfill",
+    ),
+    cfg.FloatOpt(
+        "lock_timeout",
+        default=2,
+        min=0.001,
+        help="Maximum time (in seconds) a batch waits for row locks",
+    ),
+    cfg.IntOpt(
+        "lock_retries",
+        default=10,
+        min=0,
+        help="Consecutive lock timeouts of a batch before a backfill fails",
+    ),
+    cfg.FloatOpt(
+        "report_interval",
+        default=10,
+        min=0,
+        help="Interval (in seconds) of backfill progress reports",
+    ),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(online_migrations_opts, DOMAIN)
+
+LOG = logging.getLogger(__name__)
+
+_INVALID_INDEX = (
+    "SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(%s) AND NOT indisvalid;"
+)
+
+
+@contextlib.contextmanager
+def autocommit_connection():
+    engine = engines.engine_factory.get_engine()
+    conn = engine.get_connection()
+    try:
+        conn.autocommit = True
+        yield conn
+    finally:
+        conn.autocommit = False
+        engine.close_connection(conn)
+
+
+# The migration transaction must not touch the catalog itself: a catalog
+# snapshot would stay until the commit, and CONCURRENTLY waits for it
+_CAN_WORK_OUTSIDE = """
+    SELECT to_regclass(%(table)s) IS NOT NULL
+        AND NOT EXISTS (
+            SELECT 1 FROM pg_locks
+            WHERE "pid" = %(pid)s AND "relation" = to_regclass(%(table)s)
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM pg_stat_activity
+            WHERE "pid" = %(pid)s AND "backend_xmin" IS NOT NULL
+        );
+"""
+
+
+def _can_work_outside(session, conn, table):
+    # A table created by the migration transaction is not visible to other
+    # connections, and its locks or snapshot would block them
+    pid = session.execute("SELECT pg_backend_pid() AS pid;").fetchone()["pid"]
+    return conn.execute(
+        _CAN_WORK_OUTSIDE,
+        {"table": f'"{table}"', "pid": pid},
+    ).fetchone()[0]
+
+
+def create_index_concurrently(session, name, table, columns, where=None):
+    """Create an index without blocking writes to the table.
+
+    The index is built with CREATE INDEX CONCURRENTLY outside of the
+    migration transaction, so it stays even if the migration is rolled
+    back later. A fresh or locked table gets a plain CREATE INDEX in the
+    migration transaction instead. An invalid index left by an
+    interrupted build is rebuilt.
+
+    :param columns: column list of the index, e.g. '"user_id", "chat_id"'.
+    :param where: predicate of a partial index.
+    """
+    definition = f'"{name}" ON "{table}" ({columns})'
+    if where:
+        definition += f" WHERE {where}"
+    with autocommit_connection() as conn:
+        invalid = conn.execute(_INVALID_INDEX, (f'"{name}"',)).fetchone()
+        if _can_work_outside(session, conn, table):
+            if invalid:
+                LOG.warning("Rebuilding invalid index %s", name)
+                conn.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}";')
+            LOG.info("Creating index %s concurrently", name)
+            conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {definition};")
+            return
+    LOG.warning("Creating index %s in the migration transaction", name)
+    if invalid:
+        session.execute(f'DROP INDEX IF EXISTS "{name}";')
+    session.execute(f"CREATE INDEX IF NOT EXISTS {definition};")
+
+
+_CHECKPOINTS = "online_migration_checkpoints"
+
+_CREATE_CHECKPOINTS = f"""
+    CREATE TABLE IF NOT EXISTS "{_CHECKPOINTS}" (
+        "name" VARCHAR(255) PRIMARY KEY,
+        "last_key" TEXT NOT NULL,
+        "updated" BIGINT NOT NULL,
+        "updated_at" TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+"""
+
+_SAVE_CHECKPOINT = f"""
+    INSERT INTO "{_CHECKPOINTS}" ("name", "last_key", "updated")
+    VALUES (%s, %s, %s)
+    ON CONFLICT ("name") DO UPDATE SET
+        "last_key" = EXCLUDED."last_key",
+        "updated" = EXCLUDED."updated",
+        "updated_at" = NOW();
+"""
+
+# Rows are picked by the key, so a batch costs the same at any position.
+# The key column is renamed so that `condition` may refer to it, and is
+# qualified where an unqualified name would mean the TEXT output column.
+_BATCH = """
+    WITH "batch" AS (
+        SELECT "{key}" AS "batch_key" FROM "{table}"
+        WHERE {after} ({condition})
+        ORDER BY "{key}"
+        LIMIT %s
+    ), "updated" AS (
+        UPDATE "{table}" SET {assignments}
+        FROM "batch"
+        WHERE "{table}"."{key}" = "batch"."batch_key" AND ({condition})
+        RETURNING 1
+    )
+    SELECT
+        (SELECT count(*) FROM "updated") AS "updated",
+        (
+            SELECT "batch"."batch_key"::TEXT FROM "batch"
+            ORDER BY "batch"."batch_key" DESC LIMIT 1
+        ) AS "last_key";
+"""
+
+
+def _run_batch(conn, name, statement, values, updated):
+    # The checkpoint is saved by the transaction of the batch
+    with conn.transaction():
+        conn.execute(
+            "SELECT set_config('lock_timeout', %s, true);",
+            (f"{int(CONF[DOMAIN].lock_timeout * 1000)}ms",),
+        )
+        batch_updated, last_key = conn.execute(statement, values).fetchone()
+        if last_key is not None:
+            conn.execute(_SAVE_CHECKPOINT, (name, last_key, updated + batch_updated))
+    return batch_updated, last_key
+
+
+def backfill(session, name, table, assignments, condition, key="uuid"):
+    """Update the rows matching `condition` in keyed batches.
+
+    Every batch is a short transaction of its own, which also saves the
+    last key as a checkpoint named `name`. An interrupted backfill
+    resumes after the checkpoint. Batches wait `lock_timeout` for row
+    locks at most and are retried after a pause. A table created or
+    locked by the migration transaction is updated with one statement
+    in that transaction instead.
+
+    :param assignments: SET clause, e.g. '"title" = btrim("title")'.
+    :param condition: rows which still need the backfill, it is checked
+                      again by the update of a batch.
+    :param key: unique column which batches are ordered by.
+    :return: number of updated rows.
+    """
+    conf = CONF[DOMAIN]
+    with autocommit_connection() as conn:
+        if not _can_work_outside(session, conn, table):
+            LOG.warning("Backfilling %s in the migration transaction", name)
+            return session.execute(
+                f'UPDATE "{table}" SET {assignments} WHERE {condition};',
+            ).rowcount
+        conn.execute(_CREATE_CHECKPOINTS)
+        row = conn.execute(
+            f'SELECT "last_key", "updated" FROM "{_CHECKPOINTS}" WHERE "name" = %s;',
+            (name,),
+        ).fetchone()
+        last_key, updated = row if row else (None, 0)
+        if row:
+            LOG.info("Resuming backfill %s after %s", name, last_key)
+        resumed_at = updated
+        started = reported = time.monotonic()
+        lock_timeouts = 0
+        while True:
+            values = [conf.batch_size]
+            after = ""
+            if last_key is not None:
+                values.insert(0, last_key)
+                after = f'"{key}" > %s AND'
+            statement = _BATCH.format(
+                key=key,
+                table=table,
+                after=after,
+                condition=condition,
+                assignments=assignments,
+            )
+            try:
+                batch_updated, last_key = _run_batch(
+                    conn, name, statement, values, updated
+                )
+            except psycopg.errors.LockNotAvailable:
+                lock_timeouts += 1
+                if lock_timeouts > conf.lock_retries:
+                    raise
+                LOG.warning("Backfill %s waits for row locks, retrying", name)
+                time.sleep(conf.batch_pause)
+                continue
+            if last_key is None:
+                break
+            updated += batch_updated
+            lock_timeouts = 0
+            now = time.monotonic()
+            if now - reported >= conf.report_interval:
+                reported = now
+                LOG.info(
+                    "Backfill %s: %d rows updated, %.0f rows/s",
+                    name,
+                    updated,
+                    (updated - resumed_at) / (now - started),
+                )
+            time.sleep(conf.batch_pause)
+        conn.execute(f'DELETE FROM "{_CHECKPOINTS}" WHERE "name" = %s;', (name,))
+    elapsed = time.monotonic() - started
+    LOG.info(
+        "Backfill %s done: %d rows updated in %.1fs, %.0f rows/s",
+        name,
+        updated,
+        elapsed,
+        (updated - resumed_at) / elapsed if elapsed else 0,
+    )
+    return updated
+
+
+class BackfillMigrationStep(migrations.AbstractMigrationStep):
+    """Migration step which backfills existing rows with `backfill`.
+
+    Subclasses set `table`, `assignments` and `condition`, and `key` if
+    the table has no "uuid" column. The checkpoint is named after the
+    migration id.
+    """
+
+    table = None
+    assignments = None
+    condition = None
+    key = "uuid"
+
+    def upgrade(self, session):
+        backfill(
+            session,
+            self.migration_id,
+            self.table,
+            self.assignments,
+            self.condition,
+            key=self.key,
+        )
+
+    def downgrade(self, session):
+        # Backfilled values are valid before the migration as well
+        pass
@@ -0,0 +1,149 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from oslo_config import cfg
+
+
+IAM_DOMAIN = "iam"
+HS256 = "HS256"
+
+iam_opts = [
+    cfg.StrOpt(
+        "token_encryption_algorithm",
+        default=HS256,
+        choices=[HS256],
+        help="Algorithm used to sign session tokens",
+    ),
+    cfg.IntOpt(
+        "token_ttl",
+        default=900,
+        min=1,
+        help="Lifetime (in seconds) of issued session tokens",
+    ),
+    cfg.IntOpt(
+        "token_leeway",
+        default=5,
+        min=0,
+        help="Allowed clock skew (in seconds) when checking token expiration",
+    ),
+]
+
+hs256_opts = [
+    cfg.StrOpt(
+        "encryption_key",
+        secret=True,
+        help="Secret key for HS256 session tokens. Session tokens are "
+        "disabled while it is not set",
+    ),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(iam_opts, IAM_DOMAIN)
+CONF.register_opts(hs256_opts, HS256)
+
+_HEADER = {"alg": HS256, "typ": "JWT"}
+
+
+class InvalidTokenError(Exception):
+    pass
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _get_key() -> Optional[bytes]:
+    key = CONF[HS256].encryption_key
+    return key.encode("utf-8") if key else None
+
+
+def _sign(key: bytes, signing_input: str) -> str:
+    digest = hmac.new(key, signing_input.encode("ascii"), hashlib.sha256)
+    return _b64encode(digest.digest())
+
+
+def is_enabled() -> bool:
+    return _get_key() is not None
+
+
+def issue_token(user_id: int, issuer: str) -> Tuple[str, Dict[str, Any]]:
+    """Issue a signed session token carrying `user_id`.
+
+    The token is a compact HS256 JWT, `issuer` is the host it is valid
+    for. Return the token and its claims.
+    """
+    key = _get_key()
+    if key is None:
+        raise InvalidTokenError("Session tokens are not configured")
+    now = int(time.time())
+    claims = {
+        "iss": issuer,
+        "sub": str(user_id),
+        "user_id": user_id,
+        "iat": now,
+        "exp": now + CONF[IAM_DOMAIN].token_ttl,
+    }
+    signing_input = ".".join(
+        _b64encode(json.dumps(part, separators=(",", ":")).encode("utf-8"))
+        for part in (_HEADER, claims)
+    )
+    return f"{signing_input}.{_sign(key, signing_input)}", claims
+
+
+def verify_token(token: str, issuer: str) -> int:
+    """Check signature, issuer and expiration of a token.
+
+    Only CPU is used, no network calls are made. Return the `user_id`
+    the token was issued for or raise InvalidTokenError.
+    """
+    key = _get_key()
+    if key is None:
+        raise InvalidTokenError("Session tokens are not configured")
+    try:
+        header_b64, claims_b64, signature = token.split(".")
+    except ValueError:
+        raise InvalidTokenError("Malformed token")
+    expected = _sign(key, f"{header_b64}.{claims_b64}")
+    if not hmac.compare_digest(expected, signature):
+        raise InvalidTokenError("Invalid token signature")
+    try:
+        header = json.loads(_b64decode(header_b64))
+        claims = json.loads(_b64decode(claims_b64))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidTokenError("Malformed token")
+    if not isinstance(header, dict) or header.get("alg") != HS256:
+        raise InvalidTokenError("Unsupported token algorithm")
+    if not isinstance(claims, dict) or claims.get("iss") != issuer:
+        raise InvalidTokenError("Token was issued for another host")
+    exp = claims.get("exp")
+    if not isinstance(exp, int) or exp + CONF[IAM_DOMAIN].token_leeway < time.time():
+        raise InvalidTokenError("Token has expired")
+    user_id = claims.get("user_id")
+    if not isinstance(user_id, int) or isinstance(user_id, bool):
+        raise InvalidTokenError("Token has no user_id")
+    return user_id
@@ -0,0 +1,121 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import random
+import unittest
+
+from restalchemy.storage.sql import engines
+from restalchemy.storage.sql import migrations
+
+from workspace.user_api.dm import models
+
+
+MIGRATIONS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "migrations"
+)
+
+
+class DBTestCase(unittest.TestCase):
+    """Base for tests which need a real PostgreSQL database.
+
+    The database is taken from the DATABASE_URI environment variable and
+    is migrated to the latest revision. Every test gets its own random
+    `user_id`, so tests do not interfere with each other or existing data.
+    Folders, items, data versions and change records of the user are
+    deleted after the test.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        db_url = os.environ.get("DATABASE_URI")
+        if not db_url:
+            raise unittest.SkipTest("DATABASE_URI is not set")
+        engines.engine_factory.configure_factory(db_url=db_url)
+        migration_engine = migrations.MigrationEngine(
+            migrations_path=MIGRATIONS_PATH,
+        )
+        migration_engine.apply_migration(
+            migration_engine.get_latest_migration(),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        engines.engine_factory.destroy_engine()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.user_id = random.randint(10**6, 2**31 - 2)
+        self.addCleanup(self._delete_user_data, self.user_id)
+
+    @staticmethod
+    def _delete_user_data(user_id):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            # Items go with their folders
+            for table in ("folders", "user_data_versions", "user_data_changes"):
+                session.execute(
+                    f'DELETE FROM "{table}" WHERE "user_id" = %s;',
+                    (user_id,),
+                )
+
+    @staticmethod
+    def explain(statement, values=None, settings=None, analyze=True):
+        """Run EXPLAIN ANALYZE for a statement and return its plan nodes.
+
+        :param settings: planner settings applied within the transaction
+                         of the statement only, e.g. {"enable_seqscan": "off"}.
+        :param analyze: run the statement, writes should only be planned.
+        :return: flat list of plan nodes as dicts.
+        """
+        options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as s:
+            for name, value in (settings or {}).items():
+                s.execute("SELECT set_config(%s, %s, true);", (name, value))
+            row = s.execute(
+                f"EXPLAIN ({options}) " + statement,
+                values,
+            ).fetchone()
+        nodes = []
+        pending = [row["QUERY PLAN"][0]["Plan"]]
+        while pending:
+            node = pending.pop()
+            nodes.append(node)
+            pending.extend(node.get("Plans", []))
+        return nodes
+
+    def make_folder(self, title="folder", user_id=None, **kwargs):
+        folder = models.Folder(
+            title=title,
+            user_id=self.user_id if user_id is None else user_id,
+            **kwargs,
+        )
+        folder.insert()
+        return folder
+
+    def make_folder_item(self, folder, chat_id, chat_type="stream", **kwargs):
+        item = models.FolderItem(
+            folder=folder,
+            user_id=folder.user_id,
+            chat_id=chat_id,
+            chat_type=chat_type,
+            **kwargs,
+        )
+        item.insert()
+        return item
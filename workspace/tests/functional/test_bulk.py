@@ -0,0 +1,458 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import uuid
+
+from restalchemy.dm import filters as dm_filters
+from restalchemy.storage import exceptions as storage_exc
+from restalchemy.storage.sql import engines
+
+from workspace.tests.functional import test_data_versions
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.dm import bulk
+from workspace.user_api.dm import data_versions
+from workspace.user_api.dm import models
+from workspace.user_api.dm import ordering
+from workspace.user_api.dm import queries
+
+
+class TestApplyItemOperations(test_data_versions.DataVersionsTestCase):
+    def _apply(self, operations):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            write = data_versions.UserDataWrite(self.user_id, session=session)
+            return bulk.apply_item_operations(write, operations)
+
+    def _items(self):
+        items = models.FolderItem.objects.get_all(
+            filters={"user_id": dm_filters.EQ(self.user_id)},
+        )
+        return {item.chat_id: item for item in items}
+
+    def test_mixed_operations_are_applied(self):
+        inbox = self.make_folder(title="inbox")
+        archive = self.make_folder(title="archive")
+        moved = self.make_folder_item(inbox, chat_id=1)
+        retyped = self.make_folder_item(inbox, chat_id=2)
+        removed = self.make_folder_item(inbox, chat_id=3)
+
+        ops = self._apply(
+            [
+                {
+                    "op": "update",
+                    "uuid": str(moved.uuid),
+                    "folder_uuid": str(archive.uuid),
+                },
+                {"op": "update", "uuid": str(retyped.uuid), "chat_type": "group"},
+                {"op": "delete", "uuid": str(removed.uuid)},
+                {
+                    "op": "create",
+                    "folder_uuid": str(archive.uuid),
+                    "chat_id": 4,
+                    "chat_type": "private",
+                },
+            ]
+        )
+
+        self.assertEqual(
+            [op.op for op in ops], ["update", "update", "delete", "create"]
+        )
+        items = self._items()
+        self.assertEqual(sorted(items), [1, 2, 4])
+        self.assertEqual(items[1].folder.uuid, archive.uuid)
+        self.assertEqual(items[2].chat_type, "group")
+        self.assertEqual(items[4].uuid, ops[3].item.uuid)
+        # Moved and created items go last in their folder
+        step = ordering.ORDER_STEP
+        self.assertEqual((items[1].order_index, items[4].order_index), (step, 2 * step))
+        self.assertGreater(items[1].updated_at, moved.updated_at)
+
+    def test_changes_are_recorded(self):
+        folder = self.make_folder()
+        removed = self.make_folder_item(folder, chat_id=1)
+        cursor = data_versions.get_version(self.user_id)
+
+        ops = self._apply(
+            [
+                {"op": "delete", "uuid": str(removed.uuid)},
+                {
+                    "op": "create",
+                    "folder_uuid": str(folder.uuid),
+                    "chat_id": 2,
+                    "chat_type": "stream",
+                },
+            ]
+        )
+
+        result = queries.get_changes(
+            self.user_id,
+            since_version=cursor,
+            until_version=data_versions.get_version(self.user_id),
+        )
+        self.assertEqual(
+            [i["uuid"] for i in result["folder_items"]],
+            [str(ops[1].item.uuid)],
+        )
+        self.assertEqual(result["deleted_folder_items"], [str(removed.uuid)])
+
+    def test_client_order_index_is_ignored(self):
+        folder = self.make_folder()
+        item = self.make_folder_item(folder, chat_id=1, order_index=3)
+
+        ops = self._apply(
+            [
+                {"op": "update", "uuid": str(item.uuid), "order_index": 4},
+                {
+                    "op": "create",
+                    "folder_uuid": str(folder.uuid),
+                    "chat_id": 2,
+                    "chat_type": "stream",
+                    "order_index": 4,
+                },
+            ]
+        )
+
+        self.assertEqual(ops[0].item.order_index, 3)
+        self.assertEqual(ops[1].item.order_index, 3 + ordering.ORDER_STEP)
+
+    def test_invalid_operation_rolls_back_the_batch(self):
+        folder = self.make_folder()
+        item = self.make_folder_item(folder, chat_id=1)
+
+        with self.assertRaises(user_api_exceptions.BulkOperationError):
+            self._apply(
+                [
+                    {"op": "delete", "uuid": str(item.uuid)},
+                    {
+                        "op": "create",
+                        "folder_uuid": str(folder.uuid),
+                        "chat_id": -1,
+                        "chat_type": "stream",
+                    },
+                ]
+            )
+
+        self.assertEqual(list(self._items()), [1])
+        self.assertEqual(data_versions.get_version(self.user_id), 0)
+
+    def test_foreign_folders_and_items_are_not_found(self):
+        own = self.make_folder()
+        foreign = self.make_folder(user_id=self.user_id + 1)
+        self.addCleanup(self._delete_user_data, self.user_id + 1)
+        foreign_item = self.make_folder_item(foreign, chat_id=1)
+
+        for operation in (
+            {
+                "op": "create",
+                "folder_uuid": str(foreign.uuid),
+                "chat_id": 1,
+                "chat_type": "stream",
+            },
+            {
+                "op": "update",
+                "uuid": str(foreign_item.uuid),
+                "folder_uuid": str(own.uuid),
+            },
+            {"op": "delete", "uuid": str(uuid.uuid4())},
+        ):
+            with self.assertRaises(user_api_exceptions.BulkOperationError):
+                self._apply([operation])
+
+        self.assertEqual(foreign_item.folder.uuid, foreign.uuid)
+        self.assertEqual(self._items(), {})
+
+
+class TestReorderItems(test_data_versions.DataVersionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = self.make_folder()
+        self.items = [
+            self.make_folder_item(self.folder, chat_id=i, order_index=i)
+            for i in range(3)
+        ]
+
+    def _reorder(self, items, folder=None):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            write = data_versions.UserDataWrite(self.user_id, session=session)
+            return bulk.reorder_items(write, (folder or self.folder).uuid, items)
+
+    def _order(self):
+        items = models.FolderItem.objects.get_all(
+            filters={"user_id": dm_filters.EQ(self.user_id)},
+        )
+        return {item.chat_id: item.order_index for item in items}
+
+    def test_positions_of_listed_uuids(self):
+        first, second, third = self.items
+
+        result = self._reorder([str(third.uuid), str(first.uuid)])
+
+        step = ordering.ORDER_STEP
+        self.assertEqual(result, [(third.uuid, step), (first.uuid, 2 * step)])
+        self.assertEqual(self._order(), {0: 2 * step, 1: 1, 2: step})
+
+    def test_explicit_order_indexes(self):
+        cursor = data_versions.get_version(self.user_id)
+
+        self._reorder(
+            [
+                {"uuid": str(item.uuid), "order_index": 100 - i}
+                for i, item in enumerate(self.items)
+            ]
+        )
+
+        self.assertEqual(self._order(), {0: 100, 1: 99, 2: 98})
+        changes = queries.get_changes(
+            self.user_id,
+            since_version=cursor,
+            until_version=data_versions.get_version(self.user_id),
+        )
+        self.assertEqual(len(changes["folder_items"]), 3)
+
+    def test_items_of_other_folders_roll_back_the_order(self):
+        other = self.make_folder(title="other")
+        stranger = self.make_folder_item(other, chat_id=9, order_index=9)
+
+        with self.assertRaises(user_api_exceptions.InvalidReorderItemError):
+            self._reorder([str(self.items[2].uuid), str(stranger.uuid)])
+
+        self.assertEqual(self._order(), {0: 0, 1: 1, 2: 2, 9: 9})
+        self.assertEqual(data_versions.get_version(self.user_id), 0)
+
+    def test_invalid_lists(self):
+        item_uuid = str(self.items[0].uuid)
+        for items in (
+            [item_uuid, item_uuid],
+            ["junk"],
+            [{"uuid": item_uuid}],
+            [{"uuid": item_uuid, "order_index": "1"}],
+        ):
+            self.assertRaises(
+                user_api_exceptions.InvalidReorderItemError,
+                self._reorder,
+                items,
+            )
+
+
+class TestSetPinned(test_data_versions.DataVersionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.inbox = self.make_folder(title="inbox")
+        self.archive = self.make_folder(title="archive")
+        self.items = [
+            self.make_folder_item(self.inbox, chat_id=1),
+            self.make_folder_item(self.inbox, chat_id=2),
+            self.make_folder_item(self.archive, chat_id=1),
+        ]
+
+    def _set_pinned(self, pinned, **kwargs):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            write = data_versions.UserDataWrite(self.user_id, session=session)
+            return bulk.set_pinned(write, pinned, **kwargs)
+
+    def _pinned(self):
+        items = models.FolderItem.objects.get_all(
+            filters={"user_id": dm_filters.EQ(self.user_id)},
+        )
+        return {item.uuid: item.pinned_at for item in items}
+
+    def test_pin_items_of_several_folders(self):
+        first, _, third = self.items
+
+        result = self._set_pinned(
+            True,
+            items=[str(third.uuid), str(first.uuid)],
+        )
+
+        self.assertEqual(
+            [item["uuid"] for item in result],
+            [str(first.uuid), str(third.uuid)],
+        )
+        self.assertEqual(len({item["pinned_at"] for item in result}), 1)
+        self.assertEqual(result[0]["pinned_at"], result[0]["updated_at"])
+        pinned = self._pinned()
+        self.assertIsNotNone(pinned[first.uuid])
+        self.assertIsNone(pinned[self.items[1].uuid])
+
+    def test_unpin_chats_of_a_folder(self):
+        self._set_pinned(True, items=[str(item.uuid) for item in self.items])
+        cursor = data_versions.get_version(self.user_id)
+
+        result = self._set_pinned(
+            False,
+            folder_uuid=str(self.inbox.uuid),
+            chat_ids=[1, 2],
+        )
+
+        self.assertEqual([item["chat_id"] for item in result], [1, 2])
+        pinned = self._pinned()
+        self.assertIsNone(pinned[self.items[0].uuid])
+        self.assertIsNotNone(pinned[self.items[2].uuid])
+        changes = queries.get_changes(
+            self.user_id,
+            since_version=cursor,
+            until_version=data_versions.get_version(self.user_id),
+        )
+        self.assertEqual(len(changes["folder_items"]), 2)
+
+    def test_missing_items_roll_back_the_batch(self):
+        foreign = self.make_folder(user_id=self.user_id + 1)
+        self.addCleanup(self._delete_user_data, self.user_id + 1)
+        stranger = self.make_folder_item(foreign, chat_id=1)
+
+        for kwargs in (
+            {"items": [str(self.items[0].uuid), str(stranger.uuid)]},
+            {"folder_uuid": str(self.inbox.uuid), "chat_ids": [1, 3]},
+            {"folder_uuid": str(foreign.uuid), "chat_ids": [1]},
+        ):
+            self.assertRaises(
+                user_api_exceptions.InvalidBatchPinError,
+                self._set_pinned,
+                True,
+                **kwargs,
+            )
+
+        self.assertEqual(set(self._pinned().values()), {None})
+        self.assertIsNone(stranger.pinned_at)
+
+
+class TestSyncItems(test_data_versions.DataVersionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = self.make_folder()
+        self.kept, self.retyped, self.removed = [
+            self.make_folder_item(
+                self.folder,
+                chat_id=chat_id,
+                order_index=chat_id * ordering.ORDER_STEP,
+            )
+            for chat_id in (1, 2, 3)
+        ]
+
+    def _sync(self, chats, folder=None):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            write = data_versions.UserDataWrite(self.user_id, session=session)
+            return bulk.sync_items(write, (folder or self.folder).uuid, chats)
+
+    def _items(self):
+        items = models.FolderItem.objects.get_all(
+            filters={"user_id": dm_filters.EQ(self.user_id)},
+        )
+        return {item.chat_id: item for item in items}
+
+    def test_difference_is_applied(self):
+        cursor = data_versions.get_version(self.user_id)
+
+        result = self._sync(
+            [
+                {"chat_id": 5, "chat_type": "group"},
+                {"chat_id": 2, "chat_type": "private"},
+                {"chat_id": 1, "chat_type": "stream"},
+                {"chat_id": 4, "chat_type": "stream"},
+            ]
+        )
+
+        self.assertEqual([item["chat_id"] for item in result["created"]], [5, 4])
+        self.assertEqual(
+            [item["uuid"] for item in result["updated"]],
+            [str(self.retyped.uuid)],
+        )
+        self.assertEqual(result["deleted"], [self.removed.uuid])
+        items = self._items()
+        self.assertEqual(
+            {chat_id: item.chat_type for chat_id, item in items.items()},
+            {1: "stream", 2: "private", 4: "stream", 5: "group"},
+        )
+        self.assertEqual(items[1].updated_at, self.kept.updated_at)
+        # New chats go last, in the order of the request
+        step = ordering.ORDER_STEP
+        self.assertEqual(
+            [items[chat_id].order_index for chat_id in (1, 2, 5, 4)],
+            [step, 2 * step, 4 * step, 5 * step],
+        )
+        changes = queries.get_changes(
+            self.user_id,
+            since_version=cursor,
+            until_version=data_versions.get_version(self.user_id),
+        )
+        self.assertEqual(len(changes["folder_items"]), 3)
+        self.assertEqual(changes["deleted_folder_items"], [str(self.removed.uuid)])
+
+    def test_repeated_sync_changes_nothing(self):
+        chats = [
+            {"chat_id": 1, "chat_type": "stream"},
+            {"chat_id": 2, "chat_type": "stream"},
+            {"chat_id": 3, "chat_type": "stream"},
+        ]
+
+        result = self._sync(chats)
+
+        self.assertEqual(result, {"created": [], "updated": [], "deleted": []})
+        self.assertEqual(
+            {item.uuid for item in self._items().values()},
+            {self.kept.uuid, self.retyped.uuid, self.removed.uuid},
+        )
+
+    def test_empty_set_clears_the_folder(self):
+        other = self.make_folder(title="other")
+        stranger = self.make_folder_item(other, chat_id=3)
+
+        result = self._sync([])
+
+        self.assertEqual(len(result["deleted"]), 3)
+        self.assertEqual(list(self._items()), [3])
+        self.assertEqual(self._items()[3].uuid, stranger.uuid)
+
+    def test_foreign_folder_is_not_found(self):
+        foreign = self.make_folder(user_id=self.user_id + 1)
+        self.addCleanup(self._delete_user_data, self.user_id + 1)
+        stranger = self.make_folder_item(foreign, chat_id=1)
+
+        self.assertRaises(
+            storage_exc.RecordNotFound,
+            self._sync,
+            [{"chat_id": 9, "chat_type": "stream"}],
+            folder=foreign,
+        )
+
+        items = models.FolderItem.objects.get_all(
+            filters={"folder": dm_filters.EQ(foreign)},
+        )
+        self.assertEqual([item.uuid for item in items], [stranger.uuid])
+        self.assertEqual(data_versions.get_version(self.user_id), 0)
+
+    def test_invalid_chats(self):
+        for chats in (
+            [{"chat_id": 1}],
+            [{"chat_id": "x", "chat_type": "stream"}],
+            [{"chat_id": 1, "chat_type": "channel"}],
+            [{"chat_id": True, "chat_type": "stream"}],
+            [
+                {"chat_id": 1, "chat_type": "stream"},
+                {"chat_id": 1, "chat_type": "group"},
+            ],
+        ):
+            self.assertRaises(
+                user_api_exceptions.InvalidFolderSyncError,
+                self._sync,
+                chats,
+            )
+
+        self.assertEqual(len(self._items()), 3)
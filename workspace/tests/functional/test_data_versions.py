@@ -0,0 +1,142 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import uuid
+
+from restalchemy.storage.sql import engines
+
+from workspace.tests.functional import base
+from workspace.user_api.dm import data_versions
+from workspace.user_api.dm import queries
+
+
+class DataVersionsTestCase(base.DBTestCase):
+    """Base of tests which read data versions and change records."""
+
+
+class TestDataVersions(DataVersionsTestCase):
+    def test_unknown_user_has_version_zero(self):
+        self.assertEqual(data_versions.get_version(self.user_id), 0)
+
+    def test_bump_increments_version(self):
+        self.assertEqual(data_versions.bump_version(self.user_id), 1)
+        self.assertEqual(data_versions.bump_version(self.user_id), 2)
+
+        self.assertEqual(data_versions.get_version(self.user_id), 2)
+        self.assertEqual(data_versions.get_version(self.user_id + 1), 0)
+
+    def test_bump_is_rolled_back_with_the_write(self):
+        engine = engines.engine_factory.get_engine()
+        with self.assertRaises(ZeroDivisionError):
+            with engine.session_manager() as session:
+                data_versions.bump_version(self.user_id, session=session)
+                1 / 0
+
+        self.assertEqual(data_versions.get_version(self.user_id), 0)
+
+
+class TestGetChanges(DataVersionsTestCase):
+    def _write(self, fn):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            write = data_versions.UserDataWrite(self.user_id, session=session)
+            fn(write)
+        return write.version
+
+    def _changes(self, since_version):
+        return queries.get_changes(
+            self.user_id,
+            since_version=since_version,
+            until_version=data_versions.get_version(self.user_id),
+        )
+
+    def test_full_sync_returns_everything(self):
+        folder = self.make_folder()
+        item = self.make_folder_item(folder, chat_id=1)
+
+        result = self._changes(None)
+
+        self.assertEqual([f["uuid"] for f in result["folders"]], [str(folder.uuid)])
+        self.assertNotIn("items", result["folders"][0])
+        self.assertEqual(
+            [i["uuid"] for i in result["folder_items"]],
+            [str(item.uuid)],
+        )
+        self.assertEqual(result["deleted_folders"], [])
+        self.assertEqual(result["deleted_folder_items"], [])
+
+    def test_only_changes_after_version_are_returned(self):
+        old = self.make_folder(title="old")
+        self.make_folder_item(old, chat_id=1)
+        cursor = self._write(
+            lambda w: w.changed(data_versions.FOLDER, old.uuid),
+        )
+        new = self.make_folder(title="new")
+        item = self.make_folder_item(new, chat_id=2)
+
+        def record(write):
+            write.changed(data_versions.FOLDER, new.uuid)
+            write.changed(data_versions.FOLDER_ITEM, item.uuid)
+
+        self._write(record)
+
+        result = self._changes(cursor)
+
+        self.assertEqual([f["title"] for f in result["folders"]], ["new"])
+        self.assertEqual([i["chat_id"] for i in result["folder_items"]], [2])
+        self.assertEqual(self._changes(cursor + 1)["folders"], [])
+
+    def test_deleted_folder_leaves_tombstones_for_its_items(self):
+        folder = self.make_folder()
+        item = self.make_folder_item(folder, chat_id=1)
+        cursor = data_versions.get_version(self.user_id)
+
+        def delete(write):
+            write.folder_deleted(folder.uuid)
+            folder.delete()
+
+        self._write(delete)
+
+        result = self._changes(cursor)
+
+        self.assertEqual(result["folders"], [])
+        self.assertEqual(result["deleted_folders"], [str(folder.uuid)])
+        self.assertEqual(result["deleted_folder_items"], [str(item.uuid)])
+
+    def test_expired_tombstones_are_purged(self):
+        folder = self.make_folder()
+        item_uuid = uuid.uuid4()
+        self._write(lambda w: w.deleted(data_versions.FOLDER_ITEM, item_uuid))
+        data_versions.CONF.set_override("tombstone_ttl", 1, data_versions.DOMAIN)
+        self.addCleanup(
+            data_versions.CONF.clear_override,
+            "tombstone_ttl",
+            data_versions.DOMAIN,
+        )
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            session.execute(
+                'UPDATE "user_data_changes"'
+                ' SET "deleted_at" = "deleted_at" - INTERVAL \'1 hour\''
+                ' WHERE "user_id" = %s;',
+                (self.user_id,),
+            )
+
+        self._write(lambda w: w.deleted(data_versions.FOLDER, folder.uuid))
+
+        result = self._changes(0)
+        self.assertEqual(result["deleted_folders"], [str(folder.uuid)])
+        self.assertEqual(result["deleted_folder_items"], [])
@@ -0,0 +1,227 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+from unittest import mock
+
+import psycopg
+from restalchemy.storage.sql import engines
+
+from workspace.common import online_migrations
+from workspace.tests.functional import base
+
+
+TABLE = "online_migrations_test"
+INDEX = "online_migrations_test_value_idx"
+
+
+class TableTestCase(base.DBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(self._drop_table)
+
+    def _execute(self, statement):
+        with online_migrations.autocommit_connection() as conn:
+            conn.execute(statement)
+
+    def _drop_table(self):
+        self._execute(f'DROP TABLE IF EXISTS "{TABLE}";')
+
+
+class TestCreateIndexConcurrently(TableTestCase):
+    def _create_table(self, session=None):
+        statement = f'CREATE TABLE "{TABLE}" ("value" INTEGER);'
+        if session is None:
+            self._execute(statement)
+        else:
+            session.execute(statement)
+
+    def _index_validity(self):
+        with online_migrations.autocommit_connection() as conn:
+            return conn.execute(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s);",
+                (f'"{INDEX}"',),
+            ).fetchall()
+
+    def _create_index(self, session):
+        online_migrations.create_index_concurrently(
+            session,
+            INDEX,
+            TABLE,
+            '"value"',
+            where='"value" > 0',
+        )
+
+    def test_index_is_built_outside_of_the_migration(self):
+        self._create_table()
+        engine = engines.engine_factory.get_engine()
+
+        with self.assertRaises(ZeroDivisionError):
+            with engine.session_manager() as session:
+                self._create_index(session)
+                1 / 0
+
+        self.assertEqual(self._index_validity(), [(True,)])
+
+    def test_new_table_gets_index_in_the_migration(self):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            self._create_table(session=session)
+            self._create_index(session)
+
+        self.assertEqual(self._index_validity(), [(True,)])
+
+    def test_invalid_index_is_rebuilt(self):
+        self._create_table()
+        self._execute(f'INSERT INTO "{TABLE}" VALUES (1), (1);')
+        self.assertRaises(
+            psycopg.errors.UniqueViolation,
+            self._execute,
+            f'CREATE UNIQUE INDEX CONCURRENTLY "{INDEX}" ON "{TABLE}" ("value");',
+        )
+        self.assertEqual(self._index_validity(), [(False,)])
+
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            self._create_index(session)
+
+        self.assertEqual(self._index_validity(), [(True,)])
+
+
+class _Backfill(online_migrations.BackfillMigrationStep):
+    table = TABLE
+    key = "id"
+    assignments = '"hits" = "hits" + 1'
+    condition = '"value" > 0'
+
+    def __init__(self):
+        self._depends = []
+
+    @property
+    def migration_id(self):
+        return "online-migrations-test"
+
+
+class TestBackfill(TableTestCase):
+    ROWS = 50
+
+    def setUp(self):
+        super().setUp()
+        self._override("batch_size", 7)
+        self._override("batch_pause", 0)
+        self.step = _Backfill()
+        self._execute(online_migrations._CREATE_CHECKPOINTS)
+        self.addCleanup(self._delete_checkpoint)
+
+    def _override(self, name, value):
+        online_migrations.CONF.set_override(name, value, online_migrations.DOMAIN)
+        self.addCleanup(
+            online_migrations.CONF.clear_override,
+            name,
+            online_migrations.DOMAIN,
+        )
+
+    def _create_table(self, session=None):
+        statements = [
+            f'CREATE TABLE "{TABLE}" ("id" INTEGER PRIMARY KEY,'
+            ' "value" INTEGER, "hits" INTEGER NOT NULL DEFAULT 0);',
+            # Every fifth row does not need the backfill
+            f'INSERT INTO "{TABLE}" ("id", "value")'
+            f' SELECT "n", mod("n", 5) FROM generate_series(1, {self.ROWS}) AS "n";',
+        ]
+        for statement in statements:
+            if session is None:
+                self._execute(statement)
+            else:
+                session.execute(statement)
+
+    def _delete_checkpoint(self):
+        self._execute(
+            f'DELETE FROM "{online_migrations._CHECKPOINTS}"'
+            f" WHERE \"name\" = '{self.step.migration_id}';"
+        )
+
+    def _upgrade(self):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            self.step.upgrade(session)
+
+    def _hits(self):
+        with online_migrations.autocommit_connection() as conn:
+            return dict(
+                conn.execute(
+                    f'SELECT "hits", count(*) FROM "{TABLE}" GROUP BY "hits";'
+                ).fetchall()
+            )
+
+    def _checkpoint(self):
+        with online_migrations.autocommit_connection() as conn:
+            return conn.execute(
+                f'SELECT "last_key", "updated" FROM "{online_migrations._CHECKPOINTS}"'
+                ' WHERE "name" = %s;',
+                (self.step.migration_id,),
+            ).fetchone()
+
+    @mock.patch("time.sleep")
+    def test_rows_are_updated_in_batches(self, sleep):
+        self._create_table()
+
+        self._upgrade()
+
+        self.assertEqual(self._hits(), {0: 10, 1: 40})
+        self.assertEqual(sleep.call_count, 6)
+        self.assertIsNone(self._checkpoint())
+
+    @mock.patch("time.sleep")
+    def test_interrupted_backfill_resumes(self, sleep):
+        self._create_table()
+        sleep.side_effect = [None, KeyboardInterrupt()]
+
+        self.assertRaises(KeyboardInterrupt, self._upgrade)
+
+        # Keys are compared as integers, not as text
+        self.assertEqual(self._checkpoint(), ("17", 14))
+        sleep.side_effect = None
+        self._upgrade()
+        self.assertEqual(self._hits(), {0: 10, 1: 40})
+        self.assertIsNone(self._checkpoint())
+
+    @mock.patch("time.sleep")
+    def test_locked_rows_are_retried(self, sleep):
+        self._create_table()
+        self._override("lock_timeout", 0.05)
+        self._override("lock_retries", 1)
+
+        with online_migrations.autocommit_connection() as conn:
+            with conn.transaction():
+                conn.execute(f'SELECT 1 FROM "{TABLE}" WHERE "id" = 3 FOR UPDATE;')
+                self.assertRaises(
+                    psycopg.errors.LockNotAvailable,
+                    self._upgrade,
+                )
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(self._hits(), {0: 50})
+        self._upgrade()
+        self.assertEqual(self._hits(), {0: 10, 1: 40})
+
+    def test_new_table_is_backfilled_in_the_migration(self):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            self._create_table(session=session)
+            self.step.upgrade(session)
+
+        self.assertEqual(self._hits(), {0: 10, 1: 40})
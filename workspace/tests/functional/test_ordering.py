@@ -0,0 +1,168 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+from restalchemy.dm import filters as dm_filters
+from restalchemy.storage.sql import engines
+
+from workspace.tests.functional import test_data_versions
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.dm import data_versions
+from workspace.user_api.dm import models
+from workspace.user_api.dm import ordering
+from workspace.user_api.dm import queries
+
+STEP = ordering.ORDER_STEP
+
+
+class OrderingTestCase(test_data_versions.DataVersionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = self.make_folder()
+
+    def _make_items(self, *order_indexes):
+        return [
+            self.make_folder_item(self.folder, chat_id=i, order_index=index)
+            for i, index in enumerate(order_indexes)
+        ]
+
+    def _move(self, item, anchor, after=False):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            write = data_versions.UserDataWrite(self.user_id, session=session)
+            item.order_index = ordering.get_move_key(
+                write,
+                item,
+                anchor.uuid,
+                after=after,
+            )
+            item.save(session=session)
+            write.changed(data_versions.FOLDER_ITEM, item.uuid)
+        return write.version
+
+    def _order(self):
+        items = models.FolderItem.objects.get_all(
+            filters={"user_id": dm_filters.EQ(self.user_id)},
+        )
+        return {item.chat_id: item.order_index for item in items}
+
+    def _changed_since(self, version):
+        changes = queries.get_changes(
+            self.user_id,
+            since_version=version,
+            until_version=data_versions.get_version(self.user_id),
+        )
+        return sorted(item["chat_id"] for item in changes["folder_items"])
+
+
+class TestMoveItems(OrderingTestCase):
+    def test_move_between_items_touches_one_row(self):
+        a, b, c = self._make_items(STEP, 2 * STEP, 3 * STEP)
+
+        version = self._move(c, b)
+
+        self.assertEqual(
+            self._order(),
+            {0: STEP, 1: 2 * STEP, 2: STEP + STEP // 2},
+        )
+        self.assertEqual(self._changed_since(version - 1), [2])
+
+    def test_move_to_the_ends(self):
+        a, b, c = self._make_items(STEP, 2 * STEP, 3 * STEP)
+
+        self._move(a, c, after=True)
+        self._move(c, b)
+
+        self.assertEqual(self._order(), {0: 4 * STEP, 1: 2 * STEP, 2: STEP})
+
+    def test_rebalance_when_gap_runs_out(self):
+        a, b, c = self._make_items(1, 2, 3)
+
+        version = self._move(c, b)
+
+        order = self._order()
+        self.assertEqual(sorted(order, key=order.get), [0, 2, 1])
+        self.assertEqual(order[1], 2 * STEP)
+        self.assertEqual(self._changed_since(version - 1), [0, 1, 2])
+
+    def test_items_without_keys_get_keys_last(self):
+        a, b, c = self._make_items(None, STEP, None)
+
+        self._move(b, c, after=True)
+
+        order = self._order()
+        self.assertEqual(sorted(order, key=order.get), [0, 2, 1])
+
+    def test_invalid_anchors(self):
+        other = self.make_folder(title="other")
+        stranger = self.make_folder_item(other, chat_id=9)
+        (item,) = self._make_items(STEP)
+
+        for anchor in (stranger, item):
+            self.assertRaises(
+                user_api_exceptions.InvalidMoveError,
+                self._move,
+                item,
+                anchor,
+            )
+        self.assertEqual(data_versions.get_version(self.user_id), 0)
+
+
+class TestAppendKeys(OrderingTestCase):
+    def _append_keys(self, counts):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            write = data_versions.UserDataWrite(self.user_id, session=session)
+            return ordering.get_append_keys(write, counts)
+
+    def test_empty_folder_starts_at_one_step(self):
+        keys = self._append_keys({self.folder.uuid: 2})
+
+        self.assertEqual(keys, {self.folder.uuid: [STEP, 2 * STEP]})
+
+    def test_keys_follow_the_last_item(self):
+        self._make_items(STEP, 5 * STEP)
+        other = self.make_folder(title="other")
+
+        keys = self._append_keys({self.folder.uuid: 1, other.uuid: 0})
+
+        self.assertEqual(keys, {self.folder.uuid: [6 * STEP], other.uuid: []})
+        self.assertEqual(self._order(), {0: STEP, 1: 5 * STEP})
+
+    def test_items_without_keys_are_renumbered_first(self):
+        self._make_items(None, 3 * STEP, None)
+
+        keys = self._append_keys({self.folder.uuid: 1})
+
+        self.assertEqual(keys, {self.folder.uuid: [4 * STEP]})
+        self.assertEqual(self._order(), {0: 2 * STEP, 1: STEP, 2: 3 * STEP})
+
+    def test_keys_near_the_limit_are_renumbered_first(self):
+        self._make_items(STEP, ordering._MAX_INDEX - 1)
+
+        keys = self._append_keys({self.folder.uuid: 1})
+
+        self.assertEqual(keys, {self.folder.uuid: [3 * STEP]})
+
+    def test_move_before_appended_item_touches_one_row(self):
+        keys = self._append_keys({self.folder.uuid: 3})[self.folder.uuid]
+        a, b, c = self._make_items(*keys)
+
+        version = self._move(a, c)
+
+        self.assertEqual(self._changed_since(version - 1), [0])
+        order = self._order()
+        self.assertEqual(sorted(order, key=order.get), [1, 0, 2])
@@ -0,0 +1,195 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+from unittest import mock
+
+from restalchemy.dm import filters as dm_filters
+from restalchemy.storage.sql import engines
+import webob
+
+from workspace.common import exceptions as common_exc
+from workspace.common.api import pagination
+from workspace.tests.functional import base
+from workspace.user_api.api import controllers
+from workspace.user_api.dm import models
+
+
+class TestKeysetFilter(base.DBTestCase):
+    KEYSET = ("created_at", "uuid")
+
+    def _page(self, folder, marker, limit):
+        filters = {
+            "folder": dm_filters.EQ(folder),
+            "user_id": dm_filters.EQ(self.user_id),
+        }
+        if marker is not None:
+            filters = dm_filters.AND(
+                pagination.build_keyset_filter(self.KEYSET, marker),
+                filters,
+            )
+        return models.FolderItem.objects.get_all(
+            filters=filters,
+            limit=limit,
+            order_by={"created_at": "asc", "uuid": "asc"},
+        )
+
+    def test_pages_cover_all_items_once(self):
+        folder = self.make_folder()
+        items = [self.make_folder_item(folder, chat_id=n) for n in range(7)]
+        # Rows sharing created_at are told apart by uuid
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            session.execute(
+                'UPDATE "folder_items" SET "created_at" = %s WHERE "uuid" = ANY(%s);',
+                (items[2].created_at, [item.uuid for item in items[2:5]]),
+            )
+        expected = [
+            str(item.uuid)
+            for item in models.FolderItem.objects.get_all(
+                filters={"folder": dm_filters.EQ(folder)},
+                order_by={"created_at": "asc", "uuid": "asc"},
+            )
+        ]
+
+        seen = []
+        marker = None
+        while True:
+            page = self._page(folder, marker, limit=2)
+            seen.extend(str(item.uuid) for item in page)
+            if len(page) < 2:
+                break
+            marker = {name: getattr(page[-1], name) for name in self.KEYSET}
+
+        self.assertEqual(seen, expected)
+
+
+class TestFolderItemsControllerSort(base.DBTestCase):
+    def setUp(self):
+        super().setUp()
+        folder = self.make_folder()
+        self.items = [
+            self.make_folder_item(folder, chat_id=n, order_index=(5 - n) * 10)
+            for n in range(5)
+        ]
+        self.controller = controllers.FolderItemsController.__new__(
+            controllers.FolderItemsController,
+        )
+        self.controller._get_user_id = mock.MagicMock(return_value=self.user_id)
+
+    def _filter(self, order_by, limit=0, marker=None):
+        self.controller._pagination_limit = limit
+        self.controller._pagination_marker = marker
+        return [item.chat_id for item in self.controller.filter({}, order_by=order_by)]
+
+    def test_unpaginated_listing_keeps_the_sort(self):
+        self.assertEqual(self._filter({"order_index": "asc"}), [4, 3, 2, 1, 0])
+        self.assertEqual(self._filter({"created_at": "desc"}), [4, 3, 2, 1, 0])
+
+    def test_descending_pages(self):
+        first = self._filter({"created_at": "desc"}, limit=3)
+        marker = self.controller._get_keyset_values(self.items[first[-1]])
+        second = self._filter({"created_at": "desc"}, limit=3, marker=marker)
+
+        self.assertEqual(first + second, [4, 3, 2, 1, 0])
+
+    def test_pages_are_sorted_by_the_keyset_only(self):
+        self.assertRaises(
+            common_exc.UnsupportedSortError,
+            self._filter,
+            {"order_index": "asc"},
+            limit=3,
+        )
+
+
+class TestFolderItemControllerOrder(base.DBTestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = self.make_folder()
+        # Unkeyed items written before order keys sort last
+        self.make_folder_item(self.folder, chat_id=4)
+        self.make_folder_item(self.folder, chat_id=5)
+        for chat_id, order_index in ((2, 3072), (0, 1024), (3, 4096), (1, 2048)):
+            self.make_folder_item(
+                self.folder,
+                chat_id=chat_id,
+                order_index=order_index,
+            )
+        self.controller = controllers.FolderItemController.__new__(
+            controllers.FolderItemController,
+        )
+        self.controller._get_user_id = mock.MagicMock(return_value=self.user_id)
+
+    def _filter(self, order_by, limit=0, marker=None):
+        self.controller._pagination_limit = limit
+        self.controller._pagination_marker = marker
+        return self.controller.filter(self.folder, {}, order_by=order_by)
+
+    def _pages(self, order_by):
+        seen = []
+        marker = None
+        while True:
+            page = self._filter(order_by, limit=2, marker=marker)
+            seen.extend(item.chat_id for item in page)
+            if len(page) < 2:
+                return seen
+            marker = self.controller._get_keyset_values(page[-1])
+
+    def test_unpaginated_listing_is_in_the_order_of_the_folder(self):
+        order_by = self.controller._prepare_sorts(webob.multidict.MultiDict())
+
+        result = self._filter(order_by)
+
+        self.assertEqual([item.chat_id for item in result], [0, 1, 2, 3, 4, 5])
+
+    def test_pages_cover_keyed_and_unkeyed_items(self):
+        self.assertEqual(self._pages({}), [0, 1, 2, 3, 4, 5])
+
+    def test_descending_pages(self):
+        self.assertEqual(
+            self._pages({"order_index": "desc"}),
+            [5, 4, 3, 2, 1, 0],
+        )
+
+
+class TestFolderControllerSort(base.DBTestCase):
+    def setUp(self):
+        super().setUp()
+        for title in ("b", "c", "a"):
+            self.make_folder(title=title)
+        self.controller = controllers.FolderController.__new__(
+            controllers.FolderController,
+        )
+        self.controller._get_user_id = mock.MagicMock(return_value=self.user_id)
+        self.controller._get_etag = mock.MagicMock(return_value=({}, False))
+
+    def _filter(self, order_by, limit=0):
+        self.controller._pagination_limit = limit
+        folders, _, _ = self.controller.filter({}, order_by=order_by)
+        return [folder["title"] for folder in folders]
+
+    def test_unpaginated_listing_keeps_the_sort(self):
+        self.assertEqual(self._filter({"title": "asc"}), ["a", "b", "c"])
+        self.assertEqual(self._filter({"title": "DESC"}), ["c", "b", "a"])
+        self.assertEqual(self._filter({}), ["b", "c", "a"])
+
+    def test_pages_are_sorted_by_the_keyset_only(self):
+        self.assertRaises(
+            common_exc.UnsupportedSortError,
+            self._filter,
+            {"title": "asc"},
+            limit=2,
+        )
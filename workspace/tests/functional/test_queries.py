@@ -0,0 +1,300 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from restalchemy.dm import filters as dm_filters
+from restalchemy.storage.sql import engines
+
+from workspace.tests.functional import base
+from workspace.user_api.dm import queries
+
+
+class TestGetFoldersWithItems(base.DBTestCase):
+    def _get(self, **filters):
+        filters["user_id"] = dm_filters.EQ(self.user_id)
+        return queries.get_folders_with_items(filters=filters)
+
+    def _expected(self, folder, items):
+        view = folder.dump_to_simple_view()
+        view["uuid"] = str(folder.uuid)
+        view["items"] = []
+        for item in items:
+            item_view = item.dump_to_simple_view()
+            item_view["uuid"] = str(item.uuid)
+            view["items"].append(item_view)
+        return view
+
+    def test_same_view_as_orm(self):
+        folder = self.make_folder(title="work", background_color_value=7)
+        item = self.make_folder_item(folder, chat_id=1, order_index=3)
+        pinned = self.make_folder_item(folder, chat_id=2, chat_type="private")
+        pinned.pinned_at = pinned.created_at
+        pinned.save()
+        # ORM views must be built from stored values
+        folder = folder.__class__.objects.get_one(
+            filters={"uuid": dm_filters.EQ(folder.uuid)},
+        )
+        items = sorted(
+            item.__class__.objects.get_all(
+                filters={"folder": dm_filters.EQ(folder)},
+            ),
+            # Keyed items first, as in the order of the folder
+            key=lambda i: (i.order_index is None, i.created_at, str(i.uuid)),
+        )
+
+        result = self._get()
+
+        self.assertEqual(result, [self._expected(folder, items)])
+
+    def test_empty_folder_has_empty_items(self):
+        self.make_folder()
+
+        result = self._get()
+
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]["items"], [])
+
+    def test_no_folders(self):
+        self.assertEqual(self._get(), [])
+
+    def test_items_are_grouped_by_folder(self):
+        folder_a = self.make_folder(title="a")
+        folder_b = self.make_folder(title="b")
+        self.make_folder_item(folder_a, chat_id=1)
+        self.make_folder_item(folder_b, chat_id=2)
+        self.make_folder_item(folder_b, chat_id=3)
+
+        result = {f["title"]: f for f in self._get()}
+
+        self.assertEqual([i["chat_id"] for i in result["a"]["items"]], [1])
+        self.assertEqual([i["chat_id"] for i in result["b"]["items"]], [2, 3])
+
+    def test_filters_are_applied(self):
+        self.make_folder(title="a")
+        self.make_folder(title="b")
+        self.make_folder(title="c")
+
+        result = self._get(title=dm_filters.In(["a", "c"]))
+
+        self.assertEqual(sorted(f["title"] for f in result), ["a", "c"])
+
+    def test_other_users_are_not_visible(self):
+        self.make_folder(title="mine")
+        other = self.make_folder(title="theirs", user_id=self.user_id + 1)
+        self.addCleanup(self._delete_user_data, self.user_id + 1)
+        self.make_folder_item(other, chat_id=1)
+
+        result = self._get()
+
+        self.assertEqual([f["title"] for f in result], ["mine"])
+
+
+class TestFoldersWithItemsQueryPlan(base.DBTestCase):
+    def test_items_are_read_only_for_selected_folders(self):
+        selected = self.make_folder(title="selected")
+        other = self.make_folder(title="other")
+        for chat_id in range(3):
+            self.make_folder_item(selected, chat_id=chat_id)
+        for chat_id in range(10, 30):
+            self.make_folder_item(other, chat_id=chat_id)
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            statement, values = queries.build_folders_with_items_query(
+                filters={
+                    "user_id": dm_filters.EQ(self.user_id),
+                    "title": dm_filters.EQ("selected"),
+                },
+                session=session,
+            )
+
+        # Tiny test tables would be scanned sequentially otherwise
+        nodes = self.explain(statement, values, settings={"enable_seqscan": "off"})
+
+        item_scans = [
+            node for node in nodes if node.get("Relation Name") == "folder_items"
+        ]
+        self.assertTrue(item_scans)
+        for node in item_scans:
+            self.assertIn("folder", node.get("Index Cond", node.get("Recheck Cond")))
+        read_rows = sum(
+            node["Actual Rows"] + node.get("Rows Removed by Filter", 0)
+            for node in item_scans
+        )
+        self.assertEqual(read_rows, 3)
+
+
+class TestGetFoldersWithItemsPagination(base.DBTestCase):
+    def _get(self, **kwargs):
+        return queries.get_folders_with_items(
+            filters={"user_id": dm_filters.EQ(self.user_id)},
+            **kwargs,
+        )
+
+    @staticmethod
+    def _marker(view):
+        return {"created_at": view["created_at"], "uuid": view["uuid"]}
+
+    def test_pages_cover_all_folders_once(self):
+        for n in range(7):
+            self.make_folder(title=str(n))
+        expected = [f["uuid"] for f in self._get()]
+
+        seen = []
+        marker = None
+        while True:
+            page = self._get(limit=3, marker=marker)
+            seen.extend(f["uuid"] for f in page)
+            if len(page) < 3:
+                break
+            marker = self._marker(page[-1])
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 7)
+
+    def test_descending_pages(self):
+        for n in range(5):
+            self.make_folder(title=str(n))
+        expected = [f["uuid"] for f in self._get()][::-1]
+
+        first = self._get(limit=3, descending=True)
+        second = self._get(limit=3, descending=True, marker=self._marker(first[-1]))
+
+        self.assertEqual([f["uuid"] for f in first + second], expected)
+
+    def test_items_limit_returns_one_extra_item(self):
+        folder = self.make_folder()
+        empty = self.make_folder()
+        for chat_id in range(5):
+            self.make_folder_item(folder, chat_id=chat_id)
+
+        result = {f["uuid"]: f for f in self._get(items_limit=2)}
+
+        self.assertEqual(
+            [i["chat_id"] for i in result[str(folder.uuid)]["items"]],
+            [0, 1, 2],
+        )
+        self.assertEqual(result[str(empty.uuid)]["items"], [])
+
+    def test_items_are_in_the_order_of_the_folder(self):
+        folder = self.make_folder()
+        self.make_folder_item(folder, chat_id=0)
+        for chat_id, order_index in ((1, 3072), (2, 1024), (3, 2048)):
+            self.make_folder_item(folder, chat_id=chat_id, order_index=order_index)
+
+        (result,) = self._get()
+        (limited,) = self._get(items_limit=1)
+
+        self.assertEqual([i["chat_id"] for i in result["items"]], [2, 3, 1, 0])
+        self.assertEqual([i["chat_id"] for i in limited["items"]], [2, 3])
+
+    def test_deep_page_starts_at_marker(self):
+        for n in range(20):
+            self.make_folder(title=str(n))
+        marker = self._marker(self._get()[14])
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            statement, values = queries.build_folders_with_items_query(
+                filters={"user_id": dm_filters.EQ(self.user_id)},
+                session=session,
+                limit=2,
+                marker=marker,
+            )
+
+        nodes = self.explain(statement, values, settings={"enable_seqscan": "off"})
+
+        folder_scans = [
+            node for node in nodes if node.get("Relation Name") == "folders"
+        ]
+        self.assertEqual(len(folder_scans), 1)
+        self.assertIn("created_at", folder_scans[0]["Index Cond"])
+        self.assertEqual(folder_scans[0]["Actual Rows"], 2)
+
+
+class TestGetChatFolders(base.DBTestCase):
+    def test_folders_of_every_chat_in_query_order(self):
+        work = self.make_folder(title="work")
+        news = self.make_folder(title="news")
+        in_work = self.make_folder_item(work, chat_id=1)
+        in_news = self.make_folder_item(news, chat_id=1)
+        pinned = self.make_folder_item(news, chat_id=2, chat_type="private")
+        pinned.pinned_at = pinned.created_at
+        pinned.save()
+
+        result = queries.get_chat_folders(self.user_id, [3, 2, 1])
+
+        self.assertEqual([chat["chat_id"] for chat in result], [3, 2, 1])
+        self.assertEqual(result[0]["folders"], [])
+        (membership,) = result[1]["folders"]
+        self.assertEqual(membership["folder_uuid"], str(news.uuid))
+        self.assertEqual(membership["item_uuid"], str(pinned.uuid))
+        self.assertEqual(membership["chat_type"], "private")
+        self.assertTrue(membership["pinned"])
+        self.assertIsNotNone(membership["pinned_at"])
+        self.assertEqual(
+            [(m["item_uuid"], m["pinned"]) for m in result[2]["folders"]],
+            [(str(in_work.uuid), False), (str(in_news.uuid), False)],
+        )
+
+    def test_chat_type_filter(self):
+        folder = self.make_folder()
+        self.make_folder_item(folder, chat_id=1, chat_type="stream")
+        other = self.make_folder()
+        self.make_folder_item(other, chat_id=1, chat_type="private")
+
+        result = queries.get_chat_folders(self.user_id, [1], chat_type="private")
+
+        self.assertEqual(
+            [m["folder_uuid"] for m in result[0]["folders"]],
+            [str(other.uuid)],
+        )
+
+    def test_other_users_are_not_visible(self):
+        other = self.make_folder(user_id=self.user_id + 1)
+        self.addCleanup(self._delete_user_data, self.user_id + 1)
+        self.make_folder_item(other, chat_id=1)
+
+        result = queries.get_chat_folders(self.user_id, [1])
+
+        self.assertEqual(result, [{"chat_id": 1, "folders": []}])
+
+
+class TestGetFolderSummaries(base.DBTestCase):
+    def test_counters_of_every_folder(self):
+        work = self.make_folder(title="work", unread_messages=[7, 8, 9])
+        empty = self.make_folder(title="empty")
+        self.make_folder_item(work, chat_id=1)
+        pinned = self.make_folder_item(work, chat_id=2)
+        pinned.pinned_at = pinned.created_at
+        pinned.save()
+
+        result = queries.get_folder_summaries(self.user_id)
+
+        self.assertEqual(
+            [
+                (f["uuid"], f["items_count"], f["pinned_count"], f["unread_count"])
+                for f in result
+            ],
+            [(str(work.uuid), 2, 1, 3), (str(empty.uuid), 0, 0, 0)],
+        )
+        self.assertEqual(result[0]["title"], "work")
+        self.assertNotIn("unread_messages", result[0])
+        self.assertNotIn("items", result[0])
+
+    def test_other_users_are_not_visible(self):
+        other = self.make_folder(user_id=self.user_id + 1)
+        self.addCleanup(self._delete_user_data, self.user_id + 1)
+        self.make_folder_item(other, chat_id=1)
+
+        self.assertEqual(queries.get_folder_summaries(self.user_id), [])
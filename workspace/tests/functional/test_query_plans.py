@@ -0,0 +1,341 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import random
+from unittest import mock
+from urllib import parse
+
+from restalchemy.api import contexts as ra_contexts
+from restalchemy.storage.sql import engines
+from restalchemy.storage.sql import sessions
+import webob
+
+from workspace.common.api import pagination
+from workspace.common.api.middlewares import user_context
+from workspace.tests.functional import test_data_versions
+from workspace.user_api.api import controllers
+from workspace.user_api.dm import ordering
+
+
+# Many small accounts: a hash of a whole table must cost more than the
+# index lookups of one account, or the planner rightly prefers the scan
+USERS = 5000
+FOLDERS_PER_USER = 8
+ITEMS_PER_FOLDER = 3
+# Chats are shared by users, as streams are
+CHATS = 1000
+
+# Tables which are large enough for the planner to tell a scan from a lookup
+SEEDED_TABLES = ("folders", "folder_items")
+
+_SEED = """
+    WITH "f" AS (
+        INSERT INTO "folders"
+            ("uuid", "title", "user_id", "unread_messages", "system_type")
+        SELECT gen_random_uuid(), 'folder ' || "n", "u", '{}',
+            CASE WHEN "n" = 0 THEN 'all' END
+        FROM generate_series(%(first)s, %(last)s) AS "u",
+            generate_series(0, %(folders)s - 1) AS "n"
+        RETURNING "uuid", "user_id"
+    )
+    INSERT INTO "folder_items"
+        ("uuid", "folder", "user_id", "chat_id", "chat_type", "order_index")
+    SELECT gen_random_uuid(), "f"."uuid", "f"."user_id",
+        ("f"."user_id" %% %(chats)s + "i") %% %(chats)s, 'stream', "i" * %(step)s
+    FROM "f", generate_series(1, %(items)s) AS "i";
+"""
+
+
+class TestControllerQueryPlans(test_data_versions.DataVersionsTestCase):
+    """No controller query reads user data with a sequential scan.
+
+    Controller methods are called the way routes call them, with a
+    request of the user, on a synthetic dataset of many users. Every
+    statement they execute is recorded and planned.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.first_user_id = random.randint(10**6, 2**31 - USERS - 2)
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            session.execute(
+                _SEED,
+                {
+                    "first": cls.first_user_id,
+                    "last": cls.first_user_id + USERS - 1,
+                    "folders": FOLDERS_PER_USER,
+                    "items": ITEMS_PER_FOLDER,
+                    "chats": CHATS,
+                    "step": ordering.ORDER_STEP,
+                },
+            )
+            for table in SEEDED_TABLES:
+                session.execute(f'ANALYZE "{table}";')
+
+    @classmethod
+    def tearDownClass(cls):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            session.execute(
+                'DELETE FROM "folders" WHERE "user_id" BETWEEN %s AND %s;',
+                (cls.first_user_id, cls.first_user_id + USERS - 1),
+            )
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.folder = self.make_folder()
+        self.other_folder = self.make_folder(title="other")
+        self.items = [
+            self.make_folder_item(
+                self.folder,
+                chat_id=chat_id,
+                order_index=(chat_id + 1) * ordering.ORDER_STEP,
+            )
+            for chat_id in range(5)
+        ]
+
+    def assertNoSeqScans(self, run):
+        """Run `run` and plan every statement it executed.
+
+        :return: list of plan nodes of every statement.
+        """
+        executed = []
+        execute = sessions.PgSQLSession.execute
+
+        def record(session, statement, values=None):
+            executed.append((statement, values))
+            return execute(session, statement, values)
+
+        with mock.patch.object(sessions.PgSQLSession, "execute", record):
+            run()
+
+        self.assertTrue(executed)
+        plans = []
+        for statement, values in executed:
+            nodes = self.explain(statement, values, analyze=False)
+            seq_scans = [
+                node["Relation Name"]
+                for node in nodes
+                if node["Node Type"] == "Seq Scan"
+                and node["Relation Name"] in SEEDED_TABLES
+            ]
+            self.assertEqual(seq_scans, [], statement)
+            plans.append(nodes)
+        return plans
+
+    def assertUsesChatIndex(self, plan):
+        # One index finds the rows, other members of the chat are skipped
+        conditions = [node.get("Index Cond", "") for node in plan]
+        self.assertTrue(
+            any("user_id" in c and "chat_id" in c for c in conditions),
+            conditions,
+        )
+
+    def _controller(self, controller_class, method="GET", **params):
+        """Build a controller for a request of the user, as routes do."""
+        request = webob.Request.blank(
+            f"/?{parse.urlencode(params, doseq=True)}",
+            method=method,
+        )
+        request.api_context = ra_contexts.RequestContext(request)
+        request.context = user_context.UserContext(user_id=self.user_id)
+        return controller_class(request)
+
+    def _list(self, controller_class, parent_resource=None, **params):
+        """Run `filter` with the arguments `do_collection` would pass."""
+        controller = self._controller(controller_class, **params)
+        if hasattr(controller, "_prepare_pagination_meta"):
+            controller._prepare_pagination_meta()
+        api_context = controller.request.api_context
+        kwargs = controller._make_kwargs(
+            parent_resource,
+            filters=controller._prepare_filters(api_context.params_filters),
+        )
+        return controller.filter(
+            order_by=controller._prepare_sorts(api_context.params),
+            **kwargs,
+        )
+
+    def _resource(self, controller, uuid, parent_resource=None):
+        # Actions get their resource through the controller as well
+        return controller.get_resource_by_uuid(
+            str(uuid),
+            parent_resource=parent_resource,
+        )
+
+    @staticmethod
+    def _marker(row, controller_class=pagination.KeysetPaginationMixin):
+        controller = controller_class.__new__(controller_class)
+        return pagination.encode_marker(controller._get_keyset_values(row))
+
+    def test_list_folders(self):
+        def run():
+            self._list(controllers.FolderController)
+            self._list(
+                controllers.FolderController,
+                page_limit=1,
+                page_marker=self._marker(self.other_folder),
+                items_limit=2,
+                sort_key="created_at",
+                sort_dir="desc",
+            )
+            self._list(controllers.FolderController, system_type="all")
+
+        self.assertNoSeqScans(run)
+
+    def test_get_folder(self):
+        controller = self._controller(controllers.FolderController)
+
+        self.assertNoSeqScans(lambda: controller.get(uuid=self.folder.uuid))
+
+    def test_list_folder_items(self):
+        def run():
+            self._list(controllers.FolderItemController, self.folder)
+            self._list(
+                controllers.FolderItemController,
+                self.folder,
+                page_limit=2,
+                page_marker=self._marker(
+                    self.items[1],
+                    controllers.FolderItemController,
+                ),
+            )
+            controller = self._controller(controllers.FolderItemController)
+            controller.get(parent_resource=self.folder, uuid=self.items[0].uuid)
+
+        self.assertNoSeqScans(run)
+
+    def test_list_items(self):
+        self.assertNoSeqScans(
+            lambda: self._list(
+                controllers.FolderItemsController,
+                page_limit=2,
+                page_marker=self._marker(self.items[1]),
+            )
+        )
+
+    def test_list_all_items(self):
+        self.assertNoSeqScans(lambda: self._list(controllers.FolderItemsController))
+
+    def test_list_items_by_chat(self):
+        (plan,) = self.assertNoSeqScans(
+            lambda: self._list(controllers.FolderItemsController, chat_id=3)
+        )
+
+        self.assertUsesChatIndex(plan)
+
+    def test_chat_folders(self):
+        (plan,) = self.assertNoSeqScans(
+            lambda: self._list(controllers.ChatFoldersController, chat_id=[3, 4, 999])
+        )
+
+        self.assertUsesChatIndex(plan)
+
+    def test_folder_summaries(self):
+        self.assertNoSeqScans(lambda: self._list(controllers.FolderSummaryController))
+
+    def test_changes(self):
+        def run():
+            result = self._list(controllers.ChangesController)
+            self._list(controllers.ChangesController, cursor=result["cursor"])
+
+        self.assertNoSeqScans(run)
+
+    def test_item_writes(self):
+        def run():
+            controller = self._controller(controllers.FolderItemController, "POST")
+            controller.create(
+                parent_resource=self.folder,
+                chat_id=100,
+                chat_type="stream",
+            )
+            controller.update(
+                parent_resource=self.folder,
+                uuid=self.items[0].uuid,
+                folder_uuid=self.other_folder.uuid,
+            )
+            controller.delete(parent_resource=self.folder, uuid=self.items[1].uuid)
+            item = self._resource(controller, self.items[2].uuid, self.folder)
+            controller.pin._post(controller, item)
+            controller.move._post(controller, item, after=str(self.items[4].uuid))
+
+        self.assertNoSeqScans(run)
+
+    def test_bulk_item_writes(self):
+        controller = self._controller(controllers.FolderItemBulkController, "POST")
+
+        self.assertNoSeqScans(
+            lambda: controller.create(
+                operations=[
+                    {
+                        "op": "create",
+                        "folder_uuid": str(self.other_folder.uuid),
+                        "chat_id": 100,
+                        "chat_type": "stream",
+                    },
+                    {
+                        "op": "update",
+                        "uuid": str(self.items[0].uuid),
+                        "folder_uuid": str(self.other_folder.uuid),
+                    },
+                    {"op": "delete", "uuid": str(self.items[1].uuid)},
+                ],
+            )
+        )
+
+    def test_batch_pin(self):
+        def run():
+            pin = self._controller(controllers.FolderItemPinController, "POST")
+            pin.create(folder_uuid=str(self.folder.uuid), chat_ids=[1, 2])
+            unpin = self._controller(controllers.FolderItemUnpinController, "POST")
+            unpin.create(items=[str(self.items[0].uuid)])
+
+        self.assertNoSeqScans(run)
+
+    def test_folder_actions(self):
+        def run():
+            controller = self._controller(controllers.FolderController, "POST")
+            folder = self._resource(controller, self.folder.uuid)
+            controller.reorder._post(
+                controller,
+                folder,
+                items=[str(item.uuid) for item in self.items[2:]],
+            )
+            controller.sync._post(
+                controller,
+                folder,
+                chats=[
+                    {"chat_id": 1, "chat_type": "group"},
+                    {"chat_id": 2, "chat_type": "stream"},
+                    {"chat_id": 9, "chat_type": "stream"},
+                ],
+            )
+            controller.add_unread._post(controller, folder, messages=[1, 2])
+            controller.clear_unread._post(controller, folder)
+
+        self.assertNoSeqScans(run)
+
+    def test_folder_writes(self):
+        def run():
+            self._controller(controllers.AllFolderController, "POST").create()
+            controller = self._controller(controllers.FolderController, "DELETE")
+            controller.delete(uuid=self.other_folder.uuid)
+
+        self.assertNoSeqScans(run)
@@ -0,0 +1,82 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import threading
+
+from restalchemy.storage import exceptions as storage_exc
+from restalchemy.storage.sql import engines
+
+from workspace.tests.functional import base
+from workspace.user_api.dm import models
+from workspace.user_api.dm import system_folders
+
+
+class TestEnsureAllFolder(base.DBTestCase):
+    def _ensure(self, title="All"):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            return system_folders.ensure_all_folder(
+                self.user_id,
+                title,
+                session=session,
+            )
+
+    def test_folder_is_created_once(self):
+        folder, created = self._ensure()
+        again, created_again = self._ensure(title="Other")
+
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(again, folder)
+        self.assertEqual(folder["title"], "All")
+        self.assertEqual(folder["system_type"], "all")
+        self.assertEqual(folder["unread_messages"], [])
+
+    def test_existing_folder_is_returned(self):
+        existing = self.make_folder(title="Mine", system_type="all")
+
+        folder, created = self._ensure()
+
+        self.assertFalse(created)
+        self.assertEqual(folder["uuid"], str(existing.uuid))
+
+    def test_concurrently_created_folder_is_returned(self):
+        engine = engines.engine_factory.get_engine()
+        result = []
+        with engine.session_manager() as session:
+            models.Folder(
+                title="Concurrent",
+                user_id=self.user_id,
+                system_type="all",
+            ).insert(session=session)
+            # Waits on the uncommitted row, then its snapshot misses it
+            thread = threading.Thread(target=lambda: result.append(self._ensure()))
+            thread.start()
+            thread.join(0.2)
+        thread.join()
+
+        folder, created = result[0]
+        self.assertFalse(created)
+        self.assertEqual(folder["title"], "Concurrent")
+
+    def test_second_all_folder_violates_the_index(self):
+        self._ensure()
+
+        with self.assertRaises(storage_exc.ConflictRecords) as ctx:
+            self.make_folder(system_type="all")
+
+        self.assertTrue(system_folders.is_all_folder_conflict(ctx.exception))
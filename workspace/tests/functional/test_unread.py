@@ -0,0 +1,103 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+from restalchemy.storage import exceptions as storage_exc
+from restalchemy.storage.sql import engines
+
+from workspace.tests.functional import test_data_versions
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.dm import data_versions
+from workspace.user_api.dm import models
+from workspace.user_api.dm import unread
+
+
+class TestUnreadMessages(test_data_versions.DataVersionsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = self.make_folder()
+
+    def _change(self, change, *args, folder=None):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            write = data_versions.UserDataWrite(self.user_id, session=session)
+            return change(write, (folder or self.folder).uuid, *args)
+
+    def _stored(self):
+        return models.Folder.objects.get_one(
+            filters={"uuid": self.folder.uuid},
+        ).unread_messages
+
+    def test_add_appends_new_ids_only(self):
+        self._change(unread.add_unread, [5, 3])
+
+        result = self._change(unread.add_unread, [3, 7, 7, 1])
+
+        self.assertEqual(result["unread_messages"], [5, 3, 7, 1])
+        self.assertEqual(self._stored(), [5, 3, 7, 1])
+        self.assertGreater(result["updated_at"], str(self.folder.updated_at))
+
+    def test_remove_keeps_order_of_the_rest(self):
+        self._change(unread.add_unread, [1, 2, 3, 4])
+
+        result = self._change(unread.remove_unread, [3, 1, 9])
+
+        self.assertEqual(result["unread_messages"], [2, 4])
+        self.assertEqual(self._stored(), [2, 4])
+
+    def test_clear(self):
+        self._change(unread.add_unread, [1, 2])
+        version = data_versions.get_version(self.user_id)
+
+        result = self._change(unread.clear_unread)
+
+        self.assertEqual(result["unread_messages"], [])
+        self.assertEqual(self._stored(), [])
+        self.assertEqual(data_versions.get_version(self.user_id), version + 1)
+
+    def test_invalid_ids(self):
+        for message_ids in ([-1], ["1"], [True], 1, None):
+            self.assertRaises(
+                user_api_exceptions.InvalidUnreadMessagesError,
+                self._change,
+                unread.add_unread,
+                message_ids,
+            )
+
+    def test_foreign_folder_is_not_found(self):
+        foreign = self.make_folder(user_id=self.user_id + 1)
+        self.addCleanup(self._delete_user_data, self.user_id + 1)
+
+        self.assertRaises(
+            storage_exc.RecordNotFound,
+            self._change,
+            unread.add_unread,
+            [1],
+            folder=foreign,
+        )
+
+    def test_model_round_trip(self):
+        folder = self.make_folder(unread_messages=[3, 1])
+
+        folder.unread_messages = [3, 1, 2]
+        folder.update()
+
+        self.assertEqual(
+            models.Folder.objects.get_one(
+                filters={"uuid": folder.uuid},
+            ).unread_messages,
+            [3, 1, 2],
+        )
@@ -0,0 +1,132 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import logging
+import os
+import time
+import unittest
+
+from restalchemy.storage.sql import engines
+
+from workspace.tests.functional import base
+
+
+LOG = logging.getLogger(__name__)
+
+FOLDERS = 2000
+SIZE_FOLDERS = 200
+MAX_UNREAD = 5000
+ROUNDS = 2
+
+# Skewed like real folders: most have a few unread messages, some have
+# thousands. Message ids are large and increasing with small gaps. The
+# reference to "f" makes the subquery run once per folder.
+_FILL = """
+    SELECT setseed(0.42);
+    INSERT INTO "{table}" ("unread_messages")
+    SELECT ARRAY(
+        SELECT {element}
+        FROM generate_series(
+            1, (random() ^ 4 * {max_unread})::integer + "f" * 0
+        ) AS "m"
+    )
+    FROM generate_series(1, {folders}) AS "f";
+"""
+_MESSAGE_ID = '100000000 + "m" * 7 + (random() * 5)::integer'
+
+
+class TestUnreadMessagesStorage(base.DBTestCase):
+    """Comparison of INTEGER[] against the former JSONB[] storage.
+
+    Both layouts get the same seeded data in temporary tables, so their
+    sizes are stable. Timings depend on the machine and only run when
+    RUN_BENCHMARKS is set; the numbers are logged.
+    """
+
+    # Column type, element of the fill query, appended message id
+    LAYOUTS = {
+        "jsonb": ("JSONB[]", f"to_jsonb({_MESSAGE_ID})", "to_jsonb(%s::integer)"),
+        "int4": ("INTEGER[]", _MESSAGE_ID, "%s::integer"),
+    }
+
+    def _fill(self, session, layout, folders):
+        column_type, element, _ = self.LAYOUTS[layout]
+        table = f"bench_unread_{layout}"
+        session.execute(
+            f'CREATE TEMP TABLE "{table}" ('
+            f' "id" SERIAL PRIMARY KEY, "unread_messages" {column_type} NOT NULL'
+            ") ON COMMIT DROP;"
+        )
+        for statement in _FILL.format(
+            table=table,
+            element=element,
+            max_unread=MAX_UNREAD,
+            folders=folders,
+        ).split(";")[:-1]:
+            session.execute(statement)
+        return session.execute(
+            "SELECT pg_total_relation_size(%s) AS size;",
+            (table,),
+        ).fetchone()["size"]
+
+    def _measure(self, session, layout):
+        size = self._fill(session, layout, FOLDERS)
+        table = f"bench_unread_{layout}"
+        appended = self.LAYOUTS[layout][2]
+        read = write = float("inf")
+        for _ in range(ROUNDS):
+            started = time.perf_counter()
+            rows = session.execute(
+                f'SELECT "unread_messages" FROM "{table}";',
+            ).fetchall()
+            read = min(read, time.perf_counter() - started)
+            started = time.perf_counter()
+            session.execute(
+                f'UPDATE "{table}" SET "unread_messages" = "unread_messages"'
+                f' || {appended} WHERE "id" %% 10 = 0;',
+                (1,),
+            )
+            write = min(write, time.perf_counter() - started)
+        self.assertEqual(len(rows), FOLDERS)
+        return {"size": size, "read": read, "write": write}
+
+    def test_integer_array_is_smaller(self):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            jsonb = self._fill(session, "jsonb", SIZE_FOLDERS)
+            int4 = self._fill(session, "int4", SIZE_FOLDERS)
+
+        self.assertLess(int4, jsonb)
+
+    @unittest.skipUnless(os.environ.get("RUN_BENCHMARKS"), "RUN_BENCHMARKS is not set")
+    def test_integer_array_is_faster_to_read(self):
+        engine = engines.engine_factory.get_engine()
+        with engine.session_manager() as session:
+            jsonb = self._measure(session, "jsonb")
+            int4 = self._measure(session, "int4")
+
+        report = "; ".join(
+            f"{name}: jsonb[] {jsonb[name]:.4g}, int4[] {int4[name]:.4g},"
+            f" ratio {int4[name] / jsonb[name]:.2f}"
+            for name in ("size", "read", "write")
+        )
+        LOG.info("Unread messages storage: %s", report)
+        self.assertLess(int4["read"], jsonb["read"], report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+from unittest import mock
+
+from restalchemy.common import exceptions as ra_exc
+
+from workspace.common.api.middlewares import user_context
+from workspace.user_api.api import controllers
+
+
+def _make_request(method, resolver):
+    req = mock.MagicMock()
+    req.method = method
+    req.context = user_context.UserContext(resolver=resolver)
+    return req
+
+
+class TestAuthPolicy(unittest.TestCase):
+    def setUp(self):
+        self.resolver = mock.MagicMock(
+            return_value=(42, user_context.AUTH_METHOD_ZULIP),
+        )
+
+    def test_public_reads_do_not_resolve_user(self):
+        req = _make_request("GET", self.resolver)
+
+        controller = controllers.ServiceController(request=req)
+
+        self.assertEqual(controller.get_auth_policy(), user_context.AUTH_POLICY_NONE)
+        self.resolver.assert_not_called()
+
+    def test_eager_policy_resolves_user_before_handling(self):
+        req = _make_request("POST", self.resolver)
+
+        controllers.ServiceController(request=req)
+
+        self.resolver.assert_called_once()
+        self.assertTrue(req.context.is_resolved)
+
+    def test_eager_policy_propagates_auth_errors(self):
+        self.resolver.side_effect = ra_exc.ValidationErrorException()
+        req = _make_request("DELETE", self.resolver)
+
+        self.assertRaises(
+            ra_exc.ValidationErrorException,
+            controllers.ServiceController,
+            request=req,
+        )
+
+    def test_eager_policy_without_context_is_rejected(self):
+        req = mock.MagicMock()
+        req.method = "PUT"
+        req.context = None
+
+        self.assertRaises(
+            ra_exc.ValidationErrorException,
+            controllers.ServiceController,
+            request=req,
+        )
+
+    def test_lazy_policy_resolves_user_on_first_use(self):
+        req = _make_request("POST", self.resolver)
+
+        controller = controllers.FolderController(request=req)
+
+        self.resolver.assert_not_called()
+        self.assertEqual(controller._get_user_id(), 42)
+        self.assertEqual(controller._get_user_id(), 42)
+        self.resolver.assert_called_once()
@@ -0,0 +1,259 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import contextlib
+import unittest
+from unittest import mock
+import uuid
+
+from restalchemy.common import exceptions as ra_exc
+
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.api import controllers
+from workspace.user_api.dm import bulk
+
+
+BULK_PATH = "workspace.user_api.dm.bulk"
+
+
+class TestParseOperations(unittest.TestCase):
+    def _assert_invalid(self, operations, index=0):
+        with self.assertRaises(user_api_exceptions.BulkOperationError) as ctx:
+            bulk._parse_operations(operations)
+        self.assertIn(f"Operation {index} is invalid", str(ctx.exception))
+
+    def test_values_are_converted(self):
+        item_uuid = uuid.uuid4()
+
+        (op,) = bulk._parse_operations(
+            [{"op": "update", "uuid": str(item_uuid), "order_index": 3}],
+        )
+
+        self.assertEqual(op.op, bulk.UPDATE)
+        self.assertEqual(op.values, {"uuid": item_uuid, "order_index": 3})
+
+    def test_invalid_operations(self):
+        self._assert_invalid(["create"])
+        self._assert_invalid([{"op": "upsert"}])
+        self._assert_invalid([{"op": "delete"}])
+        self._assert_invalid([{"op": "create", "chat_id": 1, "chat_type": "stream"}])
+        self._assert_invalid(
+            [{"op": "delete", "uuid": str(uuid.uuid4()), "chat_id": 1}],
+        )
+        self._assert_invalid([{"op": "delete", "uuid": "junk"}])
+
+    def test_item_is_used_once(self):
+        item_uuid = str(uuid.uuid4())
+
+        self._assert_invalid(
+            [
+                {"op": "update", "uuid": item_uuid, "order_index": 1},
+                {"op": "delete", "uuid": item_uuid},
+            ],
+            index=1,
+        )
+
+    def test_operations_are_limited(self):
+        bulk.CONF.set_override("max_operations", 1, bulk.DOMAIN)
+        self.addCleanup(bulk.CONF.clear_override, "max_operations", bulk.DOMAIN)
+        delete = {"op": "delete", "uuid": str(uuid.uuid4())}
+
+        self.assertRaises(
+            user_api_exceptions.TooManyBulkOperationsError,
+            bulk._parse_operations,
+            [delete, delete],
+        )
+
+
+class TestFolderItemBulkController(unittest.TestCase):
+    def setUp(self):
+        self.controller = controllers.FolderItemBulkController.__new__(
+            controllers.FolderItemBulkController,
+        )
+        self.write = mock.MagicMock()
+        self.controller._versioned_write = mock.MagicMock(
+            return_value=contextlib.nullcontext(self.write),
+        )
+
+    def test_results_follow_operations(self):
+        created = bulk._Operation(0, bulk.CREATE, {})
+        created.item = mock.MagicMock()
+        created.item.dump_to_simple_view.return_value = {"chat_id": 1}
+        deleted = bulk._Operation(1, bulk.DELETE, {})
+        deleted.item = mock.MagicMock(uuid=uuid.UUID(int=1))
+        operations = [{"op": "create"}, {"op": "delete"}]
+
+        with mock.patch(
+            f"{BULK_PATH}.apply_item_operations",
+            return_value=[created, deleted],
+        ) as apply:
+            body, status = self.controller.create(operations=operations)
+
+        apply.assert_called_once_with(self.write, operations)
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            body["results"],
+            [
+                {"op": "create", "status": 201, "item": {"chat_id": 1}},
+                {"op": "delete", "status": 204, "uuid": str(uuid.UUID(int=1))},
+            ],
+        )
+
+    def test_operations_must_be_a_list(self):
+        self.assertRaises(
+            ra_exc.ValidationErrorException,
+            self.controller.create,
+            operations={"op": "create"},
+        )
+
+
+class TestFolderReorderAction(unittest.TestCase):
+    def setUp(self):
+        self.controller = controllers.FolderController.__new__(
+            controllers.FolderController,
+        )
+        self.write = mock.MagicMock()
+        self.controller._versioned_write = mock.MagicMock(
+            return_value=contextlib.nullcontext(self.write),
+        )
+        self.folder = mock.MagicMock(uuid=uuid.uuid4())
+
+    def _reorder(self, **kwargs):
+        return controllers.FolderController.reorder._post(
+            self.controller,
+            self.folder,
+            **kwargs,
+        )
+
+    def test_returns_new_order(self):
+        item_uuid = uuid.uuid4()
+
+        with mock.patch(
+            f"{BULK_PATH}.reorder_items",
+            return_value=[(item_uuid, 0)],
+        ) as reorder:
+            result = self._reorder(items=[str(item_uuid)])
+
+        reorder.assert_called_once_with(
+            self.write,
+            self.folder.uuid,
+            [str(item_uuid)],
+        )
+        self.assertEqual(result, [{"uuid": str(item_uuid), "order_index": 0}])
+
+    def test_items_must_be_a_list(self):
+        self.assertRaises(ra_exc.ValidationErrorException, self._reorder)
+        self.assertRaises(
+            ra_exc.ValidationErrorException,
+            self._reorder,
+            items=str(uuid.uuid4()),
+        )
+
+
+class TestFolderSyncAction(unittest.TestCase):
+    def setUp(self):
+        self.controller = controllers.FolderController.__new__(
+            controllers.FolderController,
+        )
+        self.write = mock.MagicMock()
+        self.controller._versioned_write = mock.MagicMock(
+            return_value=contextlib.nullcontext(self.write),
+        )
+        self.folder = mock.MagicMock(uuid=uuid.uuid4())
+
+    def _sync(self, **kwargs):
+        return controllers.FolderController.sync._post(
+            self.controller,
+            self.folder,
+            **kwargs,
+        )
+
+    def test_returns_difference_without_internal_fields(self):
+        chats = [{"chat_id": 1, "chat_type": "stream"}]
+        deleted = uuid.uuid4()
+        item = {"uuid": "u", "folder": "f", "user_id": 1, "chat_id": 1}
+
+        with mock.patch(
+            f"{BULK_PATH}.sync_items",
+            return_value={"created": [item], "updated": [], "deleted": [deleted]},
+        ) as sync_items:
+            result = self._sync(chats=chats)
+
+        sync_items.assert_called_once_with(self.write, self.folder.uuid, chats)
+        self.assertEqual(
+            result,
+            {
+                "created": [{"uuid": "u", "chat_id": 1}],
+                "updated": [],
+                "deleted": [str(deleted)],
+            },
+        )
+
+    def test_chats_must_be_a_list(self):
+        self.assertRaises(ra_exc.ValidationErrorException, self._sync)
+        self.assertRaises(
+            ra_exc.ValidationErrorException,
+            self._sync,
+            chats=[],
+            items=[],
+        )
+
+
+class TestFolderItemPinControllers(unittest.TestCase):
+    def _create(self, controller_class, **kwargs):
+        controller = controller_class.__new__(controller_class)
+        write = mock.MagicMock()
+        controller._versioned_write = mock.MagicMock(
+            return_value=contextlib.nullcontext(write),
+        )
+        with mock.patch(
+            f"{BULK_PATH}.set_pinned",
+            return_value=[{"uuid": "u", "folder": "f", "user_id": 1}],
+        ) as set_pinned:
+            result = controller.create(**kwargs)
+        return result, set_pinned, write
+
+    def test_pin_hides_internal_fields(self):
+        (body, status), set_pinned, write = self._create(
+            controllers.FolderItemPinController,
+            items=["u"],
+        )
+
+        set_pinned.assert_called_once_with(
+            write,
+            True,
+            items=["u"],
+            folder_uuid=None,
+            chat_ids=None,
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"items": [{"uuid": "u"}]})
+
+    def test_unpin(self):
+        _, set_pinned, write = self._create(
+            controllers.FolderItemUnpinController,
+            folder_uuid="f",
+            chat_ids=[1],
+        )
+
+        set_pinned.assert_called_once_with(
+            write,
+            False,
+            items=None,
+            folder_uuid="f",
+            chat_ids=[1],
+        )
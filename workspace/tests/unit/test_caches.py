@@ -0,0 +1,156 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+from unittest import mock
+
+from workspace.common import caches
+
+
+MONOTONIC_PATH = "workspace.common.caches.time.monotonic"
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_get_missing_returns_default(self):
+        cache = caches.TTLCache(ttl=10, max_size=2)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("a", 5), 5)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_set_and_get(self):
+        cache = caches.TTLCache(ttl=10, max_size=2)
+
+        cache.set("a", 1)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    @mock.patch(MONOTONIC_PATH)
+    def test_entry_expires(self, monotonic):
+        monotonic.return_value = 100.0
+        cache = caches.TTLCache(ttl=10, max_size=2)
+        cache.set("a", 1)
+
+        monotonic.return_value = 110.0
+
+        self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["size"], 0)
+
+    @mock.patch(MONOTONIC_PATH)
+    def test_custom_ttl(self, monotonic):
+        monotonic.return_value = 100.0
+        cache = caches.TTLCache(ttl=10, max_size=2)
+        cache.set("a", 1, ttl=60)
+
+        monotonic.return_value = 150.0
+
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_zero_ttl_is_not_stored(self):
+        cache = caches.TTLCache(ttl=0, max_size=2)
+
+        cache.set("a", 1)
+
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = caches.TTLCache(ttl=10, max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # Touch "a" so "b" becomes the least recently used entry
+        cache.get("a")
+
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_invalidate(self):
+        cache = caches.TTLCache(ttl=10, max_size=2)
+        cache.set("a", 1)
+
+        self.assertTrue(cache.invalidate("a"))
+        self.assertFalse(cache.invalidate("a"))
+        self.assertIsNone(cache.get("a"))
+
+    def test_clear(self):
+        cache = caches.TTLCache(ttl=10, max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_max_size(self):
+        self.assertRaises(ValueError, caches.TTLCache, ttl=10, max_size=0)
+
+
+class TestSharedUserCache(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(caches.SharedUserCache, "_execute")
+        self.execute = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = caches.SharedUserCache(ttl=10, max_size=5, cleanup_interval=2)
+
+    def test_get_hit(self):
+        self.execute.return_value = {"user_id": 42}
+
+        self.assertEqual(self.cache.get("key"), 42)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_get_miss(self):
+        self.execute.return_value = None
+
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_get_fails_open(self):
+        self.execute.side_effect = RuntimeError()
+
+        self.assertEqual(self.cache.get("key", 0), 0)
+        self.assertEqual(self.cache.stats()["errors"], 1)
+
+    def test_set_fails_open(self):
+        self.execute.side_effect = RuntimeError()
+
+        self.cache.set("key", 42)
+
+        self.assertEqual(self.cache.stats()["errors"], 1)
+
+    def test_set_uses_ttl(self):
+        self.cache.set("key", 42)
+
+        self.assertEqual(self.execute.call_args[0][1], ("key", 42, 10))
+
+    def test_cleanup_every_interval(self):
+        self.execute.return_value = 1
+
+        self.cache.set("a", 1)
+        self.assertEqual(self.execute.call_count, 1)
+        self.cache.set("b", 2)
+
+        # insert, insert, delete expired, delete over max_size
+        self.assertEqual(self.execute.call_count, 4)
+        stats = self.cache.stats()
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(self.execute.call_args[0][1], (5,))
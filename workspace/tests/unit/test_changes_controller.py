@@ -0,0 +1,116 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import time
+import unittest
+from unittest import mock
+
+from restalchemy.dm import filters as dm_filters
+
+from workspace.common.api import pagination
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.api import controllers
+from workspace.user_api.dm import data_versions
+
+
+QUERIES_PATH = "workspace.user_api.dm.queries"
+DATA_VERSIONS_PATH = "workspace.user_api.dm.data_versions"
+
+
+def _cursor(version, issued_at=None):
+    return pagination.encode_marker(
+        {
+            "version": version,
+            "issued_at": int(time.time()) if issued_at is None else issued_at,
+        },
+    )
+
+
+class TestChangesController(unittest.TestCase):
+    def setUp(self):
+        self.controller = controllers.ChangesController.__new__(
+            controllers.ChangesController,
+        )
+        self.controller._get_user_id = mock.MagicMock(return_value=42)
+        patcher = mock.patch(f"{DATA_VERSIONS_PATH}.get_version", return_value=7)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(f"{QUERIES_PATH}.get_changes", return_value={})
+        self.get_changes = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _filter(self, cursor=None):
+        filters = {}
+        if cursor is not None:
+            filters["cursor"] = dm_filters.EQ(cursor)
+        return self.controller.filter(filters=filters)
+
+    def _next_version(self, result):
+        return pagination.decode_marker(
+            result["cursor"],
+            ("version", "issued_at"),
+        )["version"]
+
+    def test_without_cursor_is_full_sync(self):
+        result = self._filter()
+
+        self.get_changes.assert_called_once_with(
+            42,
+            since_version=None,
+            until_version=7,
+        )
+        self.assertEqual(self._next_version(result), 7)
+
+    def test_changes_since_cursor(self):
+        result = self._filter(_cursor(5))
+
+        self.get_changes.assert_called_once_with(
+            42,
+            since_version=5,
+            until_version=7,
+        )
+        self.assertEqual(self._next_version(result), 7)
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ("junk", pagination.encode_marker({"version": 1})):
+            self.assertRaises(
+                user_api_exceptions.InvalidSyncCursorError,
+                self._filter,
+                cursor,
+            )
+        self.assertRaises(
+            user_api_exceptions.InvalidSyncCursorError,
+            self.controller.filter,
+            filters={"cursor": dm_filters.In(["a", "b"])},
+        )
+
+    def test_cursor_older_than_tombstones_expires(self):
+        ttl = data_versions.CONF[data_versions.DOMAIN].tombstone_ttl
+
+        self.assertRaises(
+            user_api_exceptions.SyncCursorExpiredError,
+            self._filter,
+            _cursor(5, issued_at=int(time.time()) - ttl - 10),
+        )
+        self.get_changes.assert_not_called()
+
+    def test_cursor_from_the_future_expires(self):
+        self.assertRaises(
+            user_api_exceptions.SyncCursorExpiredError,
+            self._filter,
+            _cursor(8),
+        )
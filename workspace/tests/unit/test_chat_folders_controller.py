@@ -0,0 +1,84 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+from unittest import mock
+
+from restalchemy.dm import filters as dm_filters
+
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.api import controllers
+
+
+QUERIES_PATH = "workspace.user_api.dm.queries"
+
+
+class TestChatFoldersController(unittest.TestCase):
+    def setUp(self):
+        self.controller = controllers.ChatFoldersController.__new__(
+            controllers.ChatFoldersController,
+        )
+        self.controller._get_user_id = mock.MagicMock(return_value=42)
+        patcher = mock.patch(f"{QUERIES_PATH}.get_chat_folders", return_value=[])
+        self.get_chat_folders = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_single_chat(self):
+        self.controller.filter(filters={"chat_id": dm_filters.EQ("5")})
+
+        self.get_chat_folders.assert_called_once_with(42, [5], chat_type=None)
+
+    def test_repeated_chats_keep_order_once(self):
+        self.controller.filter(
+            filters={
+                "chat_id": dm_filters.In(["7", "3", "7", "1"]),
+                "chat_type": dm_filters.EQ("stream"),
+            },
+        )
+
+        self.get_chat_folders.assert_called_once_with(
+            42,
+            [7, 3, 1],
+            chat_type="stream",
+        )
+
+    def test_returns_chats(self):
+        chats = [{"chat_id": 5, "folders": []}]
+        self.get_chat_folders.return_value = chats
+
+        result = self.controller.filter(filters={"chat_id": dm_filters.EQ("5")})
+
+        self.assertEqual(result, chats)
+
+    def test_invalid_queries_are_rejected(self):
+        for filters in (
+            {},
+            {"chat_id": dm_filters.EQ("x")},
+            {"chat_id": dm_filters.EQ("-1")},
+            {"chat_id": dm_filters.GT("1")},
+            {"chat_id": dm_filters.EQ("1"), "chat_type": dm_filters.EQ("x")},
+            {
+                "chat_id": dm_filters.EQ("1"),
+                "chat_type": dm_filters.In(["stream", "private"]),
+            },
+            {"chat_id": dm_filters.EQ("1"), "user_id": dm_filters.EQ("2")},
+        ):
+            self.assertRaises(
+                user_api_exceptions.InvalidChatFoldersQueryError,
+                self.controller.filter,
+                filters=filters,
+            )
+        self.get_chat_folders.assert_not_called()
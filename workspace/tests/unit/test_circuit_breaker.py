@@ -0,0 +1,122 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+from unittest import mock
+
+from workspace.common import circuit_breaker
+
+
+MONOTONIC_PATH = "workspace.common.circuit_breaker.time.monotonic"
+
+
+class Failure(Exception):
+    pass
+
+
+class Rejection(Exception):
+    pass
+
+
+def _fail():
+    raise Failure()
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.breaker = circuit_breaker.CircuitBreaker(
+            failure_threshold=2,
+            recovery_timeout=10,
+            is_failure=lambda exc: isinstance(exc, Failure),
+        )
+
+    def _trip(self):
+        for _ in range(2):
+            self.assertRaises(Failure, self.breaker.call, _fail)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_closed_passes_results(self, monotonic):
+        self.assertEqual(self.breaker.call(lambda: 42), 42)
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_opens_after_consecutive_failures(self, monotonic):
+        self._trip()
+        fn = mock.MagicMock()
+
+        with self.assertRaises(circuit_breaker.CircuitOpenError) as ctx:
+            self.breaker.call(fn)
+
+        fn.assert_not_called()
+        self.assertEqual(ctx.exception.retry_after, 10)
+        self.assertEqual(self.breaker.stats()["rejected"], 1)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_success_resets_failures(self, monotonic):
+        self.assertRaises(Failure, self.breaker.call, _fail)
+        self.breaker.call(lambda: None)
+        self.assertRaises(Failure, self.breaker.call, _fail)
+
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_non_failures_do_not_open(self, monotonic):
+        def reject():
+            raise Rejection()
+
+        for _ in range(5):
+            self.assertRaises(Rejection, self.breaker.call, reject)
+
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_half_open_success_closes(self, monotonic):
+        self._trip()
+        monotonic.return_value = 10.0
+
+        self.assertEqual(self.breaker.state, circuit_breaker.HALF_OPEN)
+        self.assertEqual(self.breaker.call(lambda: 42), 42)
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_half_open_failure_reopens(self, monotonic):
+        self._trip()
+        monotonic.return_value = 10.0
+
+        self.assertRaises(Failure, self.breaker.call, _fail)
+
+        self.assertEqual(self.breaker.state, circuit_breaker.OPEN)
+        self.assertEqual(self.breaker.stats()["opened"], 2)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_half_open_limits_trial_calls(self, monotonic):
+        self._trip()
+        monotonic.return_value = 10.0
+        results = []
+
+        def trial():
+            # A concurrent call while the trial is still in flight
+            self.assertRaises(
+                circuit_breaker.CircuitOpenError,
+                self.breaker.call,
+                lambda: None,
+            )
+            results.append(True)
+
+        self.breaker.call(trial)
+
+        self.assertEqual(results, [True])
+        self.assertEqual(self.breaker.state, circuit_breaker.CLOSED)
@@ -15,40 +15,23 @@
 #    under the License.
 
 import unittest
-import uuid as sys_uuid
 from unittest import mock
+import uuid
 
-from workspace.user_api.api import controllers
-from workspace.user_api.dm import models
-
-
-def _make_folder(user_id, folder_uuid=None, title="test"):
-    folder = mock.MagicMock(spec=models.Folder)
-    folder.uuid = folder_uuid or sys_uuid.uuid4()
-    folder.user_id = user_id
-    folder.title = title
-    folder.dump_to_simple_view.return_value = {
-        "uuid": str(folder.uuid),
-        "user_id": user_id,
-        "title": title,
-    }
-    return folder
-
+from restalchemy.common import exceptions as ra_exc
+from restalchemy.dm import filters as dm_filters
+from restalchemy.storage import exceptions as storage_exc
+import webob
 
-def _make_folder_item(folder, user_id, item_uuid=None, chat_id=1):
-    item = mock.MagicMock(spec=models.FolderItem)
-    item.uuid = item_uuid or sys_uuid.uuid4()
-    item.folder = folder
-    item.user_id = user_id
-    item.chat_id = chat_id
-    item.dump_to_simple_view.return_value = {
-        "uuid": str(item.uuid),
-        "chat_id": chat_id,
-    }
-    return item
+from workspace.common import exceptions as common_exc
+from workspace.common.api import pagination
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.api import controllers
+from workspace.user_api.dm import data_versions
 
 
-MODELS_PATH = "workspace.user_api.dm.models"
+QUERIES_PATH = "workspace.user_api.dm.queries"
+DATA_VERSIONS_PATH = "workspace.user_api.dm.data_versions"
 
 
 class TestFolderControllerFilter(unittest.TestCase):
@@ -60,98 +43,390 @@ class TestFolderControllerFilter(unittest.TestCase):
         self.controller._get_user_id = mock.MagicMock(
             return_value=self.user_id,
         )
+        self.controller._req = webob.Request.blank("/v1/folders/")
+        patcher = mock.patch(f"{DATA_VERSIONS_PATH}.get_version", return_value=7)
+        self.get_version = patcher.start()
+        self.addCleanup(patcher.stop)
 
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_returns_aggregated_view(self, get_folders_with_items):
+        view = [{"uuid": "u", "title": "work", "items": [{"chat_id": 10}]}]
+        get_folders_with_items.return_value = view
 
-    @mock.patch(f"{MODELS_PATH}.FolderItem.objects")
-    @mock.patch(f"{MODELS_PATH}.Folder.objects")
-    def test_returns_folders_with_items(self, mock_folder_objects, mock_item_objects):
-        folder = _make_folder(self.user_id, title="work")
-        item1 = _make_folder_item(folder, self.user_id, chat_id=10)
-        item2 = _make_folder_item(folder, self.user_id, chat_id=20)
+        result, status, headers = self.controller.filter(filters={})
 
-        mock_folder_objects.get_all.return_value = [folder]
-        mock_item_objects.get_all.return_value = [item1, item2]
+        self.assertEqual(result, view)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["ETag"], f'W/"folders-{self.user_id}-7"')
+        get_folders_with_items.assert_called_once()
 
-        result = self.controller.filter(filters={})
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_filters_contain_user_id(self, get_folders_with_items):
+        self.controller.filter(filters={"title": dm_filters.EQ("x")})
 
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]["title"], "work")
-        self.assertEqual(len(result[0]["items"]), 2)
-        chat_ids = {i["chat_id"] for i in result[0]["items"]}
-        self.assertEqual(chat_ids, {10, 20})
+        call_filters = get_folders_with_items.call_args[1]["filters"]
+        self.assertEqual(call_filters["user_id"].value, self.user_id)
+        self.assertIn("title", call_filters)
 
-    @mock.patch(f"{MODELS_PATH}.FolderItem.objects")
-    @mock.patch(f"{MODELS_PATH}.Folder.objects")
-    def test_folder_without_items_has_empty_list(
-        self, mock_folder_objects, mock_item_objects
-    ):
-        folder = _make_folder(self.user_id)
-        mock_folder_objects.get_all.return_value = [folder]
-        mock_item_objects.get_all.return_value = []
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_filters_are_not_modified(self, get_folders_with_items):
+        filters = {"title": dm_filters.EQ("x")}
+
+        self.controller.filter(filters=filters)
+
+        self.assertEqual(list(filters), ["title"])
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_user_filter_can_not_be_overridden(self, get_folders_with_items):
+        self.controller.filter(filters={"user_id": dm_filters.EQ(1)})
+
+        call_filters = get_folders_with_items.call_args[1]["filters"]
+        self.assertEqual(call_filters["user_id"].value, self.user_id)
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_pagination_is_passed_to_query(self, get_folders_with_items):
+        marker = {"created_at": "c", "uuid": "u"}
+        self.controller._pagination_limit = 10
+        self.controller._pagination_marker = marker
+
+        self.controller.filter(filters={})
+
+        kwargs = get_folders_with_items.call_args[1]
+        self.assertEqual(kwargs["limit"], 10)
+        self.assertEqual(kwargs["marker"], marker)
+        self.assertIsNone(kwargs["items_limit"])
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_items_are_trimmed_to_items_limit(self, get_folders_with_items):
+        items = [
+            {"order_index": n * 1024, "created_at": "c", "uuid": str(n)}
+            for n in range(3)
+        ]
+        get_folders_with_items.return_value = [
+            {"uuid": "full", "items": items},
+            {"uuid": "short", "items": items[:2]},
+        ]
+        self.controller._items_limit = 2
+
+        (full, short), _, _ = self.controller.filter(filters={})
+
+        self.assertEqual(get_folders_with_items.call_args[1]["items_limit"], 2)
+        self.assertEqual(full["items"], items[:2])
+        self.assertEqual(
+            pagination.decode_marker(
+                full["items_next_marker"],
+                controllers.FolderItemController.__keyset__,
+            ),
+            {"order_index": 1024, "created_at": "c", "uuid": "1"},
+        )
+        self.assertEqual(short["items"], items[:2])
+        self.assertIsNone(short["items_next_marker"])
 
-        result = self.controller.filter(filters={})
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_descending_keyset_sort_is_passed_to_query(self, get_folders_with_items):
+        get_folders_with_items.return_value = []
+        self.controller._pagination_limit = 10
 
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]["items"], [])
+        self.controller.filter(filters={}, order_by={"created_at": "desc"})
 
-    @mock.patch(f"{MODELS_PATH}.FolderItem.objects")
-    @mock.patch(f"{MODELS_PATH}.Folder.objects")
-    def test_multiple_folders_items_grouped_correctly(
-        self, mock_folder_objects, mock_item_objects
-    ):
-        folder_a = _make_folder(self.user_id, title="a")
-        folder_b = _make_folder(self.user_id, title="b")
-        item_a = _make_folder_item(folder_a, self.user_id, chat_id=1)
-        item_b = _make_folder_item(folder_b, self.user_id, chat_id=2)
+        kwargs = get_folders_with_items.call_args[1]
+        self.assertTrue(kwargs["descending"])
+        self.assertIsNone(kwargs["order_by"])
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_pages_support_only_keyset_sort(self, get_folders_with_items):
+        self.controller._pagination_limit = 10
+
+        self.assertRaises(
+            common_exc.UnsupportedSortError,
+            self.controller.filter,
+            filters={},
+            order_by={"title": "asc"},
+        )
+        get_folders_with_items.assert_not_called()
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_unpaginated_sort_is_passed_to_query(self, get_folders_with_items):
+        get_folders_with_items.return_value = []
+
+        self.controller.filter(filters={}, order_by={"title": "desc"})
+
+        kwargs = get_folders_with_items.call_args[1]
+        self.assertEqual(kwargs["order_by"], {"title": "desc"})
+        self.assertFalse(kwargs["descending"])
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_unknown_sort_key_is_rejected(self, get_folders_with_items):
+        self.assertRaises(
+            ra_exc.ValidationErrorException,
+            self.controller.filter,
+            filters={},
+            order_by={"bogus": "asc"},
+        )
+        get_folders_with_items.assert_not_called()
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_matching_etag_skips_folder_queries(self, get_folders_with_items):
+        self.controller._req.headers["If-None-Match"] = f'W/"folders-{self.user_id}-7"'
+
+        body, status, headers = self.controller.filter(filters={})
+
+        self.assertIsNone(body)
+        self.assertEqual(status, 304)
+        self.assertEqual(headers["ETag"], f'W/"folders-{self.user_id}-7"')
+        self.get_version.assert_called_once_with(self.user_id)
+        get_folders_with_items.assert_not_called()
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_stale_etag_returns_folders(self, get_folders_with_items):
+        get_folders_with_items.return_value = []
+        self.controller._req.headers["If-None-Match"] = f'W/"folders-{self.user_id}-6"'
+
+        _, status, _ = self.controller.filter(filters={})
+
+        self.assertEqual(status, 200)
+        get_folders_with_items.assert_called_once()
+
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_etag_of_other_user_does_not_match(self, get_folders_with_items):
+        get_folders_with_items.return_value = []
+        self.controller._req.headers["If-None-Match"] = 'W/"folders-1-7"'
+
+        _, status, _ = self.controller.filter(filters={})
+
+        self.assertEqual(status, 200)
 
-        mock_folder_objects.get_all.return_value = [folder_a, folder_b]
-        mock_item_objects.get_all.return_value = [item_a, item_b]
+    @mock.patch(f"{QUERIES_PATH}.get_folders_with_items")
+    def test_etag_of_summaries_does_not_match(self, get_folders_with_items):
+        get_folders_with_items.return_value = []
+        self.controller._req.headers["If-None-Match"] = (
+            f'W/"summaries-{self.user_id}-7"'
+        )
+
+        _, status, _ = self.controller.filter(filters={})
+
+        self.assertEqual(status, 200)
+
+
+class TestFolderSummaryController(unittest.TestCase):
+    def setUp(self):
+        self.user_id = 42
+        self.controller = controllers.FolderSummaryController.__new__(
+            controllers.FolderSummaryController,
+        )
+        self.controller._get_user_id = mock.MagicMock(
+            return_value=self.user_id,
+        )
+        self.controller._req = webob.Request.blank("/v1/folder_summaries/")
+        patcher = mock.patch(f"{DATA_VERSIONS_PATH}.get_version", return_value=7)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock.patch(f"{QUERIES_PATH}.get_folder_summaries")
+    def test_returns_summaries(self, get_folder_summaries):
+        view = [{"uuid": "u", "items_count": 2, "unread_count": 1}]
+        get_folder_summaries.return_value = view
+
+        result, status, headers = self.controller.filter(filters={})
+
+        self.assertEqual(result, view)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["ETag"], f'W/"summaries-{self.user_id}-7"')
+        get_folder_summaries.assert_called_once_with(self.user_id)
+
+    @mock.patch(f"{QUERIES_PATH}.get_folder_summaries")
+    def test_matching_etag_skips_query(self, get_folder_summaries):
+        self.controller._req.headers["If-None-Match"] = (
+            f'W/"summaries-{self.user_id}-7"'
+        )
+
+        body, status, _ = self.controller.filter(filters={})
 
-        result = self.controller.filter(filters={})
+        self.assertIsNone(body)
+        self.assertEqual(status, 304)
+        get_folder_summaries.assert_not_called()
 
-        self.assertEqual(len(result), 2)
-        by_title = {r["title"]: r for r in result}
-        self.assertEqual(len(by_title["a"]["items"]), 1)
-        self.assertEqual(by_title["a"]["items"][0]["chat_id"], 1)
-        self.assertEqual(len(by_title["b"]["items"]), 1)
-        self.assertEqual(by_title["b"]["items"][0]["chat_id"], 2)
+    @mock.patch(f"{QUERIES_PATH}.get_folder_summaries")
+    def test_filters_are_rejected(self, get_folder_summaries):
+        self.assertRaises(
+            ra_exc.ValidationErrorException,
+            self.controller.filter,
+            filters={"title": dm_filters.EQ("work")},
+        )
+        get_folder_summaries.assert_not_called()
 
-    @mock.patch(f"{MODELS_PATH}.FolderItem.objects")
-    @mock.patch(f"{MODELS_PATH}.Folder.objects")
-    def test_empty_folders_and_items(self, mock_folder_objects, mock_item_objects):
-        mock_folder_objects.get_all.return_value = []
-        mock_item_objects.get_all.return_value = []
 
-        result = self.controller.filter(filters={})
+class TestVersionedWrites(unittest.TestCase):
+    def setUp(self):
+        self.controller = controllers.FolderItemController.__new__(
+            controllers.FolderItemController,
+        )
+        self.controller._get_user_id = mock.MagicMock(return_value=42)
+        self.context = mock.MagicMock()
+        self.controller.get_context = mock.MagicMock(return_value=self.context)
+        self.session = self.context.session_manager.return_value.__enter__()
+
+    @mock.patch(f"{DATA_VERSIONS_PATH}.UserDataWrite")
+    def test_pin_is_recorded_in_same_session(self, user_data_write):
+        resource = mock.MagicMock()
+
+        self.controller.pin._post(self.controller, resource)
+
+        resource.save.assert_called_once_with()
+        user_data_write.assert_called_once_with(42, session=self.session)
+        user_data_write.return_value.changed.assert_called_once_with(
+            data_versions.FOLDER_ITEM,
+            resource.uuid,
+        )
 
-        self.assertEqual(result, [])
+    @mock.patch(f"{DATA_VERSIONS_PATH}.UserDataWrite")
+    def test_failed_write_is_not_recorded(self, user_data_write):
+        resource = mock.MagicMock()
+        resource.save.side_effect = ValueError()
+
+        self.assertRaises(
+            ValueError,
+            self.controller.unpin._post,
+            self.controller,
+            resource,
+        )
+        user_data_write.return_value.changed.assert_not_called()
+
+    @mock.patch(f"{DATA_VERSIONS_PATH}.UserDataWrite")
+    @mock.patch("workspace.user_api.dm.ordering.get_move_key", return_value=512)
+    def test_move_sets_new_key(self, get_move_key, user_data_write):
+        resource = mock.MagicMock()
+        anchor_uuid = uuid.uuid4()
+
+        self.controller.move._post(
+            self.controller,
+            resource,
+            after=str(anchor_uuid),
+        )
 
-    @mock.patch(f"{MODELS_PATH}.FolderItem.objects")
-    @mock.patch(f"{MODELS_PATH}.Folder.objects")
-    def test_items_for_unknown_folder_not_included(
-        self, mock_folder_objects, mock_item_objects
+        get_move_key.assert_called_once_with(
+            user_data_write.return_value,
+            resource,
+            anchor_uuid,
+            after=True,
+        )
+        self.assertEqual(resource.order_index, 512)
+        resource.save.assert_called_once_with()
+
+    @mock.patch(f"{DATA_VERSIONS_PATH}.UserDataWrite")
+    @mock.patch("workspace.user_api.dm.ordering.get_append_key", return_value=2048)
+    @mock.patch("restalchemy.api.controllers.BaseNestedResourceController.create")
+    def test_create_ignores_client_order_index(
+        self,
+        create,
+        get_append_key,
+        user_data_write,
     ):
-        folder = _make_folder(self.user_id, title="known")
-        orphan_folder = _make_folder(self.user_id, title="orphan")
-        orphan_item = _make_folder_item(orphan_folder, self.user_id, chat_id=99)
+        folder = mock.MagicMock()
 
-        mock_folder_objects.get_all.return_value = [folder]
-        mock_item_objects.get_all.return_value = [orphan_item]
+        self.controller.create(parent_resource=folder, chat_id=1, order_index=5)
 
-        result = self.controller.filter(filters={})
+        get_append_key.assert_called_once_with(
+            user_data_write.return_value,
+            folder.uuid,
+        )
+        self.assertEqual(create.call_args[1]["order_index"], 2048)
+
+    @mock.patch(f"{DATA_VERSIONS_PATH}.UserDataWrite")
+    def test_update_ignores_client_order_index(self, user_data_write):
+        resource = mock.MagicMock(order_index=1024)
+        self.controller.get = mock.MagicMock(return_value=resource)
+
+        self.controller.update(
+            parent_resource=mock.MagicMock(),
+            uuid=resource.uuid,
+            order_index=5,
+            chat_type="group",
+        )
 
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0]["items"], [])
+        resource.update_dm.assert_called_once_with(values={"chat_type": "group"})
+        resource.update.assert_called_once_with()
+
+    def test_move_needs_one_valid_anchor(self):
+        anchor = str(uuid.uuid4())
+        for kwargs in ({}, {"before": anchor, "after": anchor}, {"after": "x"}):
+            self.assertRaises(
+                user_api_exceptions.InvalidMoveError,
+                self.controller.move._post,
+                self.controller,
+                mock.MagicMock(),
+                **kwargs,
+            )
+
+
+class TestAllFolder(unittest.TestCase):
+    def _make(self, controller_class):
+        controller = controller_class.__new__(controller_class)
+        controller._get_user_id = mock.MagicMock(return_value=42)
+        controller.get_context = mock.MagicMock()
+        return controller
+
+    def test_index_conflict_becomes_validation_error(self):
+        controller = self._make(controllers.FolderController)
+        controller._versioned_write = mock.MagicMock()
+        conflict = storage_exc.ConflictRecords(
+            model="Folder",
+            msg='violates unique constraint "folders_one_all_per_user_idx"',
+        )
 
+        with mock.patch.object(
+            controllers.ra_controllers.BaseResourceControllerPaginated,
+            "create",
+            side_effect=conflict,
+        ):
+            self.assertRaises(
+                user_api_exceptions.OnlyOneAllFolderPerUserError,
+                controller.create,
+                title="all",
+                system_type="all",
+            )
+
+    def test_other_conflicts_are_kept(self):
+        controller = self._make(controllers.FolderController)
+        controller._versioned_write = mock.MagicMock()
+        conflict = storage_exc.ConflictRecords(model="Folder", msg="pkey")
+
+        with mock.patch.object(
+            controllers.ra_controllers.BaseResourceControllerPaginated,
+            "create",
+            side_effect=conflict,
+        ):
+            self.assertRaises(
+                storage_exc.ConflictRecords,
+                controller.create,
+                title="folder",
+            )
+
+    @mock.patch(f"{DATA_VERSIONS_PATH}.UserDataWrite")
+    @mock.patch("workspace.user_api.dm.system_folders.ensure_all_folder")
+    def test_ensure_records_only_created_folder(self, ensure, user_data_write):
+        controller = self._make(controllers.AllFolderController)
+        ensure.return_value = ({"uuid": "u", "user_id": 42}, False)
+
+        self.assertEqual(controller.create(), ({"uuid": "u"}, 200))
+        user_data_write.assert_not_called()
+
+        ensure.return_value = ({"uuid": "u", "user_id": 42}, True)
+        self.assertEqual(controller.create(), ({"uuid": "u"}, 201))
+        user_data_write.return_value.changed.assert_called_once_with(
+            data_versions.FOLDER,
+            "u",
+        )
 
-    @mock.patch(f"{MODELS_PATH}.FolderItem.objects")
-    @mock.patch(f"{MODELS_PATH}.Folder.objects")
-    def test_filters_contain_user_id(self, mock_folder_objects, mock_item_objects):
-        mock_folder_objects.get_all.return_value = []
-        mock_item_objects.get_all.return_value = []
+    @mock.patch("workspace.user_api.dm.unread.add_unread")
+    def test_add_unread_hides_user_id(self, add_unread):
+        controller = self._make(controllers.FolderController)
+        controller._versioned_write = mock.MagicMock()
+        write = controller._versioned_write.return_value.__enter__.return_value
+        add_unread.return_value = {"uuid": "u", "user_id": 42}
+        resource = mock.MagicMock()
 
-        self.controller.filter(filters={"title": "x"})
+        result = controller.add_unread._post(controller, resource, messages=[1])
 
-        call_filters = mock_folder_objects.get_all.call_args[1]["filters"]
-        self.assertIn("user_id", call_filters)
-        self.assertIn("title", call_filters)
+        add_unread.assert_called_once_with(write, resource.uuid, [1])
+        self.assertEqual(result, {"uuid": "u"})
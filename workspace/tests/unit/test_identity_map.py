@@ -0,0 +1,106 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+from unittest import mock
+import uuid
+
+from restalchemy.storage import exceptions as storage_exc
+
+from workspace.common import identity_map
+from workspace.user_api.api import controllers
+from workspace.user_api.dm import models
+
+
+class TestIdentityMap(unittest.TestCase):
+    def setUp(self):
+        self.map = identity_map.IdentityMap()
+
+    def test_object_is_loaded_once(self):
+        loader = mock.MagicMock(return_value="folder")
+        saved = identity_map.get_stats()["hits"]
+
+        self.assertEqual(self.map.get(models.Folder, 1, loader), "folder")
+        self.assertEqual(self.map.get(models.Folder, 1, loader), "folder")
+
+        loader.assert_called_once_with()
+        self.assertEqual(
+            self.map.stats(),
+            {"objects": 1, "hits": 1, "misses": 1},
+        )
+        self.assertEqual(identity_map.get_stats()["hits"], saved + 1)
+
+    def test_keys_are_per_model(self):
+        self.map.get(models.Folder, 1, lambda: "folder")
+
+        self.assertEqual(self.map.get(models.FolderItem, 1, lambda: "item"), "item")
+
+    def test_errors_are_not_remembered(self):
+        loader = mock.MagicMock(side_effect=[ValueError(), "folder"])
+
+        self.assertRaises(ValueError, self.map.get, models.Folder, 1, loader)
+        self.assertEqual(self.map.get(models.Folder, 1, loader), "folder")
+
+    def test_discard(self):
+        self.map.get(models.Folder, 1, lambda: "old")
+        self.map.discard(models.Folder, 1)
+
+        self.assertEqual(self.map.get(models.Folder, 1, lambda: "new"), "new")
+
+
+class TestControllersUseIdentityMap(unittest.TestCase):
+    def setUp(self):
+        self.context = mock.MagicMock(user_id=42)
+        self.context.identity_map = identity_map.IdentityMap()
+        self.folder = models.Folder(title="folder", user_id=42)
+        patcher = mock.patch.object(
+            models.Folder,
+            "objects",
+            **{"get_one.return_value": self.folder},
+        )
+        self.objects = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _make(self, controller_class):
+        controller = controller_class.__new__(controller_class)
+        controller.get_context = mock.MagicMock(return_value=self.context)
+        return controller
+
+    def test_folder_is_loaded_once_per_request(self):
+        folders = self._make(controllers.FolderController)
+        items = self._make(controllers.FolderItemController)
+
+        parent = folders.get(uuid=self.folder.uuid)
+        resolved = items._resolve_folder({"folder_uuid": self.folder.uuid})
+
+        self.assertIs(resolved, parent)
+        self.objects.get_one.assert_called_once()
+        self.assertEqual(self.context.identity_map.stats()["hits"], 1)
+
+    def test_missing_folder_is_not_found(self):
+        self.objects.get_one.side_effect = storage_exc.RecordNotFound(
+            model=models.Folder,
+            filters={},
+        )
+        folders = self._make(controllers.FolderController)
+
+        self.assertRaises(
+            storage_exc.RecordNotFound,
+            folders.get,
+            uuid=uuid.uuid4(),
+        )
+        self.assertEqual(len(self.context.identity_map), 0)
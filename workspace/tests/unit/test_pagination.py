@@ -0,0 +1,284 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import unittest
+
+from restalchemy.api import controllers as ra_controllers
+from restalchemy.dm import filters as dm_filters
+import webob
+
+from workspace.common import exceptions as common_exc
+from workspace.common.api import pagination
+from workspace.user_api.dm import models
+
+
+KEYSET = ("created_at", "uuid")
+
+
+class TestMarkers(unittest.TestCase):
+    def test_round_trip(self):
+        values = {"created_at": "2026-10-18 10:00:00.000001", "uuid": "u"}
+
+        token = pagination.encode_marker(values)
+
+        self.assertEqual(pagination.decode_marker(token, KEYSET), values)
+        self.assertNotIn("=", token)
+
+    def test_garbage_is_rejected(self):
+        for token in ("***", "bm90IGpzb24", pagination.encode_marker([1])):
+            self.assertRaises(
+                common_exc.InvalidPageMarkerError,
+                pagination.decode_marker,
+                token,
+                KEYSET,
+            )
+
+    def test_other_keys_are_rejected(self):
+        token = pagination.encode_marker({"uuid": "u"})
+
+        self.assertRaises(
+            common_exc.InvalidPageMarkerError,
+            pagination.decode_marker,
+            token,
+            KEYSET,
+        )
+
+
+class TestBuildKeysetFilter(unittest.TestCase):
+    def test_single_key(self):
+        result = pagination.build_keyset_filter(("uuid",), {"uuid": "u"})
+
+        self.assertEqual(result, {"uuid": dm_filters.GT("u")})
+
+    def test_leading_key_is_a_range(self):
+        result = pagination.build_keyset_filter(KEYSET, {"created_at": 1, "uuid": 2})
+
+        self.assertEqual(
+            result,
+            dm_filters.AND(
+                {"created_at": dm_filters.GE(1)},
+                dm_filters.OR(
+                    {"created_at": dm_filters.GT(1)},
+                    {"uuid": dm_filters.GT(2)},
+                ),
+            ),
+        )
+
+    def test_descending_flips_comparisons(self):
+        result = pagination.build_keyset_filter(
+            KEYSET,
+            {"created_at": 1, "uuid": 2},
+            descending=True,
+        )
+
+        self.assertEqual(
+            result,
+            dm_filters.AND(
+                {"created_at": dm_filters.LE(1)},
+                dm_filters.OR(
+                    {"created_at": dm_filters.LT(1)},
+                    {"uuid": dm_filters.LT(2)},
+                ),
+            ),
+        )
+
+
+class _Paginated(
+    pagination.KeysetPaginationMixin,
+    ra_controllers.BaseResourceControllerPaginated,
+):
+    model = models.Folder
+
+    def test_nullable_key_is_followed_by_nulls(self):
+        result = pagination.build_keyset_filter(
+            ("order_index", "uuid"),
+            {"order_index": 1, "uuid": 2},
+            nullable=("order_index",),
+        )
+
+        self.assertEqual(
+            result,
+            dm_filters.OR(
+                pagination.build_keyset_filter(
+                    ("order_index", "uuid"),
+                    {"order_index": 1, "uuid": 2},
+                ),
+                {"order_index": dm_filters.Is(None)},
+            ),
+        )
+
+    def test_null_marker_stays_among_nulls(self):
+        result = pagination.build_keyset_filter(
+            ("order_index", "uuid"),
+            {"order_index": None, "uuid": 2},
+            nullable=("order_index",),
+        )
+
+        self.assertEqual(
+            result,
+            dm_filters.AND(
+                {"order_index": dm_filters.Is(None)},
+                {"uuid": dm_filters.GT(2)},
+            ),
+        )
+
+    def test_null_marker_descending_is_followed_by_values(self):
+        result = pagination.build_keyset_filter(
+            ("order_index", "uuid"),
+            {"order_index": None, "uuid": 2},
+            descending=True,
+            nullable=("order_index",),
+        )
+
+        self.assertEqual(
+            result,
+            dm_filters.OR(
+                dm_filters.AND(
+                    {"order_index": dm_filters.Is(None)},
+                    {"uuid": dm_filters.LT(2)},
+                ),
+                {"order_index": dm_filters.IsNot(None)},
+            ),
+        )
+
+    def test_nullable_key_descending_has_no_nulls_after(self):
+        values = {"order_index": 1, "uuid": 2}
+
+        self.assertEqual(
+            pagination.build_keyset_filter(
+                ("order_index", "uuid"),
+                values,
+                descending=True,
+                nullable=("order_index",),
+            ),
+            pagination.build_keyset_filter(
+                ("order_index", "uuid"), values, descending=True
+            ),
+        )
+
+
+class TestKeysetPaginationMixin(unittest.TestCase):
+    def setUp(self):
+        self.mixin = _Paginated.__new__(_Paginated)
+        self.mixin._pagination_limit = 10
+
+    def test_sort_by_keyset_prefix_is_allowed(self):
+        self.mixin._validate_params({}, None)
+        self.mixin._validate_params({}, {"created_at": "asc"})
+        self.mixin._validate_params({}, {"created_at": "desc", "uuid": "desc"})
+
+    def test_sort_by_other_keys_is_rejected(self):
+        for order_by in (
+            {"title": "asc"},
+            {"uuid": "asc"},
+            {"created_at": "desc", "uuid": "asc"},
+        ):
+            self.assertRaises(
+                common_exc.UnsupportedSortError,
+                self.mixin._validate_params,
+                {},
+                order_by,
+            )
+
+    def test_unpaginated_listing_may_be_sorted_by_keyset(self):
+        self.mixin._pagination_limit = 0
+
+        self.mixin._validate_params({}, {"created_at": "asc", "uuid": "asc"})
+        self.assertRaises(
+            common_exc.UnsupportedSortError,
+            self.mixin._validate_params,
+            {},
+            {"title": "asc", "uuid": "asc"},
+        )
+
+    def test_descending_pages_keep_direction(self):
+        self.mixin._pagination_marker = {
+            "created_at": "2026-10-18 10:00:00.000001",
+            "uuid": "9a4f1d3c-9a0f-4b7e-8d1c-2c6f3b1a5e70",
+        }
+
+        filters, order_by = self.mixin._build_pagination_with_cursor(
+            {},
+            {"created_at": "DESC"},
+        )
+
+        self.assertEqual(order_by, {"created_at": "desc", "uuid": "desc"})
+        self.assertEqual(
+            filters,
+            dm_filters.AND(
+                pagination.build_keyset_filter(
+                    KEYSET,
+                    self.mixin._get_marker_model_values(),
+                    descending=True,
+                ),
+                {},
+            ),
+        )
+
+    def test_unpaginated_listing_keeps_any_sort(self):
+        self.mixin._pagination_limit = 0
+        order_by = {"title": "desc"}
+
+        self.mixin._validate_params({}, order_by)
+        filters, result = self.mixin._build_pagination_with_cursor({}, order_by)
+
+        self.assertEqual(filters, {})
+        self.assertEqual(result, {"title": "desc", "uuid": "asc"})
+
+    def test_listing_without_sort_is_ordered_by_keyset(self):
+        params = webob.multidict.MultiDict()
+
+        self.assertEqual(
+            self.mixin._prepare_sorts(params),
+            {"created_at": "asc", "uuid": "asc"},
+        )
+
+    def test_requested_sort_is_kept(self):
+        params = webob.multidict.MultiDict(sort_key="title", sort_dir="desc")
+
+        self.assertEqual(self.mixin._prepare_sorts(params), {"title": "desc"})
+
+    def test_keyset_values_of_dict_view(self):
+        row = {"created_at": "c", "uuid": "u", "title": "t"}
+
+        self.assertEqual(
+            self.mixin._get_keyset_values(row),
+            {"created_at": "c", "uuid": "u"},
+        )
+
+    def test_marker_values_are_parsed(self):
+        uuid = "9a4f1d3c-9a0f-4b7e-8d1c-2c6f3b1a5e70"
+        self.mixin._pagination_marker = {
+            "created_at": "2026-10-18 10:00:00.000001",
+            "uuid": uuid,
+        }
+
+        values = self.mixin._get_marker_model_values()
+
+        self.assertEqual(values["created_at"].microsecond, 1)
+        self.assertEqual(str(values["uuid"]), uuid)
+
+    def test_marker_with_bad_values_is_rejected(self):
+        for created_at, uuid in (("x", None), (None, "not-a-uuid")):
+            self.mixin._pagination_marker = {
+                "created_at": created_at or "2026-10-18 10:00:00.000001",
+                "uuid": uuid or "9a4f1d3c-9a0f-4b7e-8d1c-2c6f3b1a5e70",
+            }
+            self.assertRaises(
+                common_exc.InvalidPageMarkerError,
+                self.mixin._get_marker_model_values,
+            )
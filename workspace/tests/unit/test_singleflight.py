@@ -0,0 +1,100 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from workspace.common import singleflight
+
+
+FOLLOWERS = 5
+
+
+class TestSingleFlight(unittest.TestCase):
+    def setUp(self):
+        self.flight = singleflight.SingleFlight()
+        self.release = threading.Event()
+
+    def _wait_for_followers(self):
+        deadline = time.monotonic() + 5
+        while self.flight.stats()["deduplicated"] < FOLLOWERS:
+            if time.monotonic() > deadline:
+                self.fail("Followers did not join the flight")
+            time.sleep(0.001)
+
+    def _run_concurrently(self, fn):
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                results.append(self.flight.do("key", fn))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=worker) for _ in range(FOLLOWERS + 1)]
+        threads[0].start()
+        while not self.flight.stats()["in_flight"]:
+            time.sleep(0.001)
+        for thread in threads[1:]:
+            thread.start()
+        self._wait_for_followers()
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_concurrent_calls_share_result(self):
+        fn = mock.MagicMock(side_effect=lambda: self.release.wait() and 42)
+
+        results, errors = self._run_concurrently(fn)
+
+        fn.assert_called_once()
+        self.assertEqual(results, [42] * (FOLLOWERS + 1))
+        self.assertEqual(errors, [])
+        stats = self.flight.stats()
+        self.assertEqual(stats["executed"], 1)
+        self.assertEqual(stats["deduplicated"], FOLLOWERS)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_concurrent_calls_share_error(self):
+        error = ValueError("boom")
+
+        def fn():
+            self.release.wait()
+            raise error
+
+        results, errors = self._run_concurrently(fn)
+
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), FOLLOWERS + 1)
+        self.assertTrue(all(e is error for e in errors))
+
+    def test_sequential_calls_are_not_coalesced(self):
+        fn = mock.MagicMock(return_value=1)
+
+        self.flight.do("key", fn)
+        self.flight.do("key", fn)
+
+        self.assertEqual(fn.call_count, 2)
+        self.assertEqual(self.flight.stats()["deduplicated"], 0)
+
+    def test_different_keys_are_not_coalesced(self):
+        self.assertEqual(self.flight.do("a", lambda: 1), 1)
+        self.assertEqual(self.flight.do("b", lambda: 2), 2)
+        self.assertEqual(self.flight.stats()["executed"], 2)
@@ -0,0 +1,105 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+from unittest import mock
+
+from workspace.common import tokens
+
+
+TIME_PATH = "workspace.common.tokens.time.time"
+ISSUER = "ws.example.com"
+
+
+class TestTokens(unittest.TestCase):
+    def setUp(self):
+        tokens.CONF.set_override("encryption_key", "secret", tokens.HS256)
+        self.addCleanup(tokens.CONF.clear_override, "encryption_key", tokens.HS256)
+
+    def test_round_trip(self):
+        token, claims = tokens.issue_token(user_id=42, issuer=ISSUER)
+
+        self.assertEqual(tokens.verify_token(token, issuer=ISSUER), 42)
+        self.assertEqual(claims["exp"] - claims["iat"], 900)
+        self.assertEqual(claims["iss"], ISSUER)
+
+    def test_disabled_without_key(self):
+        tokens.CONF.clear_override("encryption_key", tokens.HS256)
+
+        self.assertFalse(tokens.is_enabled())
+        self.assertRaises(
+            tokens.InvalidTokenError,
+            tokens.issue_token,
+            user_id=42,
+            issuer=ISSUER,
+        )
+
+    def test_other_key_is_rejected(self):
+        token, _ = tokens.issue_token(user_id=42, issuer=ISSUER)
+        tokens.CONF.set_override("encryption_key", "other", tokens.HS256)
+
+        self.assertRaises(
+            tokens.InvalidTokenError,
+            tokens.verify_token,
+            token,
+            issuer=ISSUER,
+        )
+
+    def test_tampered_claims_are_rejected(self):
+        token, _ = tokens.issue_token(user_id=42, issuer=ISSUER)
+        other, _ = tokens.issue_token(user_id=43, issuer=ISSUER)
+        header, _, signature = token.split(".")
+        forged = ".".join([header, other.split(".")[1], signature])
+
+        self.assertRaises(
+            tokens.InvalidTokenError,
+            tokens.verify_token,
+            forged,
+            issuer=ISSUER,
+        )
+
+    def test_other_issuer_is_rejected(self):
+        token, _ = tokens.issue_token(user_id=42, issuer=ISSUER)
+
+        self.assertRaises(
+            tokens.InvalidTokenError,
+            tokens.verify_token,
+            token,
+            issuer="other.example.com",
+        )
+
+    def test_expired_token_is_rejected(self):
+        with mock.patch(TIME_PATH, return_value=1000):
+            token, _ = tokens.issue_token(user_id=42, issuer=ISSUER)
+
+        with mock.patch(TIME_PATH, return_value=1000 + 900 + 5):
+            self.assertEqual(tokens.verify_token(token, issuer=ISSUER), 42)
+        with mock.patch(TIME_PATH, return_value=1000 + 900 + 6):
+            self.assertRaises(
+                tokens.InvalidTokenError,
+                tokens.verify_token,
+                token,
+                issuer=ISSUER,
+            )
+
+    def test_malformed_tokens_are_rejected(self):
+        for token in ("", "a.b", "a.b.c", "!!.!!.!!"):
+            self.assertRaises(
+                tokens.InvalidTokenError,
+                tokens.verify_token,
+                token,
+                issuer=ISSUER,
+            )
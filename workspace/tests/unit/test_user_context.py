@@ -0,0 +1,348 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import unittest
+from unittest import mock
+
+from bazooka import exceptions as bazooka_exc
+from restalchemy.common import exceptions as ra_exc
+import webob
+
+from workspace.common import caches
+from workspace.common import circuit_breaker
+from workspace.common import exceptions as common_exc
+from workspace.common import tokens
+from workspace.common.api.middlewares import user_context
+
+
+ZULIP_CLIENT_PATH = "workspace.common.clients.zulip.get_client"
+COOKIE = "__Host-sessionid=abc"
+
+
+def _make_request(path="/v1/folders/", host="ws.example.com", cookie=COOKIE):
+    headers = {"Host": host}
+    if cookie:
+        headers["Cookie"] = cookie
+    return webob.Request.blank(path, headers=headers)
+
+
+def _make_http_error(exc_class, status_code):
+    cause = mock.MagicMock()
+    cause.response.status_code = status_code
+    return exc_class(cause)
+
+
+class TestCredentialsFingerprint(unittest.TestCase):
+    def test_same_credentials_same_fingerprint(self):
+        a = user_context.credentials_fingerprint("h", {"Cookie": "c"})
+        b = user_context.credentials_fingerprint("h", {"Cookie": "c"})
+
+        self.assertEqual(a, b)
+
+    def test_fingerprint_depends_on_host_and_headers(self):
+        base = user_context.credentials_fingerprint("h", {"Cookie": "c"})
+
+        self.assertNotEqual(
+            base, user_context.credentials_fingerprint("h2", {"Cookie": "c"})
+        )
+        self.assertNotEqual(
+            base, user_context.credentials_fingerprint("h", {"Cookie": "d"})
+        )
+        self.assertNotEqual(
+            base,
+            user_context.credentials_fingerprint("h", {"Authorization": "c"}),
+        )
+
+    def test_fingerprint_does_not_contain_credentials(self):
+        result = user_context.credentials_fingerprint("h", {"Cookie": COOKIE})
+
+        self.assertNotIn(COOKIE, result)
+
+
+class TestUserContextMiddleware(unittest.TestCase):
+    def setUp(self):
+        self.cache = caches.TTLCache(ttl=60, max_size=10)
+        patcher = mock.patch.object(user_context, "_user_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.rejected_cache = caches.TTLCache(ttl=5, max_size=10)
+        patcher = mock.patch.object(
+            user_context, "_rejected_cache", self.rejected_cache
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.shared_cache = None
+        patcher = mock.patch.object(
+            user_context,
+            "get_shared_user_cache",
+            lambda: self.shared_cache,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.middleware = user_context.UserContextMiddleware(
+            application=mock.MagicMock(),
+        )
+
+    def _authenticate(self, req):
+        self.middleware.process_request(req)
+        return req.context.user_id
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_excluded_path_skips_zulip(self, get_client):
+        req = _make_request(path="/v1/")
+
+        self.middleware.process_request(req)
+
+        get_client.assert_not_called()
+        self.assertIsNone(getattr(req, "context", None))
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_user_id_is_cached(self, get_client):
+        get_client.return_value.get_current_user_id.return_value = 42
+
+        first = _make_request()
+        second = _make_request()
+        self.middleware.process_request(first)
+        self.middleware.process_request(second)
+
+        self.assertEqual(first.context.user_id, 42)
+        self.assertEqual(second.context.user_id, 42)
+        get_client.return_value.get_current_user_id.assert_called_once_with(
+            headers={"Cookie": COOKIE},
+        )
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_user_is_resolved_lazily(self, get_client):
+        get_client.return_value.get_current_user_id.return_value = 42
+        req = _make_request()
+
+        self.middleware.process_request(req)
+
+        get_client.assert_not_called()
+        self.assertFalse(req.context.is_resolved)
+        self.assertEqual(req.context.user_id, 42)
+        self.assertEqual(req.context.user_id, 42)
+        self.assertTrue(req.context.is_resolved)
+        get_client.return_value.get_current_user_id.assert_called_once()
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_different_credentials_are_not_shared(self, get_client):
+        get_user_id = get_client.return_value.get_current_user_id
+        get_user_id.side_effect = [1, 2]
+
+        first = _make_request(cookie="a")
+        second = _make_request(cookie="b")
+        self.middleware.process_request(first)
+        self.middleware.process_request(second)
+
+        self.assertEqual(first.context.user_id, 1)
+        self.assertEqual(second.context.user_id, 2)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_http_errors_bubble_up_and_are_not_cached(self, get_client):
+        get_user_id = get_client.return_value.get_current_user_id
+        get_user_id.side_effect = _make_http_error(bazooka_exc.UnauthorizedError, 401)
+
+        self.assertRaises(
+            bazooka_exc.UnauthorizedError,
+            self._authenticate,
+            _make_request(),
+        )
+        self.assertEqual(len(self.cache), 0)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_unexpected_errors_become_validation_error(self, get_client):
+        get_user_id = get_client.return_value.get_current_user_id
+        get_user_id.side_effect = ValueError()
+
+        self.assertRaises(
+            ra_exc.ValidationErrorException,
+            self._authenticate,
+            _make_request(),
+        )
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_invalidate_user_cache(self, get_client):
+        get_client.return_value.get_current_user_id.return_value = 42
+        self._authenticate(_make_request())
+
+        user_context.invalidate_user_cache(
+            host="ws.example.com",
+            headers={"Cookie": COOKIE},
+        )
+        self._authenticate(_make_request())
+
+        self.assertEqual(get_client.return_value.get_current_user_id.call_count, 2)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_shared_cache_hit_skips_zulip(self, get_client):
+        self.shared_cache = mock.MagicMock()
+        self.shared_cache.get.return_value = 42
+
+        req = _make_request()
+        self.middleware.process_request(req)
+
+        self.assertEqual(req.context.user_id, 42)
+        get_client.assert_not_called()
+        self.assertEqual(len(self.cache), 1)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_shared_cache_miss_is_filled(self, get_client):
+        self.shared_cache = mock.MagicMock()
+        self.shared_cache.get.return_value = None
+        get_client.return_value.get_current_user_id.return_value = 42
+
+        self._authenticate(_make_request())
+
+        fingerprint = user_context.credentials_fingerprint(
+            "ws.example.com", {"Cookie": COOKIE}
+        )
+        self.shared_cache.set.assert_called_once_with(fingerprint, 42)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_rejected_credentials_are_negatively_cached(self, get_client):
+        get_user_id = get_client.return_value.get_current_user_id
+        get_user_id.side_effect = _make_http_error(bazooka_exc.ForbiddenError, 403)
+
+        for _ in range(3):
+            self.assertRaises(
+                bazooka_exc.ForbiddenError,
+                self._authenticate,
+                _make_request(),
+            )
+
+        get_user_id.assert_called_once()
+        self.assertEqual(self.rejected_cache.stats()["hits"], 2)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_other_http_errors_are_not_negatively_cached(self, get_client):
+        get_user_id = get_client.return_value.get_current_user_id
+        get_user_id.side_effect = _make_http_error(bazooka_exc.NotFoundError, 404)
+
+        for _ in range(2):
+            self.assertRaises(
+                bazooka_exc.NotFoundError,
+                self._authenticate,
+                _make_request(),
+            )
+
+        self.assertEqual(get_user_id.call_count, 2)
+        self.assertEqual(len(self.rejected_cache), 0)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_invalidate_user_cache_drops_rejection(self, get_client):
+        get_user_id = get_client.return_value.get_current_user_id
+        get_user_id.side_effect = [
+            _make_http_error(bazooka_exc.UnauthorizedError, 401),
+            42,
+        ]
+        self.assertRaises(
+            bazooka_exc.UnauthorizedError,
+            self._authenticate,
+            _make_request(),
+        )
+
+        user_context.invalidate_user_cache(
+            host="ws.example.com",
+            headers={"Cookie": COOKIE},
+        )
+        req = _make_request()
+        self.middleware.process_request(req)
+
+        self.assertEqual(req.context.user_id, 42)
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_open_circuit_becomes_unavailable_error(self, get_client):
+        get_user_id = get_client.return_value.get_current_user_id
+        get_user_id.side_effect = circuit_breaker.CircuitOpenError(retry_after=7)
+
+        with self.assertRaises(common_exc.AuthBackendUnavailableError) as ctx:
+            self._authenticate(_make_request())
+
+        self.assertEqual(ctx.exception.retry_after, 7)
+        self.assertEqual(len(self.rejected_cache), 0)
+
+
+class TestUserContextMiddlewareSessionTokens(unittest.TestCase):
+    def setUp(self):
+        tokens.CONF.set_override("encryption_key", "secret", tokens.HS256)
+        self.addCleanup(tokens.CONF.clear_override, "encryption_key", tokens.HS256)
+        patcher = mock.patch.object(
+            user_context, "_user_cache", caches.TTLCache(ttl=60, max_size=10)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.middleware = user_context.UserContextMiddleware(
+            application=mock.MagicMock(),
+        )
+
+    def _authenticate(self, req):
+        self.middleware.process_request(req)
+        return req.context.user_id
+
+    def _make_token_request(self, token, cookie=None):
+        req = _make_request(cookie=cookie)
+        req.headers["Authorization"] = f"Bearer {token}"
+        return req
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_valid_token_skips_zulip(self, get_client):
+        token, _ = tokens.issue_token(user_id=42, issuer="ws.example.com")
+        req = self._make_token_request(token)
+
+        self.middleware.process_request(req)
+
+        self.assertEqual(req.context.user_id, 42)
+        self.assertEqual(req.context.auth_method, user_context.AUTH_METHOD_TOKEN)
+        get_client.assert_not_called()
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_invalid_token_without_cookie_is_rejected(self, get_client):
+        token, _ = tokens.issue_token(user_id=42, issuer="other.example.com")
+
+        self.assertRaises(
+            common_exc.InvalidSessionTokenError,
+            self._authenticate,
+            self._make_token_request(token),
+        )
+        get_client.assert_not_called()
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_invalid_token_falls_back_to_cookie(self, get_client):
+        get_client.return_value.get_current_user_id.return_value = 42
+        req = self._make_token_request("broken", cookie=COOKIE)
+
+        self.middleware.process_request(req)
+
+        self.assertEqual(req.context.user_id, 42)
+        self.assertEqual(req.context.auth_method, user_context.AUTH_METHOD_ZULIP)
+        get_client.return_value.get_current_user_id.assert_called_once_with(
+            headers={"Cookie": COOKIE},
+        )
+
+    @mock.patch(ZULIP_CLIENT_PATH)
+    def test_bearer_goes_to_zulip_when_tokens_disabled(self, get_client):
+        tokens.CONF.clear_override("encryption_key", tokens.HS256)
+        get_client.return_value.get_current_user_id.return_value = 42
+        req = self._make_token_request("zulip-token")
+
+        self.middleware.process_request(req)
+
+        self.assertEqual(req.context.user_id, 42)
+        get_client.return_value.get_current_user_id.assert_called_once()
@@ -0,0 +1,185 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import unittest
+from unittest import mock
+
+from bazooka import exceptions as bazooka_exc
+from requests import exceptions as requests_exc
+
+from workspace.common import circuit_breaker
+from workspace.common.clients import zulip
+
+
+MONOTONIC_PATH = "workspace.common.clients.zulip.time.monotonic"
+
+
+class TestPooledClient(unittest.TestCase):
+    def setUp(self):
+        self.session_class = mock.MagicMock()
+        self.client = zulip.PooledClient(
+            pool_size=4,
+            idle_timeout=10,
+            max_lifetime=100,
+            default_timeout=3,
+            session=self.session_class,
+        )
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_session_is_reused(self, monotonic):
+        self.client.get("http://zulip/json/users/me")
+        monotonic.return_value = 5.0
+        self.client.get("http://zulip/json/users/me")
+
+        self.session_class.assert_called_once()
+        session = self.session_class.return_value
+        self.assertEqual(session.request.call_count, 2)
+        self.assertEqual(self.client.stats()["requests"], 2)
+        self.assertEqual(self.client.stats()["sessions_opened"], 1)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_default_timeout_is_used(self, monotonic):
+        self.client.get("http://zulip/json/users/me")
+
+        session = self.session_class.return_value
+        self.assertEqual(session.request.call_args[1]["timeout"], 3)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_idle_session_is_recycled(self, monotonic):
+        self.client.get("http://zulip/json/users/me")
+        monotonic.return_value = 11.0
+        self.client.get("http://zulip/json/users/me")
+
+        self.assertEqual(self.session_class.call_count, 2)
+        self.session_class.return_value.close.assert_called_once()
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_old_session_is_recycled(self, monotonic):
+        for now in range(0, 101, 5):
+            monotonic.return_value = float(now)
+            self.client.get("http://zulip/json/users/me")
+        monotonic.return_value = 101.0
+        self.client.get("http://zulip/json/users/me")
+
+        self.assertEqual(self.session_class.call_count, 2)
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_cookies_are_not_kept(self, monotonic):
+        session = self.session_class.return_value
+        session.request.side_effect = ValueError()
+
+        self.assertRaises(ValueError, self.client.get, "http://zulip/json/users/me")
+        session.cookies.clear.assert_called_once()
+
+    @mock.patch(MONOTONIC_PATH, return_value=0.0)
+    def test_keep_alive_adapter_is_mounted(self, monotonic):
+        self.client.get("http://zulip/json/users/me")
+
+        session = self.session_class.return_value
+        mounted = {c[0][0]: c[0][1] for c in session.mount.call_args_list}
+        self.assertEqual(set(mounted), {"http://", "https://"})
+        self.assertEqual(mounted["https://"]._pool_maxsize, 4)
+
+
+def _make_http_error(exc_class, status_code):
+    cause = mock.MagicMock()
+    cause.response.status_code = status_code
+    return exc_class(cause)
+
+
+class TestZulipClientBreaker(unittest.TestCase):
+    def setUp(self):
+        self.http = mock.MagicMock()
+        self.client = zulip.ZulipClient(
+            endpoint="https://zulip.example.com",
+            client=self.http,
+            breaker=circuit_breaker.CircuitBreaker(
+                failure_threshold=2,
+                recovery_timeout=30,
+                is_failure=zulip.is_zulip_failure,
+            ),
+        )
+
+    def test_failures_open_the_breaker(self):
+        self.http.get.side_effect = requests_exc.Timeout()
+
+        for _ in range(2):
+            self.assertRaises(
+                requests_exc.Timeout,
+                self.client.get_current_user_id,
+                {"Cookie": "c"},
+            )
+        self.assertRaises(
+            circuit_breaker.CircuitOpenError,
+            self.client.get_current_user_id,
+            {"Cookie": "c"},
+        )
+
+        self.assertEqual(self.http.get.call_count, 2)
+        self.assertEqual(self.client.stats()["breaker"]["state"], "open")
+
+    def test_auth_errors_do_not_open_the_breaker(self):
+        self.http.get.side_effect = _make_http_error(bazooka_exc.UnauthorizedError, 401)
+
+        for _ in range(3):
+            self.assertRaises(
+                bazooka_exc.UnauthorizedError,
+                self.client.get_current_user_id,
+                {"Cookie": "c"},
+            )
+
+        self.assertEqual(self.http.get.call_count, 3)
+
+    def test_is_zulip_failure(self):
+        self.assertTrue(zulip.is_zulip_failure(requests_exc.ConnectionError()))
+        self.assertTrue(
+            zulip.is_zulip_failure(_make_http_error(bazooka_exc.BaseHTTPException, 502))
+        )
+        self.assertFalse(
+            zulip.is_zulip_failure(_make_http_error(bazooka_exc.ForbiddenError, 403))
+        )
+        self.assertFalse(zulip.is_zulip_failure(ValueError()))
+
+
+class TestClientsRegistry(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(zulip, "_clients", collections.OrderedDict())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_client_is_reused_per_endpoint(self):
+        first = zulip.get_client("https://a.example.com")
+        second = zulip.get_client("https://a.example.com")
+        other = zulip.get_client("https://b.example.com")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(first.endpoint, "https://a.example.com")
+
+    def test_registry_is_bounded(self):
+        zulip.CONF.set_override("max_endpoints", 2, zulip.DOMAIN)
+        self.addCleanup(zulip.CONF.clear_override, "max_endpoints", zulip.DOMAIN)
+
+        first = zulip.get_client("https://a.example.com")
+        zulip.get_client("https://b.example.com")
+        zulip.get_client("https://c.example.com")
+
+        self.assertEqual(
+            list(zulip.get_clients_stats()),
+            ["https://b.example.com", "https://c.example.com"],
+        )
+        self.assertIsNot(first, zulip.get_client("https://a.example.com"))
@@ -14,21 +14,34 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import collections
+import contextlib
 import datetime
-import uuid as sys_uuid
+import time
 
 from restalchemy.api import actions as ra_actions
 from restalchemy.api import controllers as ra_controllers
 from restalchemy.api import resources as ra_resources
 from restalchemy.common import exceptions as ra_exc
+from restalchemy.common import status as ra_status
 from restalchemy.dm import filters as dm_filters
+from restalchemy.dm import types as ra_types
 from restalchemy.openapi import utils as oa_utils
+from restalchemy.storage import exceptions as storage_exc
 
+from workspace.common import exceptions as common_exc
+from workspace.common import tokens
+from workspace.common.api import pagination
+from workspace.common.api.middlewares import user_context
 from workspace.user_api import exceptions as user_api_exceptions
 from workspace.user_api.api import schemas
 from workspace.user_api.api import versions
+from workspace.user_api.dm import bulk
+from workspace.user_api.dm import data_versions
 from workspace.user_api.dm import models
+from workspace.user_api.dm import ordering
+from workspace.user_api.dm import queries
+from workspace.user_api.dm import system_folders
+from workspace.user_api.dm import unread
 
 
 class ApiEndpointController(ra_controllers.RoutesListController):
@@ -52,7 +65,36 @@ def _parse_bool(value, default=False):
     return default
 
 
-class UserScopedMixin:
+class AuthPolicyMixin:
+    """Declare when the user of a request has to be resolved.
+
+    `__auth_policy__` is one of `user_context.AUTH_POLICIES` and applies
+    to all methods of the controller, `__auth_policy_by_method__` maps
+    HTTP methods to a different policy.
+    """
+
+    __auth_policy__ = user_context.AUTH_POLICY_EAGER
+    __auth_policy_by_method__ = {}
+
+    def __init__(self, request, *args, **kwargs):
+        super().__init__(request, *args, **kwargs)
+        if self.get_auth_policy() == user_context.AUTH_POLICY_EAGER:
+            ctx = self.get_context()
+            if ctx is None or getattr(ctx, "user_id", None) is None:
+                raise ra_exc.ValidationErrorException()
+
+    def get_auth_policy(self):
+        return self.__auth_policy_by_method__.get(
+            self.request.method,
+            self.__auth_policy__,
+        )
+
+
+class UserScopedMixin(AuthPolicyMixin):
+    # Every handler asks for the user, so there is no need to resolve it
+    # before the request body is validated
+    __auth_policy__ = user_context.AUTH_POLICY_LAZY
+
     def _get_user_id(self):
         ctx = self.get_context()
         user_id = getattr(ctx, "user_id", None) if ctx is not None else None
@@ -60,81 +102,252 @@ class UserScopedMixin:
             raise ra_exc.ValidationErrorException()
         return user_id
 
+    def _get_owned(self, model, uuid):
+        """Load a row of the user once per request."""
+        user_id = self._get_user_id()
+
+        def load():
+            return model.objects.get_one(
+                filters={
+                    "uuid": dm_filters.EQ(uuid),
+                    "user_id": dm_filters.EQ(user_id),
+                },
+            )
+
+        return self.get_context().identity_map.get(model, uuid, load)
+
+
+class VersionedWritesMixin:
+    """Bump the data version of the user along with every write.
+
+    Yields `data_versions.UserDataWrite`, changed rows must be recorded
+    with it so delta sync can find them.
+    """
+
+    @contextlib.contextmanager
+    def _versioned_write(self):
+        user_id = self._get_user_id()
+        with self.get_context().session_manager() as session:
+            yield data_versions.UserDataWrite(user_id, session=session)
 
-class FolderController(UserScopedMixin, ra_controllers.BaseResourceControllerPaginated):
+
+class DataVersionETagMixin:
+    """Answer reads with 304 while the data version of the user is the same.
+
+    `_etag_resource` tells apart ETags of different views of the same
+    data version, so a validator of one URL never matches another.
+    """
+
+    _etag_resource = None
+
+    def _get_etag(self, user_id):
+        """Return response headers and whether the client copy is current."""
+        # Read before the data: data newer than the ETag only makes the
+        # next request miss, never the other way round
+        version = data_versions.get_version(user_id)
+        etag = f"{self._etag_resource}-{user_id}-{version}"
+        headers = {"ETag": f'W/"{etag}"', "Cache-Control": "private, no-cache"}
+        return headers, etag in self.request.if_none_match
+
+
+class FolderController(
+    pagination.KeysetPaginationMixin,
+    DataVersionETagMixin,
+    VersionedWritesMixin,
+    UserScopedMixin,
+    ra_controllers.BaseResourceControllerPaginated,
+):
     __resource__ = ra_resources.ResourceByRAModel(
         model_class=models.Folder,
         hidden_fields=["user_id"],
         convert_underscore=False,
     )
 
-    def _check_system_type(self, change_uuid, user_id):
-        for folder in self.model.objects.get_all(
-            filters={
-                "user_id": dm_filters.EQ(user_id),
-                "system_type": dm_filters.EQ(models.SystemFolderType.ALL),
-                "uuid": dm_filters.NE(change_uuid),
-            }
-        ):
-            raise user_api_exceptions.OnlyOneAllFolderPerUserError()
-
-    def create(self, uuid=None, system_type=None, **kwargs):
-        user_id = self._get_user_id()
-        kwargs["user_id"] = user_id
-        if system_type == models.SystemFolderType.ALL:
-            uuid = uuid or sys_uuid.uuid4()
-            self._check_system_type(uuid, user_id)
-        return super().create(uuid=uuid, system_type=system_type, **kwargs)
+    _etag_resource = "folders"
+
+    # Limit of nested items per folder, 0 means no limit like `page_limit`
+    _param_items_limit = "items_limit"
+    _items_limit = 0
+
+    # Mirrors hidden fields of FolderItemController for synced items
+    _item_hidden_fields = ("folder", "user_id")
+
+    def _prepare_pagination_meta(self):
+        super()._prepare_pagination_meta()
+        value = self._req.api_context.params.get(self._param_items_limit, 0)
+        try:
+            self._items_limit = int(value)
+            if self._items_limit < 0:
+                raise ValueError()
+        except ValueError:
+            raise ra_exc.ParseError(value=value)
+
+    def _prepare_filters(self, params):
+        params = params.copy()
+        if self._param_items_limit in params:
+            del params[self._param_items_limit]
+        return super()._prepare_filters(params)
+
+    @contextlib.contextmanager
+    def _all_folder_conflicts(self):
+        # The unique index allows one ALL folder per user without a lookup
+        try:
+            yield
+        except storage_exc.ConflictRecords as e:
+            if system_folders.is_all_folder_conflict(e):
+                raise user_api_exceptions.OnlyOneAllFolderPerUserError()
+            raise
+
+    def create(self, **kwargs):
+        kwargs["user_id"] = self._get_user_id()
+        with self._versioned_write() as write, self._all_folder_conflicts():
+            folder = super().create(**kwargs)
+            write.changed(data_versions.FOLDER, folder.uuid)
+            return folder
 
     def get(self, uuid):
-        user_id = self._get_user_id()
-        return self.model.objects.get_one(
-            filters={
-                "uuid": dm_filters.EQ(uuid),
-                "user_id": dm_filters.EQ(user_id),
-            },
-        )
+        # Also resolves the parent of item routes
+        return self._get_owned(self.model, uuid)
 
     @oa_utils.extend_schema(
         summary="List folders with nested items",
         parameters=schemas.FOLDER_FILTER_PARAMETERS,
         responses=schemas.FOLDER_FILTER_RESPONSES,
     )
-    def filter(self, filters, **kwargs):
+    def filter(self, filters, order_by=None):
+        direction = "asc"
+        if self._is_paginated():
+            # Pages of the aggregate query are always on the keyset
+            direction = self._get_keyset_direction(order_by)
+            order_by = None
+        elif order_by and not set(order_by) <= set(self.model.properties.properties):
+            raise ra_exc.ValidationErrorException()
         user_id = self._get_user_id()
+        headers, not_modified = self._get_etag(user_id)
+        if not_modified:
+            return None, 304, headers
         filters = (filters or {}).copy()
         filters["user_id"] = dm_filters.EQ(user_id)
-
-        folders = models.Folder.objects.get_all(filters=filters)
-        items = models.FolderItem.objects.get_all(
-            filters={"user_id": dm_filters.EQ(user_id)},
+        folders = queries.get_folders_with_items(
+            filters=filters,
+            limit=self._pagination_limit or None,
+            marker=self._pagination_marker,
+            items_limit=self._items_limit or None,
+            descending=direction == "desc",
+            order_by=order_by,
         )
-        items_by_folder = collections.defaultdict(list)
-        for item in items:
-            items_by_folder[item.folder.uuid].append(item.dump_to_simple_view())
-        result = []
-        for folder in folders:
-            folder_view = folder.dump_to_simple_view()
-            folder_view["items"] = items_by_folder.get(folder.uuid, [])
-            result.append(folder_view)
-        return result
+        if self._items_limit:
+            for folder in folders:
+                self._trim_items(folder)
+        return folders, 200, headers
+
+    def _trim_items(self, folder):
+        # The query returns one extra item if there is a next page
+        items = folder["items"]
+        folder["items_next_marker"] = None
+        if len(items) > self._items_limit:
+            del items[self._items_limit :]
+            # The marker continues in the items listing of the folder
+            folder["items_next_marker"] = pagination.encode_marker(
+                {name: items[-1][name] for name in ordering.ITEM_ORDER},
+            )
 
     def delete(self, uuid):
-        dm = self.get(uuid=uuid)
-        dm.delete()
+        with self._versioned_write() as write:
+            dm = self.get(uuid=uuid)
+            write.folder_deleted(dm.uuid)
+            dm.delete()
+            self.get_context().identity_map.discard(self.model, dm.uuid)
 
     def update(self, uuid, **kwargs):
-        dm = self.get(uuid=uuid)
-        system_type = kwargs.get("system_type", dm.system_type)
-        # Check for system type conflict before updating
-        if system_type == models.SystemFolderType.ALL:
-            self._check_system_type(uuid, self._get_user_id())
-        dm.update_dm(values=kwargs)
-        dm.update()
-        return dm
+        with self._versioned_write() as write:
+            dm = self.get(uuid=uuid)
+            dm.update_dm(values=kwargs)
+            with self._all_folder_conflicts():
+                dm.update()
+            write.changed(data_versions.FOLDER, dm.uuid)
+            return dm
+
+    def _change_unread(self, change, resource, *args):
+        with self._versioned_write() as write:
+            folder = change(write, resource.uuid, *args)
+        folder.pop("user_id", None)
+        return folder
+
+    @ra_actions.post
+    def add_unread(self, resource, messages=None, **kwargs):
+        return self._change_unread(unread.add_unread, resource, messages)
+
+    @ra_actions.post
+    def remove_unread(self, resource, messages=None, **kwargs):
+        return self._change_unread(unread.remove_unread, resource, messages)
+
+    @ra_actions.post
+    def clear_unread(self, resource, **kwargs):
+        return self._change_unread(unread.clear_unread, resource)
+
+    @ra_actions.post
+    def reorder(self, resource, items=None, **kwargs):
+        if not isinstance(items, list) or kwargs:
+            raise ra_exc.ValidationErrorException()
+        with self._versioned_write() as write:
+            order = bulk.reorder_items(write, resource.uuid, items)
+        return [
+            {"uuid": str(uuid), "order_index": order_index}
+            for uuid, order_index in order
+        ]
+
+    @ra_actions.post
+    def sync(self, resource, chats=None, **kwargs):
+        if not isinstance(chats, list) or kwargs:
+            raise ra_exc.ValidationErrorException()
+        with self._versioned_write() as write:
+            result = bulk.sync_items(write, resource.uuid, chats)
+        for item in result["created"] + result["updated"]:
+            for name in self._item_hidden_fields:
+                item.pop(name, None)
+        result["deleted"] = [str(uuid) for uuid in result["deleted"]]
+        return result
+
+
+class AllFolderController(UserScopedMixin, ra_controllers.Controller):
+    """Get or create the ALL system folder of the user."""
+
+    __generate_location_for__ = set()
+
+    # Mirrors hidden fields of FolderController
+    _hidden_fields = ("user_id",)
+
+    @oa_utils.extend_schema(
+        summary="Get or create the ALL system folder",
+        request_body=schemas.ALL_FOLDER_REQUEST_BODY,
+        responses=schemas.ALL_FOLDER_RESPONSES,
+    )
+    def create(self, title="All", **kwargs):
+        if kwargs:
+            raise ra_exc.ValidationErrorException()
+        user_id = self._get_user_id()
+        with self.get_context().session_manager() as session:
+            folder, created = system_folders.ensure_all_folder(
+                user_id,
+                title,
+                session=session,
+            )
+            # Only a new folder is a change, an existing one keeps the ETag
+            # valid. The version row is still locked before the commit.
+            if created:
+                write = data_versions.UserDataWrite(user_id, session=session)
+                write.changed(data_versions.FOLDER, folder["uuid"])
+        for name in self._hidden_fields:
+            folder.pop(name, None)
+        if created:
+            return folder, ra_status.HTTP_201_CREATED
+        return folder, ra_status.HTTP_200_OK
 
 
 class FolderItemController(
+    pagination.KeysetPaginationMixin,
+    VersionedWritesMixin,
     UserScopedMixin,
     ra_controllers.BaseNestedResourceControllerPaginated,
 ):
@@ -144,11 +357,31 @@ class FolderItemController(
         convert_underscore=False,
     )
     __pr_name__ = "folder"
+    __keyset__ = ordering.ITEM_ORDER
+    __keyset_nullable__ = ("order_index",)
+
+    def _resolve_folder(self, kwargs):
+        # The folder_uuid setter would load the folder again
+        folder_uuid = kwargs.get("folder_uuid")
+        if folder_uuid is None:
+            return None
+        del kwargs["folder_uuid"]
+        return self._get_owned(models.Folder, folder_uuid)
 
     def create(self, parent_resource, **kwargs):
+        ordering.discard_client_key(kwargs)
         user_id = self._get_user_id()
         kwargs["user_id"] = user_id
-        return super().create(parent_resource=parent_resource, **kwargs)
+        parent_resource = self._resolve_folder(kwargs) or parent_resource
+        with self._versioned_write() as write:
+            # New items go last, after the lock on the user's writes
+            kwargs["order_index"] = ordering.get_append_key(
+                write,
+                parent_resource.uuid,
+            )
+            item = super().create(parent_resource=parent_resource, **kwargs)
+            write.changed(data_versions.FOLDER_ITEM, item.uuid)
+            return item
 
     def get(self, parent_resource, uuid):
         user_id = self._get_user_id()
@@ -171,29 +404,70 @@ class FolderItemController(
         )
 
     def delete(self, parent_resource, uuid):
-        dm = self.get(parent_resource=parent_resource, uuid=uuid)
-        dm.delete()
+        with self._versioned_write() as write:
+            dm = self.get(parent_resource=parent_resource, uuid=uuid)
+            dm.delete()
+            write.deleted(data_versions.FOLDER_ITEM, dm.uuid)
 
     def update(self, parent_resource, uuid, **kwargs):
-        dm = self.get(parent_resource=parent_resource, uuid=uuid)
-        dm.update_dm(values=kwargs)
-        dm.update()
-        return dm
+        with self._versioned_write() as write:
+            dm = self.get(parent_resource=parent_resource, uuid=uuid)
+            ordering.discard_client_key(kwargs, current=dm.order_index)
+            folder = self._resolve_folder(kwargs)
+            if folder is not None:
+                kwargs["folder"] = folder
+                if folder.uuid != dm.folder.uuid:
+                    kwargs["order_index"] = ordering.get_append_key(
+                        write,
+                        folder.uuid,
+                    )
+            dm.update_dm(values=kwargs)
+            dm.update()
+            write.changed(data_versions.FOLDER_ITEM, dm.uuid)
+            return dm
 
     @ra_actions.post
     def pin(self, resource, *args, **kwargs):
-        resource.pinned_at = datetime.datetime.now(datetime.timezone.utc)
-        resource.save()
+        with self._versioned_write() as write:
+            resource.pinned_at = datetime.datetime.now(datetime.timezone.utc)
+            resource.save()
+            write.changed(data_versions.FOLDER_ITEM, resource.uuid)
         return resource
 
     @ra_actions.post
     def unpin(self, resource, *args, **kwargs):
-        resource.pinned_at = None
-        resource.save()
+        with self._versioned_write() as write:
+            resource.pinned_at = None
+            resource.save()
+            write.changed(data_versions.FOLDER_ITEM, resource.uuid)
+        return resource
+
+    @ra_actions.post
+    def move(self, resource, before=None, after=None, **kwargs):
+        if kwargs or (before is None) == (after is None):
+            raise user_api_exceptions.InvalidMoveError(
+                reason="exactly one of before and after is expected",
+            )
+        try:
+            anchor_uuid = ra_types.UUID().from_simple_type(before or after)
+        except (TypeError, ValueError):
+            raise user_api_exceptions.InvalidMoveError(
+                reason="invalid anchor uuid",
+            )
+        with self._versioned_write() as write:
+            resource.order_index = ordering.get_move_key(
+                write,
+                resource,
+                anchor_uuid,
+                after=after is not None,
+            )
+            resource.save()
+            write.changed(data_versions.FOLDER_ITEM, resource.uuid)
         return resource
 
 
 class FolderItemsController(
+    pagination.KeysetPaginationMixin,
     UserScopedMixin,
     ra_controllers.BaseResourceControllerPaginated,
 ):
@@ -210,9 +484,298 @@ class FolderItemsController(
         return super().filter(filters=filters, **kwargs)
 
 
-class ServiceController(ra_controllers.BaseResourceControllerPaginated):
+class FolderItemBulkController(
+    VersionedWritesMixin,
+    UserScopedMixin,
+    ra_controllers.Controller,
+):
+    """Create, update and delete many folder items in one transaction."""
+
+    # Batches are not addressable resources
+    __generate_location_for__ = set()
+
+    _STATUSES = {
+        bulk.CREATE: ra_status.HTTP_201_CREATED,
+        bulk.UPDATE: ra_status.HTTP_200_OK,
+        bulk.DELETE: ra_status.HTTP_204_NO_CONTENT,
+    }
+
+    @oa_utils.extend_schema(
+        summary="Apply many folder item operations at once",
+        request_body=schemas.FOLDER_ITEM_BULK_REQUEST_BODY,
+        responses=schemas.FOLDER_ITEM_BULK_RESPONSES,
+    )
+    def create(self, operations=None, **kwargs):
+        if not isinstance(operations, list) or kwargs:
+            raise ra_exc.ValidationErrorException()
+        with self._versioned_write() as write:
+            ops = bulk.apply_item_operations(write, operations)
+        results = []
+        for op in ops:
+            result = {"op": op.op, "status": self._STATUSES[op.op]}
+            if op.op == bulk.DELETE:
+                result["uuid"] = str(op.item.uuid)
+            else:
+                result["item"] = op.item.dump_to_simple_view()
+            results.append(result)
+        return {"results": results}, ra_status.HTTP_200_OK
+
+
+class FolderItemPinController(
+    VersionedWritesMixin,
+    UserScopedMixin,
+    ra_controllers.Controller,
+):
+    """Pin many folder items at once."""
+
+    __generate_location_for__ = set()
+
+    _pinned = True
+    # Mirrors hidden fields of FolderItemController
+    _hidden_fields = ("folder", "user_id")
+
+    @oa_utils.extend_schema(
+        summary="Pin or unpin many folder items at once",
+        request_body=schemas.FOLDER_ITEM_PIN_REQUEST_BODY,
+        responses=schemas.FOLDER_ITEM_PIN_RESPONSES,
+    )
+    def create(self, items=None, folder_uuid=None, chat_ids=None, **kwargs):
+        if kwargs:
+            raise ra_exc.ValidationErrorException()
+        with self._versioned_write() as write:
+            updated = bulk.set_pinned(
+                write,
+                self._pinned,
+                items=items,
+                folder_uuid=folder_uuid,
+                chat_ids=chat_ids,
+            )
+        for item in updated:
+            for name in self._hidden_fields:
+                item.pop(name, None)
+        return {"items": updated}, ra_status.HTTP_200_OK
+
+
+class FolderItemUnpinController(FolderItemPinController):
+    """Unpin many folder items at once."""
+
+    _pinned = False
+
+
+class ChatFoldersController(UserScopedMixin, ra_controllers.Controller):
+    """Folders of the user which contain each of the given chats.
+
+    Chats are passed as repeated `chat_id` parameters, optionally with
+    one `chat_type`. The response follows the order of the chats.
+    """
+
+    _param_chat_id = "chat_id"
+    _param_chat_type = "chat_type"
+
+    @staticmethod
+    def _values(filters, name):
+        value = filters.get(name)
+        if value is None:
+            return []
+        if isinstance(value, dm_filters.In):
+            return list(value.value)
+        if isinstance(value, dm_filters.EQ):
+            return [value.value]
+        raise user_api_exceptions.InvalidChatFoldersQueryError(
+            reason=f"unsupported filter on {name}",
+        )
+
+    @staticmethod
+    def _parse(value_type, value, name):
+        try:
+            value = value_type.from_unicode(value)
+        except (TypeError, ValueError):
+            value = None
+        if value is None or not value_type.validate(value):
+            raise user_api_exceptions.InvalidChatFoldersQueryError(
+                reason=f"invalid {name}",
+            )
+        return value
+
+    def _parse_filters(self, filters):
+        unknown = set(filters) - {self._param_chat_id, self._param_chat_type}
+        if unknown:
+            raise user_api_exceptions.InvalidChatFoldersQueryError(
+                reason=f"unknown parameters {', '.join(sorted(unknown))}",
+            )
+        properties = models.FolderItem.properties.properties
+        chat_id_type = properties["chat_id"].get_property_type()
+        # Repeated chats are answered once
+        chat_ids = list(
+            dict.fromkeys(
+                self._parse(chat_id_type, value, self._param_chat_id)
+                for value in self._values(filters, self._param_chat_id)
+            )
+        )
+        if not chat_ids:
+            raise user_api_exceptions.InvalidChatFoldersQueryError(
+                reason="at least one chat_id is expected",
+            )
+        chat_types = self._values(filters, self._param_chat_type)
+        if len(chat_types) > 1:
+            raise user_api_exceptions.InvalidChatFoldersQueryError(
+                reason="at most one chat_type is expected",
+            )
+        chat_type = None
+        if chat_types:
+            chat_type = self._parse(
+                properties["chat_type"].get_property_type(),
+                chat_types[0],
+                self._param_chat_type,
+            )
+        return chat_ids, chat_type
+
+    @oa_utils.extend_schema(
+        summary="List folders containing the given chats",
+        parameters=schemas.CHAT_FOLDERS_FILTER_PARAMETERS,
+        responses=schemas.CHAT_FOLDERS_FILTER_RESPONSES,
+    )
+    def filter(self, filters, order_by=None):
+        chat_ids, chat_type = self._parse_filters(filters or {})
+        return queries.get_chat_folders(
+            self._get_user_id(),
+            chat_ids,
+            chat_type=chat_type,
+        )
+
+
+class FolderSummaryController(
+    DataVersionETagMixin,
+    UserScopedMixin,
+    ra_controllers.Controller,
+):
+    """Folders of the user with item, pinned and unread counters.
+
+    Serves views which do not show the items, without transferring them.
+    """
+
+    _etag_resource = "summaries"
+
+    @oa_utils.extend_schema(
+        summary="List folders with counters instead of items",
+        responses=schemas.FOLDER_SUMMARY_FILTER_RESPONSES,
+    )
+    def filter(self, filters, order_by=None):
+        if filters or order_by:
+            raise ra_exc.ValidationErrorException()
+        user_id = self._get_user_id()
+        headers, not_modified = self._get_etag(user_id)
+        if not_modified:
+            return None, 304, headers
+        return queries.get_folder_summaries(user_id), 200, headers
+
+
+class ChangesController(UserScopedMixin, ra_controllers.Controller):
+    """Folders and items changed since a sync cursor.
+
+    Without a cursor every folder and item is returned. The response
+    carries the cursor for the next call; changes are tracked by the data
+    version of the user, so the cost depends on the number of changes, not
+    on the size of the account.
+    """
+
+    _CURSOR_KEYS = ("version", "issued_at")
+    _param_cursor = "cursor"
+
+    def _parse_cursor(self, filters):
+        cursor = filters.get(self._param_cursor)
+        if cursor is None:
+            return None
+        if not isinstance(cursor, dm_filters.EQ):
+            raise user_api_exceptions.InvalidSyncCursorError()
+        try:
+            values = pagination.decode_marker(cursor.value, self._CURSOR_KEYS)
+        except common_exc.InvalidPageMarkerError:
+            raise user_api_exceptions.InvalidSyncCursorError()
+        if not all(isinstance(values[key], int) for key in self._CURSOR_KEYS):
+            raise user_api_exceptions.InvalidSyncCursorError()
+        return values
+
+    @oa_utils.extend_schema(
+        summary="List folders and items changed since a sync cursor",
+        parameters=schemas.CHANGES_FILTER_PARAMETERS,
+        responses=schemas.CHANGES_FILTER_RESPONSES,
+    )
+    def filter(self, filters, order_by=None):
+        user_id = self._get_user_id()
+        cursor = self._parse_cursor(filters)
+        now = int(time.time())
+        version = data_versions.get_version(user_id)
+        since_version = None
+        if cursor is not None:
+            since_version = cursor["version"]
+            # Tombstones older than the cursor may be gone already
+            ttl = data_versions.CONF[data_versions.DOMAIN].tombstone_ttl
+            if cursor["issued_at"] < now - ttl or since_version > version:
+                raise user_api_exceptions.SyncCursorExpiredError()
+        # Versions up to the current one are committed in order, newer
+        # changes are left for the next call
+        changes = queries.get_changes(
+            user_id,
+            since_version=since_version,
+            until_version=version,
+        )
+        changes["cursor"] = pagination.encode_marker(
+            {"version": version, "issued_at": now},
+        )
+        return changes
+
+
+class ServiceController(
+    AuthPolicyMixin,
+    ra_controllers.BaseResourceControllerPaginated,
+):
+    # The catalog is not user-scoped: anyone may read it, only
+    # authenticated users may change it
+    __auth_policy__ = user_context.AUTH_POLICY_EAGER
+    __auth_policy_by_method__ = {"GET": user_context.AUTH_POLICY_NONE}
+
     __resource__ = ra_resources.ResourceByRAModel(
         model_class=models.Service,
         hidden_fields=[],
         convert_underscore=False,
     )
+
+
+class SessionTokenController(UserScopedMixin, ra_controllers.Controller):
+    """Exchange Zulip credentials for a short-lived session token.
+
+    The request is authenticated through Zulip as usual. The returned
+    token is sent back as `Authorization: Bearer <token>` and verified
+    locally by UserContextMiddleware without calling Zulip.
+    """
+
+    # Tokens are not addressable resources
+    __generate_location_for__ = set()
+
+    @oa_utils.extend_schema(
+        summary="Issue a session token for the current Zulip user",
+        request_body=schemas.SESSION_TOKEN_CREATE_REQUEST_BODY,
+        responses=schemas.SESSION_TOKEN_CREATE_RESPONSES,
+    )
+    def create(self, **kwargs):
+        if not tokens.is_enabled():
+            raise common_exc.SessionTokensDisabledError()
+        user_id = self._get_user_id()
+        # Tokens are not renewable by themselves, Zulip must vouch again
+        if self.get_context().auth_method != user_context.AUTH_METHOD_ZULIP:
+            raise common_exc.ZulipCredentialsRequiredError()
+        token, claims = tokens.issue_token(
+            user_id=user_id,
+            issuer=self.request.headers["Host"],
+        )
+        return {
+            "token": token,
+            "token_type": "Bearer",
+            "user_id": user_id,
+            "expires_at": datetime.datetime.fromtimestamp(
+                claims["exp"],
+                tz=datetime.timezone.utc,
+            ).isoformat(),
+            "expires_in": claims["exp"] - claims["iat"],
+        }
@@ -27,6 +27,10 @@ class FolderItemUnpinAction(routes.Action):
     __controller__ = controllers.FolderItemController
 
 
+class FolderItemMoveAction(routes.Action):
+    __controller__ = controllers.FolderItemController
+
+
 class FolderItemRoute(routes.Route):
     __controller__ = controllers.FolderItemController
     __allow_methods__ = [
@@ -39,6 +43,27 @@ class FolderItemRoute(routes.Route):
 
     pin = routes.action(FolderItemPinAction, invoke=True)
     unpin = routes.action(FolderItemUnpinAction, invoke=True)
+    move = routes.action(FolderItemMoveAction, invoke=True)
+
+
+class FolderReorderAction(routes.Action):
+    __controller__ = controllers.FolderController
+
+
+class FolderSyncAction(routes.Action):
+    __controller__ = controllers.FolderController
+
+
+class FolderAddUnreadAction(routes.Action):
+    __controller__ = controllers.FolderController
+
+
+class FolderRemoveUnreadAction(routes.Action):
+    __controller__ = controllers.FolderController
+
+
+class FolderClearUnreadAction(routes.Action):
+    __controller__ = controllers.FolderController
 
 
 class FolderRoute(routes.Route):
@@ -54,6 +79,19 @@ class FolderRoute(routes.Route):
     # nested route: /v1/folders/<folder_uuid>/items/[<uuid>]
     items = routes.route(FolderItemRoute, resource_route=True)
 
+    reorder = routes.action(FolderReorderAction, invoke=True)
+    sync = routes.action(FolderSyncAction, invoke=True)
+    add_unread = routes.action(FolderAddUnreadAction, invoke=True)
+    remove_unread = routes.action(FolderRemoveUnreadAction, invoke=True)
+    clear_unread = routes.action(FolderClearUnreadAction, invoke=True)
+
+
+class AllFolderRoute(routes.Route):
+    __controller__ = controllers.AllFolderController
+    __allow_methods__ = [
+        routes.CREATE,
+    ]
+
 
 class ServiceRoute(routes.Route):
     __controller__ = controllers.ServiceController
@@ -73,6 +111,55 @@ class FolderItemsRoute(routes.Route):
     ]
 
 
+class FolderItemBulkRoute(routes.Route):
+    __controller__ = controllers.FolderItemBulkController
+    __allow_methods__ = [
+        routes.CREATE,
+    ]
+
+
+class FolderItemPinRoute(routes.Route):
+    __controller__ = controllers.FolderItemPinController
+    __allow_methods__ = [
+        routes.CREATE,
+    ]
+
+
+class FolderItemUnpinRoute(routes.Route):
+    __controller__ = controllers.FolderItemUnpinController
+    __allow_methods__ = [
+        routes.CREATE,
+    ]
+
+
+class ChatFoldersRoute(routes.Route):
+    __controller__ = controllers.ChatFoldersController
+    __allow_methods__ = [
+        routes.FILTER,
+    ]
+
+
+class FolderSummaryRoute(routes.Route):
+    __controller__ = controllers.FolderSummaryController
+    __allow_methods__ = [
+        routes.FILTER,
+    ]
+
+
+class ChangesRoute(routes.Route):
+    __controller__ = controllers.ChangesController
+    __allow_methods__ = [
+        routes.FILTER,
+    ]
+
+
+class SessionTokenRoute(routes.Route):
+    __controller__ = controllers.SessionTokenController
+    __allow_methods__ = [
+        routes.CREATE,
+    ]
+
+
 class ApiEndpointRoute(routes.Route):
     """Handler for /v1.0/ endpoint"""
 
@@ -82,8 +169,32 @@ class ApiEndpointRoute(routes.Route):
     # route to /v1.0/folders/[<uuid>]
     folders = routes.route(FolderRoute)
 
+    # route to /v1.0/all_folder/
+    all_folder = routes.route(AllFolderRoute)
+
     # route to /v1.0/services/[<uuid>]
     services = routes.route(ServiceRoute)
 
     # route to /v1.0/folder_items/
     folder_items = routes.route(FolderItemsRoute)
+
+    # route to /v1.0/folder_items_bulk/
+    folder_items_bulk = routes.route(FolderItemBulkRoute)
+
+    # route to /v1.0/folder_items_pin/
+    folder_items_pin = routes.route(FolderItemPinRoute)
+
+    # route to /v1.0/folder_items_unpin/
+    folder_items_unpin = routes.route(FolderItemUnpinRoute)
+
+    # route to /v1.0/chat_folders/
+    chat_folders = routes.route(ChatFoldersRoute)
+
+    # route to /v1.0/folder_summaries/
+    folder_summaries = routes.route(FolderSummaryRoute)
+
+    # route to /v1.0/changes/
+    changes = routes.route(ChangesRoute)
+
+    # route to /v1.0/session_tokens/
+    session_tokens = routes.route(SessionTokenRoute)
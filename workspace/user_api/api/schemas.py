@@ -25,6 +25,10 @@ FOLDER_ITEM_SCHEMA = {
             "type": "string",
             "format": "uuid",
         },
+        "folder_uuid": {
+            "type": "string",
+            "format": "uuid",
+        },
         "chat_id": {
             "type": "integer",
         },
@@ -92,10 +96,35 @@ FOLDER_WITH_ITEMS_SCHEMA = {
             "type": "array",
             "items": FOLDER_ITEM_SCHEMA,
         },
+        "items_next_marker": {
+            "type": "string",
+            "nullable": True,
+            "description": "Marker of the next page of items, only "
+            "returned when items_limit is set",
+        },
     },
 }
 
-FOLDER_FILTER_PARAMETERS = []
+FOLDER_FILTER_PARAMETERS = [
+    oa_c.build_openapi_parameter(
+        "page_limit",
+        description="Maximum number of folders to return",
+        openapi_type="integer",
+        param_type="query",
+    ),
+    oa_c.build_openapi_parameter(
+        "page_marker",
+        description="X-Pagination-Marker of the previous page",
+        param_type="query",
+    ),
+    oa_c.build_openapi_parameter(
+        "items_limit",
+        description="Maximum number of items per folder, the next items "
+        "are listed by /folders/<uuid>/items/ with items_next_marker",
+        openapi_type="integer",
+        param_type="query",
+    ),
+]
 
 FOLDER_FILTER_RESPONSES = {
     ra_status.HTTP_200_OK: {
@@ -111,3 +140,361 @@ FOLDER_FILTER_RESPONSES = {
     },
     "default": oa_c.DEFAULT_RESPONSE,
 }
+
+SESSION_TOKEN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "token": {
+            "type": "string",
+        },
+        "token_type": {
+            "type": "string",
+            "enum": ["Bearer"],
+        },
+        "user_id": {
+            "type": "integer",
+        },
+        "expires_at": {
+            "type": "string",
+            "format": "date-time",
+        },
+        "expires_in": {
+            "type": "integer",
+        },
+    },
+}
+
+SESSION_TOKEN_CREATE_REQUEST_BODY = oa_c.build_openapi_req_body(
+    description="Empty object, the token is issued for the Zulip user "
+    "authenticated by the request",
+    content_type="application/json",
+    schema={"type": "object"},
+)
+
+SESSION_TOKEN_CREATE_RESPONSES = {
+    ra_status.HTTP_201_CREATED: {
+        "description": "Signed session token for the Zulip user",
+        "content": {
+            "application/json": {
+                "schema": SESSION_TOKEN_SCHEMA,
+            },
+        },
+    },
+    "default": oa_c.DEFAULT_RESPONSE,
+}
+
+FOLDER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        name: value
+        for name, value in FOLDER_WITH_ITEMS_SCHEMA["properties"].items()
+        if name not in ("items", "items_next_marker")
+    },
+}
+
+FOLDER_SUMMARY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **{
+            name: FOLDER_SCHEMA["properties"][name]
+            for name in (
+                "uuid",
+                "title",
+                "background_color_value",
+                "system_type",
+                "created_at",
+                "updated_at",
+            )
+        },
+        "items_count": {
+            "type": "integer",
+        },
+        "pinned_count": {
+            "type": "integer",
+        },
+        "unread_count": {
+            "type": "integer",
+            "description": "Number of unread_messages of the folder",
+        },
+    },
+}
+
+FOLDER_SUMMARY_FILTER_RESPONSES = {
+    ra_status.HTTP_200_OK: {
+        "description": "List of folders with counters",
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "array",
+                    "items": FOLDER_SUMMARY_SCHEMA,
+                },
+            },
+        },
+    },
+    "default": oa_c.DEFAULT_RESPONSE,
+}
+
+CHANGES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "cursor": {
+            "type": "string",
+            "description": "Pass as `cursor` to get the next changes",
+        },
+        "folders": {
+            "type": "array",
+            "description": "Created or updated folders, without items",
+            "items": FOLDER_SCHEMA,
+        },
+        "folder_items": {
+            "type": "array",
+            "description": "Created or updated items",
+            "items": FOLDER_ITEM_SCHEMA,
+        },
+        "deleted_folders": {
+            "type": "array",
+            "description": "Deleted folders, their items are deleted too",
+            "items": {
+                "type": "string",
+                "format": "uuid",
+            },
+        },
+        "deleted_folder_items": {
+            "type": "array",
+            "items": {
+                "type": "string",
+                "format": "uuid",
+            },
+        },
+    },
+}
+
+CHANGES_FILTER_PARAMETERS = [
+    oa_c.build_openapi_parameter(
+        "cursor",
+        description="Cursor of the previous response, omit it for a full sync",
+        param_type="query",
+    ),
+]
+
+CHANGES_FILTER_RESPONSES = {
+    ra_status.HTTP_200_OK: {
+        "description": "Folders and items changed since the cursor",
+        "content": {
+            "application/json": {
+                "schema": CHANGES_SCHEMA,
+            },
+        },
+    },
+    410: {
+        "description": "The cursor is too old, a full sync is required",
+    },
+    "default": oa_c.DEFAULT_RESPONSE,
+}
+
+_FOLDER_ITEM_FIELDS_SCHEMA = {
+    name: value
+    for name, value in FOLDER_ITEM_SCHEMA["properties"].items()
+    if name not in ("created_at", "updated_at")
+}
+
+FOLDER_ITEM_BULK_REQUEST_BODY = oa_c.build_openapi_req_body(
+    description="Operations applied in one transaction, in order: deletes "
+    "first, then updates, then creates. Any invalid operation fails the "
+    "whole batch",
+    content_type="application/json",
+    schema={
+        "type": "object",
+        "required": ["operations"],
+        "properties": {
+            "operations": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["op"],
+                    "properties": {
+                        "op": {
+                            "type": "string",
+                            "enum": ["create", "update", "delete"],
+                        },
+                        **_FOLDER_ITEM_FIELDS_SCHEMA,
+                    },
+                },
+            },
+        },
+    },
+)
+
+FOLDER_ITEM_BULK_RESPONSES = {
+    ra_status.HTTP_200_OK: {
+        "description": "Result of every operation, in request order",
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "results": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "op": {
+                                        "type": "string",
+                                    },
+                                    "status": {
+                                        "type": "integer",
+                                    },
+                                    "item": FOLDER_ITEM_SCHEMA,
+                                    "uuid": {
+                                        "type": "string",
+                                        "format": "uuid",
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+    "default": oa_c.DEFAULT_RESPONSE,
+}
+
+FOLDER_ITEM_PIN_REQUEST_BODY = oa_c.build_openapi_req_body(
+    description="Items to change, either by uuid from any folders or by "
+    "chat_id within one folder",
+    content_type="application/json",
+    schema={
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {"type": "string", "format": "uuid"},
+            },
+            "folder_uuid": {
+                "type": "string",
+                "format": "uuid",
+            },
+            "chat_ids": {
+                "type": "array",
+                "items": {"type": "integer"},
+            },
+        },
+    },
+)
+
+FOLDER_ITEM_PIN_RESPONSES = {
+    ra_status.HTTP_200_OK: {
+        "description": "Updated items",
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "items": {
+                            "type": "array",
+                            "items": FOLDER_ITEM_SCHEMA,
+                        },
+                    },
+                },
+            },
+        },
+    },
+    "default": oa_c.DEFAULT_RESPONSE,
+}
+
+ALL_FOLDER_REQUEST_BODY = oa_c.build_openapi_req_body(
+    description="Title used only if the folder is created",
+    content_type="application/json",
+    schema={
+        "type": "object",
+        "properties": {
+            "title": {
+                "type": "string",
+                "minLength": 1,
+                "maxLength": 64,
+                "default": "All",
+            },
+        },
+    },
+)
+
+ALL_FOLDER_RESPONSES = {
+    ra_status.HTTP_200_OK: {
+        "description": "Existing ALL folder",
+        "content": {
+            "application/json": {
+                "schema": FOLDER_SCHEMA,
+            },
+        },
+    },
+    ra_status.HTTP_201_CREATED: {
+        "description": "Created ALL folder",
+        "content": {
+            "application/json": {
+                "schema": FOLDER_SCHEMA,
+            },
+        },
+    },
+    "default": oa_c.DEFAULT_RESPONSE,
+}
+
+CHAT_FOLDERS_FILTER_PARAMETERS = [
+    oa_c.build_openapi_parameter(
+        "chat_id",
+        description="Chat to look up, may be repeated",
+        openapi_type="integer",
+        param_type="query",
+    ),
+    oa_c.build_openapi_parameter(
+        "chat_type",
+        description="Only look up chats of this type",
+        required=False,
+        param_type="query",
+    ),
+]
+
+CHAT_FOLDERS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "chat_id": {
+            "type": "integer",
+        },
+        "folders": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "folder_uuid": {
+                        "type": "string",
+                        "format": "uuid",
+                    },
+                    "item_uuid": {
+                        "type": "string",
+                        "format": "uuid",
+                    },
+                    "chat_type": FOLDER_ITEM_SCHEMA["properties"]["chat_type"],
+                    "pinned": {
+                        "type": "boolean",
+                    },
+                    "pinned_at": FOLDER_ITEM_SCHEMA["properties"]["pinned_at"],
+                },
+            },
+        },
+    },
+}
+
+CHAT_FOLDERS_FILTER_RESPONSES = {
+    ra_status.HTTP_200_OK: {
+        "description": "Folders of every chat, in the order of the query",
+        "content": {
+            "application/json": {
+                "schema": {
+                    "type": "array",
+                    "items": CHAT_FOLDERS_SCHEMA,
+                },
+            },
+        },
+    },
+    "default": oa_c.DEFAULT_RESPONSE,
+}
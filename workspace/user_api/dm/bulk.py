@@ -0,0 +1,523 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Batch writes of folder items executed in one transaction."""
+
+import collections
+import datetime
+import json
+
+from oslo_config import cfg
+from psycopg import errors as pg_errors
+from restalchemy.common import exceptions as ra_exc
+from restalchemy.dm import filters as dm_filters
+from restalchemy.dm import types
+from restalchemy.storage import exceptions as storage_exc
+
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.dm import data_versions
+from workspace.user_api.dm import models
+from workspace.user_api.dm import ordering
+from workspace.user_api.dm import queries
+
+
+DOMAIN = "bulk"
+
+bulk_opts = [
+    cfg.IntOpt(
+        "max_operations",
+        default=500,
+        min=1,
+        help="Maximum number of operations in one batch request",
+    ),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(bulk_opts, DOMAIN)
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+
+# Fields clients may set, `uuid` identifies the item to update or delete
+_ITEM_FIELDS = frozenset(
+    ("folder_uuid", "chat_id", "chat_type", "order_index", "pinned_at"),
+)
+_ALLOWED_FIELDS = {
+    CREATE: _ITEM_FIELDS | {"uuid"},
+    UPDATE: _ITEM_FIELDS | {"uuid"},
+    DELETE: frozenset(("uuid",)),
+}
+_REQUIRED_FIELDS = {
+    CREATE: frozenset(("folder_uuid", "chat_id", "chat_type")),
+    UPDATE: frozenset(("uuid",)),
+    DELETE: frozenset(("uuid",)),
+}
+
+
+def batch_update(items, session):
+    """Store changed models of one type with a single UPDATE statement.
+
+    Rows are passed as a JSON recordset typed by the row type of the table,
+    so values are converted by PostgreSQL the same way as column values.
+    """
+    if not items:
+        return
+    model = type(items[0])
+    table = model.__tablename__
+    id_name = model.get_id_property_name()
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for item in items:
+        item.properties["updated_at"].set_value_force(now)
+    columns = sorted(items[0].get_data_properties())
+    assignments = ", ".join(f'"{name}" = "v"."{name}"' for name in columns)
+    statement = (
+        f'UPDATE "{table}" AS "t" SET {assignments}'
+        f' FROM json_populate_recordset(NULL::"{table}", %s::json) AS "v"'
+        f' WHERE "t"."{id_name}" = "v"."{id_name}";'
+    )
+    rows = [item.get_storable_snapshot() for item in items]
+    try:
+        session.execute(statement, (json.dumps(rows),))
+    except pg_errors.UniqueViolation as e:
+        raise storage_exc.ConflictRecords(model=model.__name__, msg=str(e))
+
+
+def _parse_order(items):
+    limit = CONF[DOMAIN].max_operations
+    if len(items) > limit:
+        raise user_api_exceptions.TooManyBulkOperationsError(limit=limit)
+    properties = models.FolderItem.properties.properties
+    uuid_type = properties["uuid"].get_property_type()
+    order_type = properties["order_index"].get_property_type()
+    uuids, order_indexes = [], []
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            if set(item) != {"uuid", "order_index"}:
+                raise user_api_exceptions.InvalidReorderItemError(
+                    index=index,
+                    reason="only uuid and order_index are expected",
+                )
+            uuid, order_index = item["uuid"], item["order_index"]
+        else:
+            # Bare uuids get sparse keys in the order of the list
+            uuid, order_index = item, (index + 1) * ordering.ORDER_STEP
+        try:
+            uuid = uuid_type.from_simple_type(uuid)
+            if not isinstance(order_index, int) or not order_type.validate(order_index):
+                raise ValueError()
+        except (TypeError, ValueError, ra_exc.RestAlchemyException):
+            raise user_api_exceptions.InvalidReorderItemError(
+                index=index,
+                reason="invalid uuid or order_index",
+            )
+        if uuid in uuids:
+            raise user_api_exceptions.InvalidReorderItemError(
+                index=index,
+                reason="the item is listed more than once",
+            )
+        uuids.append(uuid)
+        order_indexes.append(order_index)
+    return uuids, order_indexes
+
+
+def reorder_items(write, folder_uuid, items):
+    """Set `order_index` of many items of a folder with one UPDATE.
+
+    :param write: `data_versions.UserDataWrite` of the transaction.
+    :param items: list of item uuids, which get sparse keys in the order
+                  of the list, or of {"uuid": ..., "order_index": ...}
+                  dicts.
+    :return: list of (uuid, order_index) pairs in the order of `items`.
+    """
+    uuids, order_indexes = _parse_order(items)
+    if not uuids:
+        return []
+    updated_at = models.storable_now()
+    result = write.session.execute(
+        'UPDATE "folder_items" AS "t"'
+        ' SET "order_index" = "v"."order_index", "updated_at" = %s'
+        " FROM unnest(%s::uuid[], %s::integer[])"
+        ' AS "v"("uuid", "order_index")'
+        ' WHERE "t"."uuid" = "v"."uuid" AND "t"."folder" = %s'
+        ' AND "t"."user_id" = %s RETURNING "t"."uuid";',
+        (updated_at, uuids, order_indexes, folder_uuid, write.user_id),
+    )
+    found = {row["uuid"] for row in result.fetchall()}
+    for index, uuid in enumerate(uuids):
+        if uuid not in found:
+            raise user_api_exceptions.InvalidReorderItemError(
+                index=index,
+                reason="item not found in the folder",
+            )
+    write.changed(data_versions.FOLDER_ITEM, *uuids)
+    return list(zip(uuids, order_indexes))
+
+
+def _parse_list(values, value_type, name):
+    limit = CONF[DOMAIN].max_operations
+    if not isinstance(values, list):
+        raise user_api_exceptions.InvalidBatchPinError(
+            reason=f"{name} must be a list",
+        )
+    if len(values) > limit:
+        raise user_api_exceptions.TooManyBulkOperationsError(limit=limit)
+    try:
+        result = [value_type.from_simple_type(value) for value in values]
+        for value in result:
+            if not value_type.validate(value):
+                raise ValueError()
+    except (TypeError, ValueError, ra_exc.RestAlchemyException):
+        raise user_api_exceptions.InvalidBatchPinError(
+            reason=f"invalid value in {name}",
+        )
+    return list(dict.fromkeys(result))
+
+
+def set_pinned(write, pinned, items=None, folder_uuid=None, chat_ids=None):
+    """Pin or unpin many items of the user with one UPDATE.
+
+    Items are selected either by `items`, a list of item uuids from any
+    folders, or by `chat_ids` within the folder `folder_uuid`. All rows
+    get the same timestamp. Any missing item fails the whole batch.
+
+    :return: list of updated items as API views.
+    """
+    properties = models.FolderItem.properties.properties
+    if (items is None) == (chat_ids is None) or (
+        (folder_uuid is None) != (chat_ids is None)
+    ):
+        raise user_api_exceptions.InvalidBatchPinError(
+            reason="either items or folder_uuid with chat_ids are expected",
+        )
+    if items is not None:
+        keys = _parse_list(items, properties["uuid"].get_property_type(), "items")
+        key_column = "uuid"
+        condition = '"i"."uuid" = ANY(%s::uuid[])'
+        values = [keys]
+    else:
+        (folder_uuid,) = _parse_list([folder_uuid], types.UUID(), "folder_uuid")
+        keys = _parse_list(
+            chat_ids,
+            properties["chat_id"].get_property_type(),
+            "chat_ids",
+        )
+        key_column = "chat_id"
+        condition = '"i"."folder" = %s AND "i"."chat_id" = ANY(%s::integer[])'
+        values = [folder_uuid, keys]
+    if not keys:
+        return []
+    now = models.storable_now()
+    rows = write.session.execute(
+        'UPDATE "folder_items" AS "i" SET "pinned_at" = %s, "updated_at" = %s'
+        f' WHERE "i"."user_id" = %s AND {condition}'
+        f' RETURNING "i"."{key_column}" AS "key",'
+        f' {queries.FOLDER_ITEM_VIEW} AS "item";',
+        [now if pinned else None, now, write.user_id, *values],
+    ).fetchall()
+    found = {row["key"] for row in rows}
+    missing = [str(key) for key in keys if key not in found]
+    if missing:
+        raise user_api_exceptions.InvalidBatchPinError(
+            reason=f"not found {missing}",
+        )
+    write.changed(data_versions.FOLDER_ITEM, *(row["item"]["uuid"] for row in rows))
+    return sorted(
+        (row["item"] for row in rows),
+        key=lambda item: (item["created_at"], item["uuid"]),
+    )
+
+
+# One statement: data-modifying CTEs all run on the same snapshot, the
+# deleted and upserted chats are disjoint
+_SYNC_QUERY = f"""
+    WITH "folder" AS (
+        SELECT "uuid" FROM "folders"
+        WHERE "uuid" = %(folder)s AND "user_id" = %(user_id)s
+    ), "desired" AS (
+        -- New chats are numbered in the order of the request to take keys
+        SELECT "d".*, count(*) FILTER (WHERE "e"."uuid" IS NULL)
+            OVER (ORDER BY "d"."position") AS "new_position"
+        FROM unnest(%(chat_ids)s::integer[], %(chat_types)s::text[])
+            WITH ORDINALITY AS "d"("chat_id", "chat_type", "position")
+        LEFT JOIN "folder_items" AS "e"
+            ON "e"."chat_id" = "d"."chat_id" AND "e"."folder" = %(folder)s
+                AND "e"."user_id" = %(user_id)s
+    ), "removed" AS (
+        DELETE FROM "folder_items" AS "i" USING "folder" AS "f"
+        WHERE "i"."folder" = "f"."uuid" AND "i"."user_id" = %(user_id)s
+            AND "i"."chat_id" <> ALL(%(chat_ids)s::integer[])
+        RETURNING "i"."uuid"
+    ), "upserted" AS (
+        INSERT INTO "folder_items" AS "i" (
+            "uuid", "folder", "user_id", "chat_id", "chat_type",
+            "order_index", "created_at", "updated_at"
+        )
+        SELECT gen_random_uuid(), "f"."uuid", %(user_id)s, "d"."chat_id",
+            "d"."chat_type", (%(keys)s::integer[])["d"."new_position"],
+            %(now)s, %(now)s
+        FROM "desired" AS "d", "folder" AS "f"
+        ORDER BY "d"."position"
+        ON CONFLICT ("chat_id", "folder") DO UPDATE
+        SET "chat_type" = EXCLUDED."chat_type",
+            "updated_at" = EXCLUDED."updated_at"
+        WHERE "i"."chat_type" <> EXCLUDED."chat_type"
+        -- xmax is 0 only for rows inserted by this statement
+        RETURNING "i"."chat_id", ("i"."xmax" = 0) AS "created",
+            {queries.FOLDER_ITEM_VIEW} AS "item"
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM "folder") AS "found",
+        ARRAY(SELECT "uuid" FROM "removed") AS "deleted",
+        COALESCE(
+            (
+                SELECT json_agg(
+                    json_build_array("u"."created", "u"."item")
+                    ORDER BY "d"."position"
+                )
+                FROM "upserted" AS "u"
+                JOIN "desired" AS "d" ON "d"."chat_id" = "u"."chat_id"
+            ),
+            '[]'::json
+        ) AS "upserted";
+"""
+
+
+def _parse_chats(chats):
+    limit = CONF[DOMAIN].max_operations
+    if not isinstance(chats, list):
+        raise user_api_exceptions.InvalidFolderSyncError(
+            reason="chats must be a list",
+        )
+    if len(chats) > limit:
+        raise user_api_exceptions.TooManyBulkOperationsError(limit=limit)
+    properties = models.FolderItem.properties.properties
+    chat_id_type = properties["chat_id"].get_property_type()
+    chat_type_type = properties["chat_type"].get_property_type()
+    result = {}
+    for index, chat in enumerate(chats):
+        if not isinstance(chat, dict) or set(chat) != {"chat_id", "chat_type"}:
+            raise user_api_exceptions.InvalidFolderSyncError(
+                reason=f"chat {index} must have only chat_id and chat_type",
+            )
+        try:
+            chat_id = chat_id_type.from_simple_type(chat["chat_id"])
+            chat_type = chat_type_type.from_simple_type(chat["chat_type"])
+            if (
+                isinstance(chat["chat_id"], bool)
+                or not chat_id_type.validate(chat_id)
+                or not chat_type_type.validate(chat_type)
+            ):
+                raise ValueError()
+        except (TypeError, ValueError, ra_exc.RestAlchemyException):
+            raise user_api_exceptions.InvalidFolderSyncError(
+                reason=f"invalid chat_id or chat_type of chat {index}",
+            )
+        # A chat is in a folder once, so it can't have two types
+        if result.setdefault(chat_id, chat_type) != chat_type:
+            raise user_api_exceptions.InvalidFolderSyncError(
+                reason=f"chat {chat_id} is listed with different types",
+            )
+    return result
+
+
+def sync_items(write, folder_uuid, chats):
+    """Make the folder contain exactly the given chats.
+
+    Missing chats are inserted after the last item of the folder in the
+    order of `chats`, chats listed with another type are updated and all
+    other items of the folder are deleted, with one statement. Unchanged
+    items are not touched, so repeating a sync changes nothing.
+
+    :param write: `data_versions.UserDataWrite` of the transaction.
+    :param chats: list of {"chat_id": ..., "chat_type": ...} dicts.
+    :return: dict with lists of `created` and `updated` item views in
+             the order of `chats` and uuids of `deleted` items.
+    """
+    desired = _parse_chats(chats)
+    # Enough keys after the last item even if every chat is new
+    keys = ordering.get_append_keys(write, {folder_uuid: len(desired)})
+    row = write.session.execute(
+        _SYNC_QUERY,
+        {
+            "folder": folder_uuid,
+            "user_id": write.user_id,
+            "chat_ids": list(desired),
+            "chat_types": list(desired.values()),
+            "keys": keys[folder_uuid],
+            "now": models.storable_now(),
+        },
+    ).fetchone()
+    if not row["found"]:
+        raise storage_exc.RecordNotFound(
+            model=models.Folder,
+            filters={"uuid": folder_uuid},
+        )
+    created = [item for is_created, item in row["upserted"] if is_created]
+    updated = [item for is_created, item in row["upserted"] if not is_created]
+    write.deleted(data_versions.FOLDER_ITEM, *row["deleted"])
+    write.changed(
+        data_versions.FOLDER_ITEM,
+        *(item["uuid"] for item in created + updated),
+    )
+    return {"created": created, "updated": updated, "deleted": row["deleted"]}
+
+
+class _Operation:
+    def __init__(self, index, op, values):
+        self.index = index
+        self.op = op
+        self.values = values
+        self.item = None
+
+    def error(self, reason):
+        return user_api_exceptions.BulkOperationError(
+            index=self.index,
+            reason=reason,
+        )
+
+
+def _parse_operations(operations):
+    limit = CONF[DOMAIN].max_operations
+    if len(operations) > limit:
+        raise user_api_exceptions.TooManyBulkOperationsError(limit=limit)
+    properties = models.FolderItem.properties.properties
+    folder_uuid_type = types.UUID()
+    result = []
+    seen_uuids = set()
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise user_api_exceptions.BulkOperationError(
+                index=index,
+                reason="an object is expected",
+            )
+        values = dict(operation)
+        op = _Operation(index, values.pop("op", None), values)
+        if op.op not in _ALLOWED_FIELDS:
+            raise op.error(f"unknown op {op.op!r}")
+        unknown = set(values) - _ALLOWED_FIELDS[op.op]
+        if unknown:
+            raise op.error(f"unknown fields {sorted(unknown)}")
+        missing = _REQUIRED_FIELDS[op.op] - set(values)
+        if missing:
+            raise op.error(f"missing fields {sorted(missing)}")
+        for name, value in values.items():
+            prop_type = (
+                folder_uuid_type
+                if name == "folder_uuid"
+                else properties[name].get_property_type()
+            )
+            try:
+                values[name] = prop_type.from_simple_type(value)
+            except (TypeError, ValueError, ra_exc.RestAlchemyException):
+                raise op.error(f"invalid value of {name!r}")
+        uuid = values.get("uuid")
+        if uuid is not None:
+            if uuid in seen_uuids:
+                raise op.error("the item is used by another operation")
+            seen_uuids.add(uuid)
+        result.append(op)
+    return result
+
+
+def _get_owned(model, user_id, uuids):
+    if not uuids:
+        return {}
+    return {
+        obj.uuid: obj
+        for obj in model.objects.get_all(
+            filters={
+                "uuid": dm_filters.In(list(uuids)),
+                "user_id": dm_filters.EQ(user_id),
+            },
+        )
+    }
+
+
+def apply_item_operations(write, operations):
+    """Validate and apply create, update and delete operations on items.
+
+    Operations are dicts with an `op` key and item fields. Folders and
+    existing items are loaded with one query each, which also checks they
+    belong to the user, then all rows are written with one statement per
+    kind of operation. Any invalid operation fails the whole batch.
+
+    :param write: `data_versions.UserDataWrite` of the transaction.
+    :return: list of operations with `item` set to the stored model.
+    """
+    ops = _parse_operations(operations)
+    user_id = write.user_id
+
+    folders = _get_owned(
+        models.Folder,
+        user_id,
+        {op.values["folder_uuid"] for op in ops if "folder_uuid" in op.values},
+    )
+    items = _get_owned(
+        models.FolderItem,
+        user_id,
+        {op.values["uuid"] for op in ops if op.op != CREATE},
+    )
+
+    created, updated, deleted = [], [], []
+    # Created items and items moved to another folder, which go last
+    appended = []
+    for op in ops:
+        values = dict(op.values)
+        if "folder_uuid" in values:
+            values["folder"] = folders.get(values.pop("folder_uuid"))
+            if values["folder"] is None:
+                raise op.error("folder not found")
+        if op.op != CREATE:
+            op.item = items.get(values.pop("uuid"))
+            if op.item is None:
+                raise op.error("item not found")
+        ordering.discard_client_key(
+            values,
+            current=op.item.order_index if op.item is not None else None,
+        )
+        try:
+            if op.op == CREATE:
+                op.item = models.FolderItem(user_id=user_id, **values)
+                appended.append(op.item)
+            elif op.op == UPDATE:
+                folder = values.get("folder", op.item.folder)
+                moved = folder.uuid != op.item.folder.uuid
+                op.item.update_dm(values=values)
+                if moved:
+                    appended.append(op.item)
+        except (TypeError, ValueError, ra_exc.RestAlchemyException) as e:
+            raise op.error(str(e))
+        {CREATE: created, UPDATE: updated, DELETE: deleted}[op.op].append(op.item)
+
+    counts = collections.Counter(item.folder.uuid for item in appended)
+    keys = ordering.get_append_keys(write, counts)
+    for item in appended:
+        item.order_index = keys[item.folder.uuid].pop(0)
+
+    # Deletes go first, so a batch may move a chat by delete and create
+    session = write.session
+    if deleted:
+        session.batch_delete(deleted)
+        write.deleted(data_versions.FOLDER_ITEM, *(i.uuid for i in deleted))
+    batch_update(updated, session)
+    if created:
+        session.batch_insert(created)
+    write.changed(
+        data_versions.FOLDER_ITEM,
+        *(i.uuid for i in updated + created),
+    )
+    return ops
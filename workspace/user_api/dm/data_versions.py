@@ -0,0 +1,146 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Per-user data version and change records of folders and items.
+
+Every write to folders or items of a user bumps the version in the same
+transaction, so an unchanged version means unchanged data. The write
+also stamps the changed rows with the new version in `user_data_changes`,
+deleted rows stay there as tombstones for `[sync] tombstone_ttl` seconds.
+A delta sync is then a range scan over versions of one user.
+"""
+
+from oslo_config import cfg
+from restalchemy.storage.sql import engines
+
+
+DOMAIN = "sync"
+
+sync_opts = [
+    cfg.IntOpt(
+        "tombstone_ttl",
+        default=30 * 24 * 3600,
+        min=1,
+        help="How long (in seconds) deleted folders and items are reported "
+        "to delta sync. Older sync cursors require a full sync",
+    ),
+]
+
+CONF = cfg.CONF
+CONF.register_opts(sync_opts, DOMAIN)
+
+FOLDER = "folder"
+FOLDER_ITEM = "folder_item"
+
+_NOW = "(NOW() AT TIME ZONE 'UTC')"
+
+
+def _get_engine():
+    return engines.engine_factory.get_engine()
+
+
+def get_version(user_id, session=None):
+    """Return the data version of a user, 0 if nothing was written yet."""
+    engine = _get_engine()
+    with engine.session_manager(session=session) as s:
+        row = s.execute(
+            'SELECT "version" FROM "user_data_versions" WHERE "user_id" = %s;',
+            (user_id,),
+        ).fetchone()
+    return row["version"] if row else 0
+
+
+def bump_version(user_id, session=None):
+    """Increment the data version of a user and return the new value.
+
+    The row stays locked until the transaction ends, so writes of the same
+    user are serialized and their versions become visible in order.
+    """
+    engine = _get_engine()
+    with engine.session_manager(session=session) as s:
+        row = s.execute(
+            'INSERT INTO "user_data_versions" ("user_id", "version")'
+            " VALUES (%s, 1)"
+            ' ON CONFLICT ("user_id") DO UPDATE'
+            ' SET "version" = "user_data_versions"."version" + 1'
+            ' RETURNING "version";',
+            (user_id,),
+        ).fetchone()
+    return row["version"]
+
+
+class UserDataWrite:
+    """One write transaction of a user.
+
+    Bumps the version on creation, so it must be created before the rows
+    are changed, and records every changed row with that version.
+    """
+
+    _UPSERT = (
+        'INSERT INTO "user_data_changes"'
+        ' ("uuid", "user_id", "kind", "version", "deleted_at")'
+        " {source}"
+        ' ON CONFLICT ("uuid") DO UPDATE'
+        ' SET "version" = EXCLUDED."version",'
+        ' "deleted_at" = EXCLUDED."deleted_at";'
+    )
+
+    def __init__(self, user_id, session):
+        self.user_id = user_id
+        self.session = session
+        self.version = bump_version(user_id, session=session)
+
+    def _record(self, kind, uuids, deleted):
+        if not uuids:
+            return
+        deleted_at = _NOW if deleted else "NULL"
+        self.session.execute(
+            self._UPSERT.format(
+                source=f"SELECT unnest(%s::uuid[]), %s, %s, %s, {deleted_at}"
+            ),
+            (list(uuids), self.user_id, kind, self.version),
+        )
+
+    def changed(self, kind, *uuids):
+        """Record created or updated rows."""
+        self._record(kind, uuids, deleted=False)
+
+    def deleted(self, kind, *uuids):
+        """Record deleted rows and drop expired tombstones of the user."""
+        if not uuids:
+            return
+        self._record(kind, uuids, deleted=True)
+        self.session.execute(
+            'DELETE FROM "user_data_changes"'
+            ' WHERE "user_id" = %s AND "deleted_at" < '
+            f"{_NOW} - make_interval(secs => %s);",
+            (self.user_id, CONF[DOMAIN].tombstone_ttl),
+        )
+
+    def folder_deleted(self, uuid):
+        """Record a folder deletion, call it before the folder is deleted.
+
+        Items of the folder are removed by cascade, so they get tombstones
+        here as well.
+        """
+        self.session.execute(
+            self._UPSERT.format(
+                source=f'SELECT "uuid", "user_id", %s, %s, {_NOW}'
+                ' FROM "folder_items" WHERE "folder" = %s'
+            ),
+            (FOLDER_ITEM, self.version, uuid),
+        )
+        self.deleted(FOLDER, uuid)
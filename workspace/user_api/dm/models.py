@@ -14,6 +14,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
 import enum
 
 from restalchemy.dm import filters as dm_filters
@@ -24,6 +25,13 @@ from restalchemy.dm import types
 from restalchemy.storage.sql import orm
 
 
+def storable_now():
+    """Return the current time as stored in timestamp columns."""
+    return types.UTCDateTimeZ().to_simple_type(
+        datetime.datetime.now(datetime.timezone.utc),
+    )
+
+
 class ChatType(str, enum.Enum):
     STREAM = "stream"
     GROUP = "group"
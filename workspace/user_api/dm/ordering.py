@@ -0,0 +1,222 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""Sparse `order_index` keys of folder items.
+
+Items are ordered by `order_index` with NULLs last, then by creation.
+Keys are spread `ORDER_STEP` apart, so moving an item between two others
+only rewrites the moved row. When there is no free key left between the
+neighbours, the whole folder is renumbered once in the same transaction.
+New items get keys after the last item of the folder, so only items
+written before that have no key. Keys sent by clients on create and
+update are ignored, items are placed with the move and reorder actions.
+"""
+
+import logging
+
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.dm import data_versions
+from workspace.user_api.dm import models
+
+
+LOG = logging.getLogger(__name__)
+
+ORDER_STEP = 1024
+
+# Order of the items of a folder, NULL keys sort last as in PostgreSQL
+ITEM_ORDER = ("order_index", "created_at", "uuid")
+
+_MAX_INDEX = 2**31 - 1
+_MIN_INDEX = -(2**31)
+
+# The nearest other item of the folder on one side of the anchor
+_NEIGHBOUR_QUERY = """
+    SELECT "a"."order_index" AS "anchor_index", (
+        SELECT "i"."order_index" FROM "folder_items" AS "i"
+        WHERE "i"."folder" = "a"."folder" AND "i"."uuid" <> %(moved)s
+            AND ("i"."order_index", "i"."created_at", "i"."uuid")
+                {op} ("a"."order_index", "a"."created_at", "a"."uuid")
+        ORDER BY "i"."order_index" {direction},
+            "i"."created_at" {direction}, "i"."uuid" {direction}
+        LIMIT 1
+    ) AS "neighbour_index"
+    FROM "folder_items" AS "a"
+    WHERE "a"."uuid" = %(anchor)s AND "a"."folder" = %(folder)s
+        AND "a"."user_id" = %(user_id)s;
+"""
+
+# The last key of every folder and whether the folder has unkeyed items
+_LAST_KEYS_QUERY = """
+    SELECT "f"."folder", (
+        SELECT max("i"."order_index") FROM "folder_items" AS "i"
+        WHERE "i"."folder" = "f"."folder" AND "i"."user_id" = %(user_id)s
+    ) AS "last_index", EXISTS (
+        SELECT 1 FROM "folder_items" AS "i"
+        WHERE "i"."folder" = "f"."folder" AND "i"."user_id" = %(user_id)s
+            AND "i"."order_index" IS NULL
+    ) AS "has_unkeyed"
+    FROM unnest(%(folders)s::uuid[]) AS "f"("folder");
+"""
+
+_REBALANCE_QUERY = """
+    UPDATE "folder_items" AS "t"
+    SET "order_index" = "n"."position" * %(step)s, "updated_at" = %(now)s
+    FROM (
+        SELECT "uuid", row_number() OVER (
+            ORDER BY "order_index" NULLS LAST, "created_at", "uuid"
+        ) AS "position"
+        FROM "folder_items"
+        WHERE "folder" = %(folder)s AND "user_id" = %(user_id)s
+    ) AS "n"
+    WHERE "t"."uuid" = "n"."uuid"
+        AND "t"."order_index" IS DISTINCT FROM "n"."position" * %(step)s
+    RETURNING "t"."uuid";
+"""
+
+
+def rebalance(write, folder_uuid):
+    """Spread keys of all items of a folder `ORDER_STEP` apart.
+
+    The current order is kept, items without a key get keys after the
+    others.
+    """
+    rows = write.session.execute(
+        _REBALANCE_QUERY,
+        {
+            "step": ORDER_STEP,
+            "now": models.storable_now(),
+            "folder": folder_uuid,
+            "user_id": write.user_id,
+        },
+    ).fetchall()
+    write.changed(data_versions.FOLDER_ITEM, *(row["uuid"] for row in rows))
+
+
+def _get_last_keys(write, folders):
+    rows = write.session.execute(
+        _LAST_KEYS_QUERY,
+        {"folders": list(folders), "user_id": write.user_id},
+    ).fetchall()
+    return {row["folder"]: row for row in rows}
+
+
+def discard_client_key(values, current=None):
+    """Drop `order_index` from values sent by a client.
+
+    Clients which still send a key keep working, a key other than the
+    current one is logged and ignored.
+    """
+    order_index = values.pop("order_index", None)
+    if order_index is not None and order_index != current:
+        LOG.info("Ignoring order_index %s sent by a client", order_index)
+
+
+def get_append_keys(write, counts):
+    """Return free keys after the last item of folders.
+
+    A folder is renumbered first if it has items without a key, which
+    would sort after the new ones, or if the keys would overflow.
+
+    :param counts: dict of folder uuid to the number of new items.
+    :return: dict of folder uuid to the list of keys, in ascending order.
+    """
+    result = {folder: [] for folder, count in counts.items() if not count}
+    counts = {folder: count for folder, count in counts.items() if count}
+    if not counts:
+        return result
+    last_keys = _get_last_keys(write, counts)
+    stale = [
+        folder
+        for folder, row in last_keys.items()
+        if row["has_unkeyed"]
+        or (row["last_index"] or 0) + counts[folder] * ORDER_STEP > _MAX_INDEX
+    ]
+    for folder in stale:
+        rebalance(write, folder)
+    if stale:
+        last_keys.update(_get_last_keys(write, stale))
+    for folder, count in counts.items():
+        last_index = last_keys[folder]["last_index"] or 0
+        result[folder] = [last_index + n * ORDER_STEP for n in range(1, count + 1)]
+    return result
+
+
+def get_append_key(write, folder_uuid):
+    """Return a free key after the last item of the folder."""
+    return get_append_keys(write, {folder_uuid: 1})[folder_uuid][0]
+
+
+def _get_neighbours(write, item, anchor_uuid, after):
+    row = write.session.execute(
+        _NEIGHBOUR_QUERY.format(
+            op=">" if after else "<",
+            direction="ASC" if after else "DESC",
+        ),
+        {
+            "moved": item.uuid,
+            "anchor": anchor_uuid,
+            "folder": item.folder.uuid,
+            "user_id": write.user_id,
+        },
+    ).fetchone()
+    if row is None:
+        raise user_api_exceptions.InvalidMoveError(
+            reason="the anchor item is not in the folder",
+        )
+    return row["anchor_index"], row["neighbour_index"]
+
+
+def _key_between(lower, upper):
+    if lower is None:
+        key = upper - ORDER_STEP
+        return key if key >= _MIN_INDEX else None
+    if upper is None:
+        key = lower + ORDER_STEP
+        return key if key <= _MAX_INDEX else None
+    if upper - lower < 2:
+        return None
+    return (lower + upper) // 2
+
+
+def get_move_key(write, item, anchor_uuid, after=False):
+    """Return a free `order_index` right before or after the anchor item.
+
+    Renumbers the folder first if the anchor has no key or there is no
+    free key next to it.
+    """
+    if anchor_uuid == item.uuid:
+        raise user_api_exceptions.InvalidMoveError(
+            reason="an item can't be moved relative to itself",
+        )
+    for _ in range(2):
+        anchor_index, neighbour_index = _get_neighbours(
+            write,
+            item,
+            anchor_uuid,
+            after,
+        )
+        if anchor_index is not None:
+            if after:
+                key = _key_between(anchor_index, neighbour_index)
+            else:
+                key = _key_between(neighbour_index, anchor_index)
+            if key is not None:
+                return key
+        rebalance(write, item.folder.uuid)
+    raise user_api_exceptions.InvalidMoveError(
+        reason="the folder has too many items",
+    )
@@ -0,0 +1,427 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Read paths which build API views in SQL, bypassing ORM hydration."""
+
+from restalchemy.storage.sql import engines
+from restalchemy.storage.sql import filters as sql_filters
+
+from workspace.user_api.dm import data_versions
+from workspace.user_api.dm import models
+
+
+# Same format as restalchemy types use for naive UTC timestamps
+_TS_FORMAT = "'YYYY-MM-DD HH24:MI:SS.US'"
+
+
+def _ts(column):
+    return f"to_char({column}, {_TS_FORMAT})"
+
+
+# Mirrors FolderItem.dump_to_simple_view(), the item alias must be "i"
+FOLDER_ITEM_VIEW = f"""
+    json_build_object(
+        'uuid', "i"."uuid",
+        'folder', "i"."folder",
+        'folder_uuid', "i"."folder",
+        'user_id', "i"."user_id",
+        'chat_id', "i"."chat_id",
+        'chat_type', "i"."chat_type",
+        'order_index', "i"."order_index",
+        'pinned_at', {_ts('"i"."pinned_at"')},
+        'created_at', {_ts('"i"."created_at"')},
+        'updated_at', {_ts('"i"."updated_at"')}
+    )
+"""
+
+# Mirrors Folder.dump_to_simple_view()
+_FOLDER_FIELDS = f"""
+        'uuid', "f"."uuid",
+        'title', "f"."title",
+        'user_id', "f"."user_id",
+        'background_color_value', "f"."background_color_value",
+        'unread_messages', array_to_json("f"."unread_messages"),
+        'system_type', "f"."system_type",
+        'created_at', {_ts('"f"."created_at"')},
+        'updated_at', {_ts('"f"."updated_at"')}
+"""
+
+# Folder view without items, the folder alias must be "f"
+FLAT_FOLDER_VIEW = f"json_build_object({_FOLDER_FIELDS})"
+
+# Folder view plus nested items in the order of the folder, see ordering
+_FOLDER_VIEW = f"""
+    json_build_object(
+        {_FOLDER_FIELDS},
+        'items', COALESCE(
+            (
+                SELECT json_agg(
+                    {FOLDER_ITEM_VIEW}
+                    ORDER BY "i"."order_index", "i"."created_at", "i"."uuid"
+                )
+                FROM (
+                    SELECT * FROM "folder_items"
+                    WHERE "folder" = "f"."uuid"
+                        AND "user_id" = "f"."user_id"
+                    ORDER BY "order_index", "created_at", "uuid"
+                    {{items_limit}}
+                ) AS "i"
+            ),
+            '[]'::json
+        )
+    )
+"""
+
+
+def _get_engine():
+    return engines.engine_factory.get_engine()
+
+
+def _build_folders_order(order_by, descending):
+    if not order_by:
+        direction = "DESC" if descending else "ASC"
+        return [("created_at", direction), ("uuid", direction)]
+    properties = models.Folder.properties.properties
+    order = []
+    for name, direction in order_by.items():
+        direction = direction.upper()
+        if name not in properties or direction not in ("ASC", "DESC"):
+            raise ValueError(f"Can't order folders by {name} {direction}")
+        order.append((name, direction))
+    # Same tiebreaker as restalchemy listings
+    if "uuid" not in order_by:
+        order.append(("uuid", "ASC"))
+    return order
+
+
+def build_folders_with_items_query(
+    filters,
+    session,
+    limit=None,
+    marker=None,
+    items_limit=None,
+    descending=False,
+    order_by=None,
+):
+    """Build the statement used by `get_folders_with_items`.
+
+    Filters only restrict the folder set. Items are fetched per selected
+    folder through the `folder` index, so filters narrowing the folders
+    also narrow the items which are read.
+
+    :return: tuple of the SQL statement and its values.
+    """
+    if order_by and (limit is not None or marker is not None):
+        raise ValueError("Pages of folders are ordered by the keyset only")
+    values = []
+    items_clause = ""
+    if items_limit is not None:
+        items_clause = "LIMIT %s"
+        values.append(items_limit + 1)
+
+    where = sql_filters.convert_filters(models.Folder, filters, session=session)
+    conditions = where.construct_expression() or "TRUE"
+    values.extend(where.value)
+    after = "<" if descending else ">"
+    if marker is not None:
+        conditions = (
+            f'({conditions}) AND ("created_at", "uuid")'
+            f" {after} (%s::timestamp, %s::uuid)"
+        )
+        values.extend((marker["created_at"], marker["uuid"]))
+    limit_clause = ""
+    if limit is not None:
+        limit_clause = "LIMIT %s"
+        values.append(limit)
+
+    order = _build_folders_order(order_by, descending)
+    folder_view = _FOLDER_VIEW.format(items_limit=items_clause)
+    statement = f"""
+        SELECT COALESCE(
+            json_agg(
+                {folder_view}
+                ORDER BY {", ".join(f'"f"."{n}" {d}' for n, d in order)}
+            ),
+            '[]'::json
+        ) AS "folders"
+        FROM (
+            SELECT * FROM "folders"
+            WHERE {conditions}
+            ORDER BY {", ".join(f'"{n}" {d}' for n, d in order)}
+            {limit_clause}
+        ) AS "f";
+    """
+    return statement, values
+
+
+def get_folders_with_items(
+    filters,
+    session=None,
+    limit=None,
+    marker=None,
+    items_limit=None,
+    descending=False,
+    order_by=None,
+):
+    """Return folders matching `filters` with nested `items`.
+
+    The whole nested structure is aggregated by one SQL statement and
+    returned as decoded JSON, in the same shape as the ORM based
+    `dump_to_simple_view()` of Folder and FolderItem.
+
+    Folders are ordered by (created_at, uuid) and the items of a folder by
+    (order_index, created_at, uuid), which are also the keysets used for
+    pagination. `order_by` replaces the order of folders of an unpaginated
+    listing.
+
+    :param filters: restalchemy filters on Folder fields.
+    :param limit: maximum number of folders to return.
+    :param marker: dict with simple `created_at` and `uuid` values, only
+                   folders after it are returned.
+    :param items_limit: maximum number of items per folder. One extra item
+                        is returned for folders having more items, so the
+                        caller can tell whether there is a next page.
+    :param descending: order folders by (created_at, uuid) descending,
+                       `marker` then selects the folders before it.
+    :param order_by: dict of Folder fields to directions, orders folders
+                     of an unpaginated listing instead of the keyset.
+    """
+    engine = _get_engine()
+    with engine.session_manager(session=session) as s:
+        statement, values = build_folders_with_items_query(
+            filters,
+            s,
+            limit=limit,
+            marker=marker,
+            items_limit=items_limit,
+            descending=descending,
+            order_by=order_by,
+        )
+        return s.execute(statement, values).fetchone()["folders"]
+
+
+def build_changes_query(user_id, since_version, until_version):
+    """Build the statement used by `get_changes`.
+
+    :return: tuple of the SQL statement and its values.
+    """
+    if since_version is None:
+        # Full sync: every live row, nothing was seen yet to be deleted
+        changes = ""
+        values = []
+        folders_cond = items_cond = "TRUE"
+        deleted = "'[]'::json"
+    else:
+        changes = """
+            WITH "c" AS (
+                SELECT "uuid", "kind", "deleted_at" FROM "user_data_changes"
+                WHERE "user_id" = %s AND "version" > %s AND "version" <= %s
+            )
+        """
+        values = [user_id, since_version, until_version]
+        live = 'SELECT "uuid" FROM "c" WHERE "kind" = %s AND "deleted_at" IS NULL'
+        folders_cond = f'"f"."uuid" IN ({live})'
+        items_cond = f'"i"."uuid" IN ({live})'
+        deleted = """
+            COALESCE(
+                (
+                    SELECT json_agg("uuid" ORDER BY "uuid") FROM "c"
+                    WHERE "kind" = %s AND "deleted_at" IS NOT NULL
+                ),
+                '[]'::json
+            )
+        """
+    statement = f"""
+        {changes}
+        SELECT
+            COALESCE(
+                (
+                    SELECT json_agg(
+                        {FLAT_FOLDER_VIEW}
+                        ORDER BY "f"."created_at", "f"."uuid"
+                    )
+                    FROM "folders" AS "f"
+                    WHERE "f"."user_id" = %s AND {folders_cond}
+                ),
+                '[]'::json
+            ) AS "folders",
+            COALESCE(
+                (
+                    SELECT json_agg(
+                        {FOLDER_ITEM_VIEW}
+                        ORDER BY "i"."created_at", "i"."uuid"
+                    )
+                    FROM "folder_items" AS "i"
+                    WHERE "i"."user_id" = %s AND {items_cond}
+                ),
+                '[]'::json
+            ) AS "folder_items",
+            {deleted} AS "deleted_folders",
+            {deleted} AS "deleted_folder_items";
+    """
+    if since_version is None:
+        values += [user_id, user_id]
+    else:
+        values += [
+            user_id,
+            data_versions.FOLDER,
+            user_id,
+            data_versions.FOLDER_ITEM,
+            data_versions.FOLDER,
+            data_versions.FOLDER_ITEM,
+        ]
+    return statement, values
+
+
+def get_changes(user_id, since_version=None, until_version=None, session=None):
+    """Return folders and items of a user changed between two versions.
+
+    Rows changed after `since_version` up to `until_version` included are
+    returned in their current state, deleted ones by uuid only. Without
+    `since_version` all live rows are returned.
+
+    :return: dict with `folders`, `folder_items`, `deleted_folders` and
+             `deleted_folder_items` lists.
+    """
+    engine = _get_engine()
+    with engine.session_manager(session=session) as s:
+        statement, values = build_changes_query(
+            user_id,
+            since_version,
+            until_version,
+        )
+        return dict(s.execute(statement, values).fetchone())
+
+
+def build_chat_folders_query(user_id, chat_ids, chat_type=None):
+    """Build the statement used by `get_chat_folders`.
+
+    :return: tuple of the SQL statement and its values.
+    """
+    values = [chat_ids, user_id]
+    type_cond = ""
+    if chat_type is not None:
+        type_cond = 'AND "i"."chat_type" = %s'
+        values.append(chat_type)
+    statement = f"""
+        SELECT COALESCE(
+            json_agg(
+                json_build_object(
+                    'chat_id', "c"."chat_id",
+                    'folders', "c"."folders"
+                )
+                ORDER BY "c"."position"
+            ),
+            '[]'::json
+        ) AS "chats"
+        FROM (
+            SELECT "r"."chat_id", "r"."position", COALESCE(
+                json_agg(
+                    json_build_object(
+                        'folder_uuid', "i"."folder",
+                        'item_uuid', "i"."uuid",
+                        'chat_type', "i"."chat_type",
+                        'pinned', "i"."pinned_at" IS NOT NULL,
+                        'pinned_at', {_ts('"i"."pinned_at"')}
+                    )
+                    ORDER BY "i"."created_at", "i"."uuid"
+                ) FILTER (WHERE "i"."uuid" IS NOT NULL),
+                '[]'::json
+            ) AS "folders"
+            FROM unnest(%s::integer[]) WITH ORDINALITY
+                AS "r" ("chat_id", "position")
+            LEFT JOIN "folder_items" AS "i"
+                ON "i"."user_id" = %s AND "i"."chat_id" = "r"."chat_id"
+                {type_cond}
+            GROUP BY "r"."chat_id", "r"."position"
+        ) AS "c";
+    """
+    return statement, values
+
+
+def get_chat_folders(user_id, chat_ids, chat_type=None, session=None):
+    """Return the folders of a user which contain each of the chats.
+
+    One statement looks the chats up through the (user_id, chat_id)
+    index, so the cost does not depend on the size of the account.
+
+    :param chat_ids: list of unique chat ids, the order is kept.
+    :param chat_type: only items of this chat type are returned.
+    :return: list of dicts with `chat_id` and `folders`, the membership
+             of the chat in each folder: `folder_uuid`, `item_uuid`,
+             `chat_type`, `pinned` and `pinned_at`. Chats in no folder
+             have empty `folders`.
+    """
+    engine = _get_engine()
+    with engine.session_manager(session=session) as s:
+        statement, values = build_chat_folders_query(
+            user_id,
+            chat_ids,
+            chat_type=chat_type,
+        )
+        return s.execute(statement, values).fetchone()["chats"]
+
+
+def build_folder_summaries_query(user_id):
+    """Build the statement used by `get_folder_summaries`.
+
+    :return: tuple of the SQL statement and its values.
+    """
+    statement = f"""
+        SELECT COALESCE(
+            json_agg(
+                json_build_object(
+                    'uuid', "f"."uuid",
+                    'title', "f"."title",
+                    'background_color_value', "f"."background_color_value",
+                    'system_type', "f"."system_type",
+                    'items_count', COALESCE("c"."items_count", 0),
+                    'pinned_count', COALESCE("c"."pinned_count", 0),
+                    'unread_count', cardinality("f"."unread_messages"),
+                    'created_at', {_ts('"f"."created_at"')},
+                    'updated_at', {_ts('"f"."updated_at"')}
+                )
+                ORDER BY "f"."created_at", "f"."uuid"
+            ),
+            '[]'::json
+        ) AS "folders"
+        FROM "folders" AS "f"
+        LEFT JOIN (
+            SELECT "folder", count(*) AS "items_count",
+                count("pinned_at") AS "pinned_count"
+            FROM "folder_items"
+            WHERE "user_id" = %s
+            GROUP BY "folder"
+        ) AS "c" ON "c"."folder" = "f"."uuid"
+        WHERE "f"."user_id" = %s;
+    """
+    return statement, [user_id, user_id]
+
+
+def get_folder_summaries(user_id, session=None):
+    """Return the folders of a user with counters instead of contents.
+
+    Items are counted by one GROUP BY over the items of the user, so the
+    response size depends on the number of folders only.
+
+    :return: list of folder dicts ordered by (created_at, uuid), without
+             `unread_messages` and items, with `items_count`,
+             `pinned_count` and `unread_count`.
+    """
+    engine = _get_engine()
+    with engine.session_manager(session=session) as s:
+        statement, values = build_folder_summaries_query(user_id)
+        return s.execute(statement, values).fetchone()["folders"]
@@ -0,0 +1,73 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""System folders which every user has at most one of."""
+
+from workspace.user_api.dm import models
+from workspace.user_api.dm import queries
+
+
+# Partial unique index on "folders" ("user_id") of ALL folders
+ALL_FOLDER_INDEX = "folders_one_all_per_user_idx"
+
+
+def is_all_folder_conflict(exc):
+    """Tell whether a ConflictRecords error comes from ALL_FOLDER_INDEX."""
+    return ALL_FOLDER_INDEX in str(exc)
+
+
+def ensure_all_folder(user_id, title, session):
+    """Return the ALL folder of the user, creating it if there is none.
+
+    The insert and the lookup of an existing folder are one statement. A
+    folder inserted concurrently may be invisible to it, then it is read
+    again.
+
+    :return: (folder view, whether it was created).
+    """
+    folder = models.Folder(
+        title=title,
+        user_id=user_id,
+        system_type=models.SystemFolderType.ALL.value,
+    )
+    row = folder.get_storable_snapshot()
+    columns = sorted(row)
+    names = ", ".join(f'"{name}"' for name in columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    select_existing = (
+        f'SELECT {queries.FLAT_FOLDER_VIEW} AS "folder", false AS "created"'
+        ' FROM "folders" AS "f"'
+        ' WHERE "f"."user_id" = %s AND "f"."system_type" = %s'
+    )
+    result = session.execute(
+        f'WITH "inserted" AS (INSERT INTO "folders" AS "f" ({names})'
+        f" VALUES ({placeholders})"
+        """ ON CONFLICT ("user_id") WHERE "system_type" = 'all' DO NOTHING"""
+        f' RETURNING {queries.FLAT_FOLDER_VIEW} AS "folder", true AS "created")'
+        f' SELECT * FROM "inserted" UNION ALL {select_existing} LIMIT 1;',
+        [
+            *(row[name] for name in columns),
+            user_id,
+            models.SystemFolderType.ALL.value,
+        ],
+    ).fetchone()
+    if result is None:
+        result = session.execute(
+            f"{select_existing};",
+            (user_id, models.SystemFolderType.ALL.value),
+        ).fetchone()
+    return result["folder"], result["created"]
@@ -0,0 +1,104 @@
+#    Copyright 2025 Genesis Corporation.
+#
+#    All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+"""In-place changes of `Folder.unread_messages`.
+
+Each change is one UPDATE which gets only the changed message ids and
+edits the stored array on the server, instead of round-tripping the
+whole list through the model.
+"""
+
+from restalchemy.storage import exceptions as storage_exc
+
+from workspace.user_api import exceptions as user_api_exceptions
+from workspace.user_api.dm import data_versions
+from workspace.user_api.dm import models
+from workspace.user_api.dm import queries
+
+
+# Message ids of the request
+_DELTA = "%(ids)s::integer[]"
+
+_ADD = f"""
+    "f"."unread_messages" || ARRAY(
+        SELECT "d"."e" FROM unnest({_DELTA}) WITH ORDINALITY AS "d"("e", "n")
+        WHERE "d"."e" <> ALL("f"."unread_messages")
+        ORDER BY "d"."n"
+    )
+"""
+
+_REMOVE = f"""
+    ARRAY(
+        SELECT "u"."e"
+        FROM unnest("f"."unread_messages") WITH ORDINALITY AS "u"("e", "n")
+        WHERE "u"."e" <> ALL({_DELTA})
+        ORDER BY "u"."n"
+    )
+"""
+
+_CLEAR = "'{}'"
+
+
+def _parse_ids(message_ids):
+    list_type = models.Folder.properties.properties[
+        "unread_messages"
+    ].get_property_type()
+    if not list_type.validate(message_ids) or any(
+        isinstance(value, bool) for value in message_ids
+    ):
+        raise user_api_exceptions.InvalidUnreadMessagesError()
+    return list(dict.fromkeys(message_ids))
+
+
+def _change(write, folder_uuid, expression, message_ids=()):
+    row = write.session.execute(
+        'UPDATE "folders" AS "f"'
+        f' SET "unread_messages" = {expression}, "updated_at" = %(now)s'
+        ' WHERE "f"."uuid" = %(uuid)s AND "f"."user_id" = %(user_id)s'
+        f' RETURNING {queries.FLAT_FOLDER_VIEW} AS "folder";',
+        {
+            "ids": list(message_ids),
+            "now": models.storable_now(),
+            "uuid": folder_uuid,
+            "user_id": write.user_id,
+        },
+    ).fetchone()
+    if row is None:
+        raise storage_exc.RecordNotFound(
+            model=models.Folder,
+            filters={"uuid": folder_uuid},
+        )
+    write.changed(data_versions.FOLDER, folder_uuid)
+    return row["folder"]
+
+
+def add_unread(write, folder_uuid, message_ids):
+    """Append message ids which are not in the list yet.
+
+    :return: folder view after the change.
+    """
+    return _change(write, folder_uuid, _ADD, _parse_ids(message_ids))
+
+
+def remove_unread(write, folder_uuid, message_ids):
+    """Remove message ids from the list, keeping the order of the rest."""
+    return _change(write, folder_uuid, _REMOVE, _parse_ids(message_ids))
+
+
+def clear_unread(write, folder_uuid):
+    """Remove all message ids from the list."""
+    return _change(write, folder_uuid, _CLEAR)
@@ -20,3 +20,53 @@ from restalchemy.common import exceptions as ra_exc
 class OnlyOneAllFolderPerUserError(ra_exc.ValidationErrorException):
     message = "Only one 'all' folder is allowed per user"
     code = 400001001
+
+
+class InvalidSyncCursorError(ra_exc.ValidationErrorException):
+    message = "Invalid sync cursor"
+    code = 400001002
+
+
+class SyncCursorExpiredError(ra_exc.RestAlchemyException):
+    message = "Sync cursor has expired, a full sync without cursor is required"
+    code = 410
+
+
+class BulkOperationError(ra_exc.ValidationErrorException):
+    message = "Operation %(index)s is invalid: %(reason)s"
+    code = 400001003
+
+
+class TooManyBulkOperationsError(ra_exc.ValidationErrorException):
+    message = "At most %(limit)s operations are allowed in one request"
+    code = 400001004
+
+
+class InvalidReorderItemError(ra_exc.ValidationErrorException):
+    message = "Item %(index)s of the new order is invalid: %(reason)s"
+    code = 400001005
+
+
+class InvalidMoveError(ra_exc.ValidationErrorException):
+    message = "Item can't be moved: %(reason)s"
+    code = 400001006
+
+
+class InvalidBatchPinError(ra_exc.ValidationErrorException):
+    message = "Invalid batch of items to pin or unpin: %(reason)s"
+    code = 400001007
+
+
+class InvalidUnreadMessagesError(ra_exc.ValidationErrorException):
+    message = "A list of message ids is expected"
+    code = 400001008
+
+
+class InvalidChatFoldersQueryError(ra_exc.ValidationErrorException):
+    message = "Invalid chat folders query: %(reason)s"
+    code = 400001009
+
+
+class InvalidFolderSyncError(ra_exc.ValidationErrorException):
+    message = "Invalid chats to sync: %(reason)s"
+    code = 400001010